@@ -0,0 +1,125 @@
+"""Benchmark the v2 CodeAnalyzer traversal on deeply nested Python code.
+
+Compares the single-pass visitor in code_analyzer against the previous
+traversal (kept below as legacy_visit), which ran ast.walk over every
+function body. That traversal never descended into nested functions, so
+it is also timed with nested=True, recording them the same way: each body
+is then re-walked once per enclosing function. Parsing is done once up
+front; only the traversal into the graph is timed.
+
+Usage:
+    python benchmarks/bench_analyzer.py [--depths 5 20 50] [--blocks 200] [--repeat 3]
+"""
+import argparse
+import ast
+import os
+import sys
+import time
+from pathlib import Path
+
+import networkx as nx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'v2', 'agentic_codebase_genius', 'py_module'))
+
+from code_analyzer import CodeAnalyzer
+
+
+def make_nested_source(blocks: int, depth: int) -> str:
+    """
+    blocks top-level units, each a class whose method holds depth nested
+    functions; every level makes two calls.
+    """
+    lines = []
+    for b in range(blocks):
+        lines.append(f"class Unit{b}(Base):")
+        lines.append(f"    def run_{b}(self, x):")
+        indent = "        "
+        for d in range(depth):
+            lines.append(f"{indent}def level_{b}_{d}(x):")
+            indent += "    "
+            lines.append(f"{indent}y = helper_{d}(x) + transform(x)")
+        for d in reversed(range(depth)):
+            indent = indent[:-4]
+            lines.append(f"{indent}return level_{b}_{d}(y)" if d else f"{indent}return level_{b}_0(x)")
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def legacy_visit(graph, node, file_path, parent=None, nested=False):
+    """
+    The traversal CodeAnalyzer._visit_tree used before the scope-stack
+    visitor; nested=True also records nested functions.
+    """
+    if isinstance(node, ast.ClassDef):
+        graph.add_node(node.name, type='class', file=file_path)
+        if parent:
+            graph.add_edge(parent, node.name, type='contains')
+        for base in node.bases:
+            if isinstance(base, ast.Name):
+                graph.add_edge(base.id, node.name, type='inherits')
+        for item in node.body:
+            legacy_visit(graph, item, file_path, node.name, nested)
+    elif isinstance(node, ast.FunctionDef):
+        graph.add_node(node.name, type='function', file=file_path)
+        if parent:
+            graph.add_edge(parent, node.name, type='contains')
+        for child in ast.walk(node):
+            if isinstance(child, ast.Call) and isinstance(child.func, ast.Name):
+                graph.add_edge(node.name, child.func.id, type='calls')
+        if nested:
+            # the nearest nested definitions; each re-walks its own body
+            stack = list(ast.iter_child_nodes(node))
+            while stack:
+                item = stack.pop()
+                if isinstance(item, (ast.FunctionDef, ast.ClassDef)):
+                    legacy_visit(graph, item, file_path, node.name, nested)
+                else:
+                    stack.extend(ast.iter_child_nodes(item))
+    elif isinstance(node, ast.Module):
+        module_name = Path(file_path).stem
+        graph.add_node(module_name, type='module', file=file_path)
+        for item in node.body:
+            legacy_visit(graph, item, file_path, module_name, nested)
+
+
+def run_current(tree, file_path):
+    analyzer = CodeAnalyzer()
+    analyzer._visit_tree(tree, file_path)
+    return analyzer.get_graph()
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--depths", type=int, nargs="+", default=[5, 20, 50])
+    ap.add_argument("--blocks", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    file_path = "bench/nested.py"
+    print(f"{'depth':>6} {'lines':>8} {'legacy nodes':>13} {'nodes':>8} {'legacy s':>10} "
+          f"{'+nested s':>10} {'visitor s':>10} {'speedup':>8}")
+    for depth in args.depths:
+        source = make_nested_source(args.blocks, depth)
+        tree = ast.parse(source, filename=file_path)
+        graph = run_current(tree, file_path)
+        legacy = nx.DiGraph()
+        legacy_visit(legacy, tree, file_path)
+        t_legacy = best_of(lambda: legacy_visit(nx.DiGraph(), tree, file_path), args.repeat)
+        t_nested = best_of(lambda: legacy_visit(nx.DiGraph(), tree, file_path, nested=True), args.repeat)
+        t_current = best_of(lambda: run_current(tree, file_path), args.repeat)
+        # speedup is against the legacy traversal doing the same work (+nested)
+        print(f"{depth:>6} {source.count(chr(10)):>8} {legacy.number_of_nodes():>13} {len(graph['nodes']):>8} "
+              f"{t_legacy:>10.3f} {t_nested:>10.3f} {t_current:>10.3f} {t_nested / t_current:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
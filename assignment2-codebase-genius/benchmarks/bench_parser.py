@@ -0,0 +1,99 @@
+"""Benchmark parser_utils on large generated Python and Jac files.
+
+Compares the Tree-sitter and ast paths for Python, and times the Jac
+tokenizer on a large generated file as a regression check.
+
+Usage:
+    python benchmarks/bench_parser.py [--functions 2000 5000] [--jac-lines 50000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'v1', 'py_modules'))
+
+import parser_utils
+
+
+def make_python_source(n_functions: int) -> str:
+    """Deterministic module with classes, decorated methods, imports and calls."""
+    lines = ["import os", "import json as j", "from collections import defaultdict, OrderedDict", ""]
+    for i in range(n_functions):
+        if i % 10 == 0:
+            lines.append(f"class Service{i}(Base{i % 7}):")
+            lines.append(f'    """Service {i}."""')
+        indent = "    " if i % 10 else ""
+        if i % 10:
+            lines.append(f"{indent}@staticmethod")
+        lines.append(f"{indent}def func_{i}(a, b: int = {i}, *args, key=None, **kwargs) -> int:")
+        lines.append(f'{indent}    """Function {i} docs."""')
+        lines.append(f"{indent}    x = func_{max(i - 1, 0)}(a, b)")
+        lines.append(f"{indent}    y = helper(x) + len(args)")
+        lines.append(f"{indent}    return transform(x, y)")
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def make_jac_source(n_lines: int) -> str:
+    """Deterministic Jac-like file of roughly n_lines lines."""
+    lines = ["import os", ""]
+    i = 0
+    while len(lines) < n_lines:
+        if i % 20 == 0:
+            lines.append(f"class Node{i}():")
+            lines.append(f'    """Node {i}."""')
+        lines.append(f"def walk_{i}(here, depth):")
+        lines.append(f'    """Walk {i}."""')
+        lines.append(f"    visit(here.child_{i}(depth))")
+        lines.append(f"    report(score(depth), walk_{max(i - 1, 0)}(here, depth - 1))")
+        lines.append("")
+        i += 1
+    return "\n".join(lines[:n_lines]) + "\n"
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--functions", type=int, nargs="+", default=[1000, 5000, 20000])
+    ap.add_argument("--jac-lines", type=int, nargs="+", default=[50000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    if not parser_utils.TREE_SITTER_AVAILABLE:
+        print("tree-sitter is not installed; only the ast path can be measured")
+
+    tmp = tempfile.mkdtemp()
+    file_path = os.path.join(tmp, "bench", "generated.py")
+    print(f"{'functions':>10} {'lines':>8} {'tree-sitter s':>14} {'ast s':>10} {'speedup':>8}")
+    for n in args.functions:
+        source = make_python_source(n)
+        module = parser_utils.module_name(file_path)
+        t_ast = best_of(lambda: parser_utils._parse_python_ast(source, file_path, module), args.repeat)
+        if parser_utils.TREE_SITTER_AVAILABLE:
+            t_ts = best_of(lambda: parser_utils._parse_python_tree_sitter(source, module), args.repeat)
+            print(f"{n:>10} {source.count(chr(10)):>8} {t_ts:>14.3f} {t_ast:>10.3f} {t_ast / t_ts:>7.1f}x")
+        else:
+            print(f"{n:>10} {source.count(chr(10)):>8} {'-':>14} {t_ast:>10.3f} {'-':>8}")
+
+    jac_path = os.path.join(tmp, "bench", "generated.jac")
+    print()
+    print(f"{'jac lines':>10} {'symbols':>8} {'calls':>8} {'parse s':>10}")
+    for n in args.jac_lines:
+        source = make_jac_source(n)
+        result = parser_utils.parse_jac_source(source, jac_path)
+        t_jac = best_of(lambda: parser_utils.parse_jac_source(source, jac_path), args.repeat)
+        print(f"{n:>10} {len(result['symbols']):>8} {len(result['calls']):>8} {t_jac:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
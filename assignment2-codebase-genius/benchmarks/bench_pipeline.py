@@ -0,0 +1,176 @@
+"""Benchmark the analysis pipeline stages on synthetic repositories.
+
+Generates a deterministic repository per scale (see synthetic_repo.py) and
+times v1 map_repo, parse_file (every source file, no cache), build_ccg and
+generate_diagrams, and v2 analyze_codebase and generate_markdown. Results
+are printed as a table and can be written as JSON, keyed by commit, so runs
+from different commits can be compared.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--scales small medium] [--repeat 3]
+        [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, '..')
+# v1 is imported as py_modules.*, v2 as py_module.*; v2 goes first because
+# v1 also ships a py_module facade package
+sys.path.insert(0, os.path.join(ROOT, 'v1'))
+sys.path.insert(0, os.path.join(ROOT, 'v2', 'agentic_codebase_genius'))
+sys.path.insert(0, HERE)
+
+from synthetic_repo import SCALES, generate_repo
+
+from py_modules import diagram
+from py_modules.ccg import build_ccg
+from py_modules.parse_store import ParseStore
+from py_modules.parser_utils import parse_file, PARSERS
+from py_modules.repo_mapper import map_repo
+from py_module.code_analyzer import analyze_codebase
+from py_module.docgenie import generate_markdown
+from py_module.repo_mapper import generate_file_tree, summarize_readme
+
+RESULTS_FORMAT = 'codegenius-bench'
+RESULTS_VERSION = 1
+
+
+def git_commit():
+    try:
+        sha = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+        return sha, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def measure(fn, repeat: int):
+    """Run fn repeat times; return (per-run seconds, last return value)."""
+    runs, value = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        runs.append(time.perf_counter() - start)
+    return runs, value
+
+
+def bench_scale(scale: str, repeat: int, workers: int, workdir: str):
+    spec = SCALES[scale]
+    repo = os.path.join(workdir, f"synthetic_{scale}")
+    start = time.perf_counter()
+    counts = generate_repo(repo, spec)
+    print(f"[{scale}] generated {counts['files']} files, {counts['bytes'] / 1e6:.1f} MB "
+          f"in {time.perf_counter() - start:.1f}s")
+    out = os.path.join(workdir, f"out_{scale}")
+    os.makedirs(out, exist_ok=True)
+    records = []
+
+    def record(stage, impl, runs, **extra):
+        records.append({'scale': scale, 'stage': stage, 'impl': impl, 'best_s': min(runs),
+                        'mean_s': sum(runs) / len(runs), 'runs': runs, 'counts': extra})
+
+    runs, repo_map = measure(lambda: map_repo(repo), repeat)
+    record('map_repo', 'v1', runs, files=len(repo_map['files']))
+
+    targets = [os.path.join(repo, rel) for rel in sorted(repo_map['files'])
+               if os.path.splitext(rel)[1] in PARSERS]
+    runs, symbols = measure(lambda: sum(len(parse_file(t)['symbols']) for t in targets), repeat)
+    record('parse_file', 'v1', runs, files=len(targets), symbols=symbols)
+
+    runs, ccg = measure(lambda: build_ccg(targets, store=ParseStore(), workers=workers), repeat)
+    record('build_ccg', 'v1', runs, files=len(targets), workers=workers,
+           nodes=ccg.graph.number_of_nodes(), edges=ccg.graph.number_of_edges())
+
+    # diagrams draw a budgeted summary, so this no longer grows with the CCG
+    runs, diagrams = measure(lambda: diagram.generate_diagrams(ccg, out, f"synthetic_{scale}"), repeat)
+    record('generate_diagrams', 'v1', runs, nodes=ccg.graph.number_of_nodes(),
+           shown=diagrams['views']['call_graph']['shown'] if diagrams['views'].get('call_graph') else 0)
+
+    runs, graph = measure(lambda: analyze_codebase(repo), repeat)
+    record('analyze_codebase', 'v2', runs, nodes=len(graph['nodes']), edges=len(graph['edges']))
+
+    file_tree = generate_file_tree(repo)
+    readme_summary = summarize_readme(repo)
+    runs, markdown = measure(lambda: generate_markdown(file_tree, readme_summary, graph, f"synthetic_{scale}", out), repeat)
+    record('generate_markdown', 'v2', runs, bytes=len(markdown.encode('utf-8')))
+
+    return {'spec': asdict(spec), 'repo': counts}, records
+
+
+def print_table(records, baseline=None):
+    previous = {(r['scale'], r['stage'], r['impl']): r for r in (baseline or {}).get('results', [])}
+    header = f"{'scale':<8} {'stage':<18} {'impl':<4} {'best s':>9} {'mean s':>9}"
+    print(header + (f" {'baseline s':>11} {'ratio':>7}" if baseline else ''))
+    for r in records:
+        if 'skipped' in r:
+            print(f"{r['scale']:<8} {r['stage']:<18} {r['impl']:<4} {'skipped: ' + r['skipped']:>19}")
+            continue
+        line = f"{r['scale']:<8} {r['stage']:<18} {r['impl']:<4} {r['best_s']:>9.4f} {r['mean_s']:>9.4f}"
+        old = previous.get((r['scale'], r['stage'], r['impl']))
+        if old and 'best_s' in old:
+            line += f" {old['best_s']:>11.4f} {r['best_s'] / old['best_s']:>6.2f}x"
+        print(line)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scales", nargs="+", choices=sorted(SCALES), default=['small', 'medium'])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--workers", type=int, default=None, help="build_ccg parse workers (default: CPU count)")
+    ap.add_argument("--output", help="write results as JSON to this path")
+    ap.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    ap.add_argument("--keep", action="store_true", help="keep the generated repositories")
+    args = ap.parse_args()
+
+    commit, dirty = git_commit()
+    results = {
+        'format': RESULTS_FORMAT,
+        'version': RESULTS_VERSION,
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'repeat': args.repeat,
+        'scales': {},
+        'results': [],
+    }
+
+    workdir = tempfile.mkdtemp(prefix="codegenius-bench-")
+    try:
+        for scale in args.scales:
+            info, records = bench_scale(scale, args.repeat, args.workers, workdir)
+            results['scales'][scale] = info
+            results['results'].extend(records)
+    finally:
+        if args.keep:
+            print(f"repositories kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print()
+    print_table(results['results'], baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nresults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
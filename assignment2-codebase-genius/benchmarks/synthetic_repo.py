@@ -0,0 +1,176 @@
+"""Deterministic synthetic repositories for the pipeline benchmarks.
+
+The same RepoSpec always produces byte-identical files, so timings from
+different commits are measured on the same input.
+
+Usage:
+    python benchmarks/synthetic_repo.py DEST [--modules 200] [--functions 20] ...
+"""
+import argparse
+import json
+import os
+import random
+from dataclasses import dataclass, asdict
+from typing import Dict, List
+
+
+@dataclass
+class RepoSpec:
+    modules: int = 50
+    functions: int = 10          # per module
+    class_depth: int = 5         # length of each inheritance chain
+    calls_per_function: int = 3  # call edges out of every function
+    packages: int = 5            # top-level packages the modules are spread over
+    package_depth: int = 2       # directory nesting inside each package
+    jac_files: int = 1
+    jac_lines: int = 2000        # per .jac file
+    tree_files: int = 100        # non-source files (assets) for file-tree size
+    tree_depth: int = 4
+    seed: int = 0
+
+
+SCALES: Dict[str, RepoSpec] = {
+    'small': RepoSpec(modules=20, functions=10, jac_lines=2000, tree_files=200),
+    'medium': RepoSpec(modules=200, functions=20, packages=10, jac_files=2, jac_lines=20000, tree_files=5000),
+    'large': RepoSpec(modules=1000, functions=30, class_depth=10, calls_per_function=5, packages=20,
+                      package_depth=3, jac_files=4, jac_lines=50000, tree_files=50000, tree_depth=6),
+}
+
+
+def module_path(spec: RepoSpec, i: int) -> str:
+    """Repo-relative path of module i: pkg_<p>/sub_<d>/.../mod_<i>.py."""
+    parts = [f"pkg_{i % spec.packages}"]
+    parts += [f"sub_{(i // spec.packages) % 3}_{d}" for d in range(spec.package_depth)]
+    return "/".join(parts + [f"mod_{i}.py"])
+
+
+def dotted(path: str) -> str:
+    return path[:-3].replace("/", ".")
+
+
+def make_module(spec: RepoSpec, i: int, rng: random.Random) -> str:
+    """
+    Module i: imports of earlier modules, one class that extends the class
+    of module i-1 (so inheritance chains are class_depth long), methods and
+    functions that call local and imported functions.
+    """
+    lines = ['"""Synthetic module %d."""' % i, "import os", "import json", ""]
+    imported: List[str] = []
+    if i:
+        for j in sorted({rng.randrange(i) for _ in range(min(i, spec.calls_per_function))}):
+            lines.append(f"from {dotted(module_path(spec, j))} import func_{j}_0")
+            imported.append(f"func_{j}_0")
+    if i % spec.class_depth:
+        lines.append(f"from {dotted(module_path(spec, i - 1))} import Model{i - 1}")
+        lines.append("")
+        lines.append(f"class Model{i}(Model{i - 1}):")
+    else:
+        lines.append("")
+        lines.append(f"class Model{i}:")
+    lines.append(f'    """Model {i}."""')
+    lines.append("")
+    lines.append("    def __init__(self, value=0):")
+    lines.append("        self.value = value")
+    for m in range(3):
+        lines.append("")
+        lines.append(f"    def method_{m}(self, x):")
+        lines.append(f"        return func_{i}_{m % spec.functions}(x) + self.value")
+    lines.append("")
+
+    local = [f"func_{i}_{f}" for f in range(spec.functions)]
+    for f in range(spec.functions):
+        lines.append("")
+        lines.append(f"def func_{i}_{f}(a, b: int = {f}, *args, **kwargs) -> int:")
+        lines.append(f'    """Function {f} of module {i}."""')
+        callees = local[:f] + imported
+        total = "a"
+        for c in range(min(spec.calls_per_function, len(callees))):
+            callee = callees[rng.randrange(len(callees))]
+            lines.append(f"    v{c} = {callee}(a, b)")
+            total += f" + v{c}"
+        lines.append(f"    return {total}")
+    return "\n".join(lines) + "\n"
+
+
+def make_jac(spec: RepoSpec, index: int) -> str:
+    """
+    Jac file of spec.jac_lines lines, in the def/class form the Jac
+    tokenizer in parser_utils recognises (as in bench_parser.py).
+    """
+    lines = ["import os", ""]
+    i = 0
+    while len(lines) < spec.jac_lines:
+        if i % 20 == 0:
+            lines.append(f"class Node{index}_{i}():")
+            lines.append(f'    """Node {i}."""')
+        lines.append(f"def walk_{index}_{i}(here, depth):")
+        lines.append(f'    """Walk {i}."""')
+        lines.append(f"    visit(here.child_{i}(depth))")
+        lines.append(f"    report(score(depth), walk_{index}_{max(i - 1, 0)}(here, depth - 1))")
+        lines.append("")
+        i += 1
+    return "\n".join(lines[:spec.jac_lines]) + "\n"
+
+
+def tree_file_path(spec: RepoSpec, i: int) -> str:
+    parts = ["assets"] + [f"d{(i >> (3 * d)) % 8}" for d in range(spec.tree_depth)]
+    return "/".join(parts + [f"file_{i}.txt"])
+
+
+def generate_repo(dest: str, spec: RepoSpec = None) -> Dict[str, int]:
+    """
+    Write the repository described by spec under dest (created if needed)
+    and return counts: files, bytes, python_files, jac_files, functions,
+    classes.
+    """
+    spec = spec or RepoSpec()
+    rng = random.Random(spec.seed)
+    written = {'files': 0, 'bytes': 0}
+
+    def write(rel: str, text: str):
+        path = os.path.join(dest, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = text.encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(data)
+        written['files'] += 1
+        written['bytes'] += len(data)
+
+    write("README.md", f"# Synthetic repository\n\nGenerated benchmark input: {json.dumps(asdict(spec))}\n")
+    write("requirements.txt", "networkx\n")
+    packages = set()
+    for i in range(spec.modules):
+        path = module_path(spec, i)
+        write(path, make_module(spec, i, rng))
+        parts = path.split("/")[:-1]
+        for d in range(1, len(parts) + 1):
+            packages.add("/".join(parts[:d]))
+    for package in sorted(packages):
+        write(f"{package}/__init__.py", "")
+    write("main.py", f"from {dotted(module_path(spec, spec.modules - 1))} import Model{spec.modules - 1}\n\n\n"
+                     f"def main():\n    return Model{spec.modules - 1}().method_0(1)\n\n\n"
+                     "if __name__ == \"__main__\":\n    main()\n")
+    for j in range(spec.jac_files):
+        write(f"jac/walkers_{j}.jac", make_jac(spec, j))
+    for i in range(spec.tree_files):
+        write(tree_file_path(spec, i), f"asset {i}\n")
+
+    return dict(written, python_files=spec.modules + len(packages) + 1, jac_files=spec.jac_files,
+                functions=spec.modules * (spec.functions + 4) + 1, classes=spec.modules)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("dest")
+    ap.add_argument("--scale", choices=sorted(SCALES), help="start from a preset")
+    for name, default in asdict(RepoSpec()).items():
+        ap.add_argument("--" + name.replace("_", "-"), type=int, default=None, help=f"default {default}")
+    args = ap.parse_args()
+
+    values = asdict(SCALES[args.scale]) if args.scale else asdict(RepoSpec())
+    values.update({k: v for k, v in vars(args).items() if k in values and v is not None})
+    print(json.dumps(generate_repo(args.dest, RepoSpec(**values))))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,122 @@
 import networkx as nx
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable
 from pathlib import Path
 
+try:
+    from .parse_store import ParseStore
+    from .parallel_parse import DEFAULT_TIMEOUT
+    from .ccg_compact import CompactCodeContextGraph
+    from .symbol_index import SymbolIndex, module_dotted_names
+    from .parser_utils import module_name
+except ImportError:
+    from parse_store import ParseStore
+    from parallel_parse import DEFAULT_TIMEOUT
+    from ccg_compact import CompactCodeContextGraph
+    from symbol_index import SymbolIndex, module_dotted_names
+    from parser_utils import module_name
+
 class CodeContextGraph:
     def __init__(self):
         self.graph = nx.DiGraph()
+        self.index = SymbolIndex()
+        # (edge type, reverse) -> {node: [neighbours]}, see adjacency()
+        self._adjacency: Dict[tuple, Dict[str, List[str]]] = {}
+        self._adjacency_key = None
+
+    def _invalidate(self):
+        # every method that edits the graph calls this, so adjacency() never
+        # serves edges from before the edit
+        self._adjacency_key = None
 
     def add_symbols(self, symbols: List[Dict]):
         for sym in symbols:
             node_id = f"{sym['module']}::{sym['name']}"
             self.graph.add_node(node_id, **sym)
+            self.index.add_symbol(sym, node_id)
+        self._invalidate()
 
     def add_calls(self, calls: List[Dict]):
-        for call in calls:
-            if call['caller']:
-                caller_id = f"{call['module']}::{call['caller']}"
-                callee_id = f"{call['module']}::{call['callee']}"  # assume same module for now
-                if callee_id in self.graph:
-                    self.graph.add_edge(caller_id, callee_id, type='calls')
+        # callees resolve to the same module first, then through imports
+        for caller_id, callee_id, edge_type in self.index.call_edges(calls):
+            self.graph.add_edge(caller_id, callee_id, type=edge_type)
+        self._invalidate()
 
     def add_inherits(self, symbols: List[Dict]):
-        for sym in symbols:
-            if sym['kind'] == 'class' and 'bases' in sym:
-                child_id = f"{sym['module']}::{sym['name']}"
-                for base in sym['bases']:
-                    # Heuristic: if base is simple name, assume same module
-                    base_id = f"{sym['module']}::{base}"
-                    if base_id in self.graph:
-                        self.graph.add_edge(child_id, base_id, type='inherits')
+        for child_id, base_id, edge_type in self.index.inherit_edges(symbols):
+            self.graph.add_edge(child_id, base_id, type=edge_type)
+        self._invalidate()
 
     def add_imports(self, imports: List[Dict]):
-        for imp in imports:
-            module_id = f"{imp['module']}"
-            imported_id = imp['name']
-            self.graph.add_edge(module_id, imported_id, type='imports')
+        self.index.add_imports(imports)
+        for module_id, imported_id, edge_type in self.index.import_edges(imports):
+            self.graph.add_edge(module_id, imported_id, type=edge_type)
+        self._invalidate()
 
-    def build_from_parsed(self, parsed_files: List[Dict]):
+    def index_parsed(self, parsed: Dict):
+        """Add one file's symbols and register its imports, without edges."""
+        self.add_symbols(parsed['symbols'])
+        self.index.add_imports(parsed['imports'])
+
+    def link_parsed(self, parsed_files: List[Dict]):
+        """Resolve call, inheritance and import edges for indexed files."""
         for parsed in parsed_files:
-            self.add_symbols(parsed['symbols'])
             self.add_calls(parsed['calls'])
             self.add_inherits(parsed['symbols'])
             self.add_imports(parsed['imports'])
 
+    def build_from_parsed(self, parsed_files: List[Dict]):
+        # Index every file before resolving edges so calls and bases can
+        # point into modules that appear later in the list.
+        parsed_files = list(parsed_files)
+        for parsed in parsed_files:
+            self.index_parsed(parsed)
+        self.link_parsed(parsed_files)
+
+    def to_networkx(self) -> nx.DiGraph:
+        return self.graph
+
+    def remove_modules(self, modules: Iterable[str]) -> List[tuple]:
+        """
+        Drop every node owned by the given module labels (the module node and
+        its 'module::name' symbols) together with their edges.
+
+        Returns the (source, target, attrs) edges that pointed into those
+        nodes from other modules, so callers can restore the ones whose
+        target reappears after a re-parse.
+        """
+        modules = set(modules)
+        doomed = [n for n in self.graph.nodes if n.partition('::')[0] in modules]
+        incoming = []
+        for node in doomed:
+            for u, _, data in self.graph.in_edges(node, data=True):
+                if u.partition('::')[0] not in modules:
+                    incoming.append((u, node, data))
+        self.graph.remove_nodes_from(doomed)
+        self._invalidate()
+        for module in modules:
+            self.index.remove_module(module)
+        return incoming
+
+    @classmethod
+    def from_json(cls, data) -> 'CodeContextGraph':
+        """
+        Rebuild a graph from to_json() output (a JSON string or the decoded
+        dict). Symbol nodes are re-indexed so new edges can resolve into them.
+        """
+        if isinstance(data, (str, bytes)):
+            data = json.loads(data)
+        ccg = cls()
+        for node in data['nodes']:
+            attrs = {k: v for k, v in node.items() if k != 'id'}
+            ccg.graph.add_node(node['id'], **attrs)
+            if 'module' in attrs and 'name' in attrs:
+                ccg.index.add_symbol(attrs, node['id'])
+        for edge in data['edges']:
+            attrs = {k: v for k, v in edge.items() if k not in ('source', 'target')}
+            ccg.graph.add_edge(edge['source'], edge['target'], **attrs)
+        return ccg
+
     def to_json(self) -> str:
         data = {
             'nodes': [{'id': n, **self.graph.nodes[n]} for n in self.graph.nodes],
@@ -50,12 +124,31 @@ class CodeContextGraph:
         }
         return json.dumps(data, indent=2)
 
+    def adjacency(self, edge_type: str, reverse: bool = False) -> Dict[str, List[str]]:
+        """
+        {node: neighbours} over edges of one type, forward or reverse. All
+        types are built together in one pass over the edges and reused until
+        the graph is edited: the methods of this class reset it, and direct
+        edits to self.graph are caught when they change the node or edge
+        count (call _invalidate() after any other direct edit).
+        """
+        key = (id(self.graph), self.graph.number_of_nodes(), self.graph.number_of_edges())
+        if self._adjacency_key != key:
+            self._adjacency = {}
+            for u, v, data in self.graph.edges(data=True):
+                edge = data.get('type')
+                self._adjacency.setdefault((edge, False), {}).setdefault(u, []).append(v)
+                self._adjacency.setdefault((edge, True), {}).setdefault(v, []).append(u)
+            self._adjacency_key = key
+        return self._adjacency.get((edge_type, reverse), {})
+
     def query_functions_calling(self, func_name: str) -> List[str]:
-        callers = []
-        for u, v, data in self.graph.in_edges(func_name, data=True):
-            if data.get('type') == 'calls':
-                callers.append(u)
-        return callers
+        return list(self.adjacency('calls', reverse=True).get(func_name, ()))
+
+    def query_functions_calling_many(self, func_names: Iterable[str]) -> Dict[str, List[str]]:
+        """query_functions_calling for many functions in one call, as {name: callers}."""
+        callers = self.adjacency('calls', reverse=True)
+        return {name: list(callers.get(name, ())) for name in func_names}
 
     def get_high_impact_functions(self) -> List[str]:
         # Simple: high in-degree (many callers)
@@ -63,18 +156,138 @@ class CodeContextGraph:
         sorted_funcs = sorted(degrees.items(), key=lambda x: x[1], reverse=True)
         return [f for f, d in sorted_funcs if d > 0][:10]  # top 10
 
-def build_ccg(target_files: List[str]) -> CodeContextGraph:
-    from parser_utils import parse_file  # import here to avoid circular
+# Graph implementations selectable in build_ccg
+CCG_BACKENDS = {
+    'networkx': CodeContextGraph,
+    'compact': CompactCodeContextGraph,
+}
+
+def build_ccg(target_files: List[str], store: ParseStore = None, workers: int = None,
+              timeout: float = DEFAULT_TIMEOUT, backend: str = 'networkx', **pool_options) -> CodeContextGraph:
+    """
+    Build a CCG from target_files. Pass a shared ParseStore so later stages
+    can reuse the parse results instead of re-reading the files.
+
+    backend='compact' selects CompactCodeContextGraph, which uses far less
+    memory on large repositories and exposes the same API.
 
-    ccg = CodeContextGraph()
+    Files are parsed in a process pool (see parallel_parse.parse_sources;
+    workers, timeout and pool_options are passed through). Symbols are
+    indexed as each result arrives; edges are resolved across modules once
+    every file is in.
+    """
+    if store is None:
+        store = ParseStore()
+
+    ccg = CCG_BACKENDS[backend]()
+    existing = [file_path for file_path in target_files if store.exists(file_path)]
     parsed_files = []
-    for file_path in target_files:
-        if Path(file_path).exists():
-            parsed = parse_file(file_path)
-            parsed_files.append(parsed)
-    ccg.build_from_parsed(parsed_files)
+    for _, parsed in store.parse_many(existing, workers=workers, timeout=timeout, **pool_options):
+        ccg.index_parsed(parsed)
+        parsed_files.append(parsed)
+    ccg.link_parsed(parsed_files)
     return ccg
 
+def _dependent_modules(ccg: CodeContextGraph, modules: set) -> set:
+    """
+    Untouched modules whose edges may change when modules are updated or
+    removed: those with edges into them, and those importing a dotted name
+    any of them can be imported as (an import that did not resolve before,
+    or that a new module with the same name makes ambiguous).
+    """
+    names = {dotted for module in modules for dotted in module_dotted_names(module)}
+    dependents = set()
+    for u, v, data in ccg.graph.edges(data=True):
+        source, target = u.partition('::')[0], v.partition('::')[0]
+        if source in modules:
+            continue
+        if target in modules:
+            dependents.add(source)
+        elif data.get('type') == 'imports':
+            if '/' in target or target.endswith(('.py', '.jac')):
+                candidates = module_dotted_names(target)
+            else:
+                parts = target.split('.')
+                candidates = ['.'.join(parts[i:j]) for j in (len(parts), len(parts) - 1) for i in range(j)]
+            if names.intersection(candidates):
+                dependents.add(source)
+    return dependents
+
+def update_ccg(previous, changed: List[str] = (), added: List[str] = (), deleted: List[str] = (),
+               store: ParseStore = None, workers: int = None, timeout: float = DEFAULT_TIMEOUT,
+               sources: Iterable[str] = None, **pool_options) -> Dict[str, Any]:
+    """
+    Incrementally update a CCG after some files changed, instead of
+    rebuilding it from scratch.
+
+    previous is a CodeContextGraph or its to_json() output. changed, added
+    and deleted are file paths in the current checkout (see
+    git_utils.diff_name_status). Nodes and edges of those modules are
+    removed, only changed and added files are re-parsed, and the results
+    are spliced back in.
+
+    The graph does not keep the calls and imports each module made, so an
+    untouched module that depends on an updated one can only be relinked by
+    parsing it again. Pass sources, the paths of every source file in the
+    current checkout, and dependent modules are re-parsed too, which makes
+    the result match a full build_ccg. Without it the result is approximate:
+    edges from untouched modules into updated ones are kept when their
+    target still exists, but calls they make to names the update adds are
+    not linked.
+
+    Module labels are relative to a file's parent directory, so top-level
+    modules only match when the previous graph came from a checkout with the
+    same directory name.
+
+    Returns {"ccg", "updated_modules", "removed_modules", "dependent_modules"};
+    dependent_modules are the untouched modules with edges into updated or
+    removed ones (or importing their names), i.e. whose docs need
+    regenerating too.
+    """
+    if isinstance(previous, CodeContextGraph):
+        ccg = previous
+    elif isinstance(previous, CompactCodeContextGraph):
+        ccg = CodeContextGraph.from_json(previous.to_json())
+    else:
+        ccg = CodeContextGraph.from_json(previous)
+    if store is None:
+        store = ParseStore()
+
+    reparse = [file_path for file_path in list(changed) + list(added) if store.exists(file_path)]
+    updated = {module_name(file_path) for file_path in reparse}
+    removed = {module_name(file_path) for file_path in deleted} - updated
+    dependents = _dependent_modules(ccg, updated | removed)
+    if sources is not None:
+        paths = {module_name(file_path): file_path for file_path in sources}
+        relink = [paths[module] for module in sorted(dependents) if module in paths and store.exists(paths[module])]
+        reparse += relink
+        incoming = ccg.remove_modules(updated | removed | {module_name(file_path) for file_path in relink})
+    else:
+        incoming = ccg.remove_modules(updated | removed)
+
+    parsed_files = []
+    for _, parsed in store.parse_many(reparse, workers=workers, timeout=timeout, **pool_options):
+        ccg.index_parsed(parsed)
+        parsed_files.append(parsed)
+    ccg.link_parsed(parsed_files)
+
+    for u, v, data in incoming:
+        # module nodes only exist through edges, so an import of an updated
+        # module is restored even if that module no longer imports anything
+        if v in ccg.graph or v in updated:
+            ccg.graph.add_edge(u, v, **data)
+    # module and external-name nodes only exist through edges; drop those the update left without any
+    ccg.graph.remove_nodes_from([node for node, data in ccg.graph.nodes(data=True)
+                                 if 'name' not in data and ccg.graph.degree(node) == 0])
+    ccg._invalidate()
+
+    return {
+        "ccg": ccg,
+        "updated_modules": sorted(updated),
+        "removed_modules": sorted(removed),
+        "dependent_modules": sorted(dependents),
+    }
+
 def summarize_module(module_path: str, symbols: List[Dict], code_snippet: str = "") -> str:
     """
     Summarize a module using a simple fallback.
@@ -0,0 +1,274 @@
+import json
+from array import array
+from typing import List, Dict, Any, Optional
+
+import networkx as nx
+
+try:
+    from .symbol_index import SymbolIndex
+except ImportError:
+    from symbol_index import SymbolIndex
+
+EDGE_TYPES = ('calls', 'inherits', 'imports')
+KINDS = ('function', 'class')
+# Symbol keys stored in columns; anything else goes to the per-node extras
+COLUMN_KEYS = ('name', 'kind', 'signature', 'docstring', 'module', 'line')
+
+
+class _CSR:
+    """Compressed sparse row adjacency: neighbours of i are indices[indptr[i]:indptr[i + 1]]."""
+
+    __slots__ = ('indptr', 'indices')
+
+    def __init__(self, num_nodes: int, keys: List[int]):
+        # keys are sorted, de-duplicated src * num_nodes + dst pairs
+        self.indices = array('l', (k % num_nodes for k in keys))
+        counts = array('l', [0]) * (num_nodes + 1)
+        for k in keys:
+            counts[k // num_nodes + 1] += 1
+        for i in range(num_nodes):
+            counts[i + 1] += counts[i]
+        self.indptr = counts
+
+    def neighbors(self, i: int):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def degree(self, i: int) -> int:
+        return self.indptr[i + 1] - self.indptr[i]
+
+
+class CompactCodeContextGraph:
+    """
+    Memory-lean drop-in for CodeContextGraph.
+
+    Node ids are interned to integers and symbol attributes live in column
+    arrays (strings are interned once into a shared table), instead of one
+    networkx attribute dict per node and per edge. Edges are appended to
+    per-type arrays and frozen on first query into CSR adjacency, forward
+    and reverse, for each edge type (calls, inherits, imports).
+
+    The public API matches CodeContextGraph; ``graph`` / ``to_networkx()``
+    build a networkx view on demand for code such as the diagram renderer.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._node_ids: List[str] = []
+        # string -> index; None until first needed on graphs loaded from disk
+        self._strings: Optional[Dict[str, int]] = {}
+        self._string_table: List[str] = []
+        # int32 attribute columns, -1 marks "not set"
+        self._name = array('i')
+        self._kind = array('b')
+        self._signature = array('i')
+        self._docstring = array('i')
+        self._module = array('i')
+        self._line = array('i')
+        self._extras: Dict[int, Dict[str, Any]] = {}
+        self._edge_src = {t: array('i') for t in EDGE_TYPES}
+        self._edge_dst = {t: array('i') for t in EDGE_TYPES}
+        self._csr: Dict[Any, _CSR] = {}
+        self._nx_graph: Optional[nx.DiGraph] = None
+        self._index: Optional[SymbolIndex] = SymbolIndex()
+
+    # -- interning -------------------------------------------------------
+
+    def _intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        if self._strings is None:
+            self._strings = {s: i for i, s in enumerate(self._string_table)}
+        idx = self._strings.get(value)
+        if idx is None:
+            idx = len(self._string_table)
+            self._strings[value] = idx
+            self._string_table.append(value)
+        return idx
+
+    def _node(self, node_id: str) -> int:
+        idx = self._ids.get(node_id)
+        if idx is None:
+            idx = len(self._node_ids)
+            self._ids[node_id] = idx
+            self._node_ids.append(node_id)
+            for column in (self._name, self._kind, self._signature, self._docstring, self._module, self._line):
+                column.append(-1)
+        return idx
+
+    def _invalidate(self):
+        self._csr.clear()
+        self._nx_graph = None
+
+    @property
+    def index(self) -> SymbolIndex:
+        # Graphs loaded from disk (ccg_format.read_ccg) index their symbol
+        # nodes on first use, so a load that only queries stays cheap.
+        if self._index is None:
+            self._index = SymbolIndex()
+            for idx, node_id in enumerate(self._node_ids):
+                if self._module[idx] >= 0 and self._name[idx] >= 0:
+                    self._index.add_symbol({'module': self._string_table[self._module[idx]],
+                                            'name': self._string_table[self._name[idx]]}, node_id)
+        return self._index
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._node_ids)
+
+    # -- building (mirrors CodeContextGraph) ------------------------------
+
+    def _set_attrs(self, idx: int, sym: Dict[str, Any]):
+        kind = sym.get('kind')
+        self._name[idx] = self._intern(sym.get('name'))
+        self._signature[idx] = self._intern(sym.get('signature'))
+        self._docstring[idx] = self._intern(sym.get('docstring'))
+        self._module[idx] = self._intern(sym.get('module'))
+        line = sym.get('line')
+        self._line[idx] = line if isinstance(line, int) else -1
+        extras = {k: v for k, v in sym.items() if k not in COLUMN_KEYS}
+        if kind in KINDS:
+            self._kind[idx] = KINDS.index(kind)
+        else:
+            self._kind[idx] = -1
+            if kind is not None:
+                extras['kind'] = kind
+        if extras:
+            self._extras[idx] = extras
+        else:
+            self._extras.pop(idx, None)
+
+    def add_node(self, node_id: str, **attrs):
+        idx = self._node(node_id)
+        if attrs:
+            self._set_attrs(idx, attrs)
+        self._invalidate()
+
+    def add_edge(self, source: str, target: str, edge_type: str):
+        self._edge_src.setdefault(edge_type, array('i')).append(self._node(source))
+        self._edge_dst.setdefault(edge_type, array('i')).append(self._node(target))
+        self._invalidate()
+
+    def add_symbols(self, symbols: List[Dict]):
+        for sym in symbols:
+            node_id = f"{sym['module']}::{sym['name']}"
+            self._set_attrs(self._node(node_id), sym)
+            self.index.add_symbol(sym, node_id)
+        self._invalidate()
+
+    def add_calls(self, calls: List[Dict]):
+        for caller_id, callee_id, edge_type in self.index.call_edges(calls):
+            self.add_edge(caller_id, callee_id, edge_type)
+
+    def add_inherits(self, symbols: List[Dict]):
+        for child_id, base_id, edge_type in self.index.inherit_edges(symbols):
+            self.add_edge(child_id, base_id, edge_type)
+
+    def add_imports(self, imports: List[Dict]):
+        self.index.add_imports(imports)
+        for module_id, imported_id, edge_type in self.index.import_edges(imports):
+            self.add_edge(module_id, imported_id, edge_type)
+
+    def index_parsed(self, parsed: Dict):
+        self.add_symbols(parsed['symbols'])
+        self.index.add_imports(parsed['imports'])
+
+    def link_parsed(self, parsed_files: List[Dict]):
+        for parsed in parsed_files:
+            self.add_calls(parsed['calls'])
+            self.add_inherits(parsed['symbols'])
+            self.add_imports(parsed['imports'])
+
+    def build_from_parsed(self, parsed_files: List[Dict]):
+        parsed_files = list(parsed_files)
+        for parsed in parsed_files:
+            self.index_parsed(parsed)
+        self.link_parsed(parsed_files)
+
+    # -- adjacency ---------------------------------------------------------
+
+    def adjacency(self, edge_type: str, reverse: bool = False) -> _CSR:
+        """CSR adjacency for one edge type, built once until the graph changes."""
+        key = (edge_type, reverse)
+        csr = self._csr.get(key)
+        if csr is None:
+            n = max(len(self._node_ids), 1)
+            src = self._edge_src.get(edge_type, array('i'))
+            dst = self._edge_dst.get(edge_type, array('i'))
+            if reverse:
+                src, dst = dst, src
+            keys = sorted(set(s * n + d for s, d in zip(src, dst)))
+            csr = self._csr[key] = _CSR(n, keys)
+        return csr
+
+    def node_attrs(self, node_id: str) -> Dict[str, Any]:
+        return self._attrs(self._ids[node_id])
+
+    def _attrs(self, idx: int) -> Dict[str, Any]:
+        attrs: Dict[str, Any] = {}
+        for key, column in (('name', self._name), ('signature', self._signature),
+                            ('docstring', self._docstring), ('module', self._module)):
+            if column[idx] >= 0:
+                attrs[key] = self._string_table[column[idx]]
+        if self._kind[idx] >= 0:
+            attrs['kind'] = KINDS[self._kind[idx]]
+        if self._line[idx] >= 0:
+            attrs['line'] = self._line[idx]
+        attrs.update(self._extras.get(idx, {}))
+        return attrs
+
+    def iter_edges(self):
+        """Yield (source, target, edge_type) for every distinct edge."""
+        for edge_type in list(self._edge_src):
+            csr = self.adjacency(edge_type)
+            for u in range(len(self._node_ids)):
+                for v in csr.neighbors(u):
+                    yield self._node_ids[u], self._node_ids[v], edge_type
+
+    # -- CodeContextGraph API ---------------------------------------------
+
+    def to_json(self) -> str:
+        data = {
+            'nodes': [{'id': n, **self._attrs(i)} for i, n in enumerate(self._node_ids)],
+            'edges': [{'source': u, 'target': v, 'type': t} for u, v, t in self.iter_edges()]
+        }
+        return json.dumps(data, indent=2)
+
+    def query_functions_calling(self, func_name: str) -> List[str]:
+        idx = self._ids.get(func_name)
+        if idx is None:
+            return []
+        return [self._node_ids[j] for j in self.adjacency('calls', reverse=True).neighbors(idx)]
+
+    def query_functions_calling_many(self, func_names) -> Dict[str, List[str]]:
+        """query_functions_calling for many functions in one call, as {name: callers}."""
+        csr = self.adjacency('calls', reverse=True)
+        result = {}
+        for name in func_names:
+            idx = self._ids.get(name)
+            result[name] = [] if idx is None else [self._node_ids[j] for j in csr.neighbors(idx)]
+        return result
+
+    def get_high_impact_functions(self) -> List[str]:
+        # Simple: high in-degree (many callers), counted across edge types
+        reverse = [self.adjacency(t, reverse=True) for t in self._edge_src]
+        degrees = [(i, sum(csr.degree(i) for csr in reverse)) for i in range(len(self._node_ids))]
+        sorted_funcs = sorted(degrees, key=lambda x: x[1], reverse=True)
+        return [self._node_ids[i] for i, d in sorted_funcs if d > 0][:10]  # top 10
+
+    def to_networkx(self) -> nx.DiGraph:
+        graph = nx.DiGraph()
+        graph.add_nodes_from((n, self._attrs(i)) for i, n in enumerate(self._node_ids))
+        graph.add_edges_from((u, v, {'type': t}) for u, v, t in self.iter_edges())
+        return graph
+
+    @property
+    def graph(self) -> nx.DiGraph:
+        """
+        networkx view for code that needs one (diagrams); cached until the
+        graph changes. Mutating the view does not change this graph.
+        """
+        if self._nx_graph is None:
+            self._nx_graph = self.to_networkx()
+        return self._nx_graph
@@ -0,0 +1,281 @@
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Dict, Any, IO, Iterator, Tuple, Union
+
+try:
+    from .ccg_compact import CompactCodeContextGraph
+except ImportError:
+    from ccg_compact import CompactCodeContextGraph
+
+# On-disk CCG format, little-endian, every section 8-byte aligned:
+#
+#   header        magic, version, flags, node/edge-group/string counts
+#   strings       (num_strings + 1) int64 start offsets, then the UTF-8
+#                 blob of NUL-terminated strings
+#   node columns  int32 x num_nodes each: id, name, kind, signature,
+#                 docstring, module, line, extras (string index of a JSON
+#                 object, -1 when empty)
+#   edge groups   per edge type: type string index, count, int32 sources,
+#                 int32 targets
+#
+# Strings are stored once and referenced by index, so the columns can be
+# copied straight out of the memory map into CompactCodeContextGraph.
+MAGIC = b"CCGB"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHIIIQ")
+GROUP = struct.Struct("<iI")
+# set when no string contains NUL, so the blob can be split in one call
+FLAG_NUL_SPLIT = 1
+NODE_COLUMNS = ('id', 'name', 'kind', 'signature', 'docstring', 'module', 'line', 'extras')
+
+NDJSON_FORMAT = "ccg-ndjson"
+
+Graph = Union['CodeContextGraph', CompactCodeContextGraph]
+
+
+def _pad(n: int) -> int:
+    return -n % 8
+
+
+def to_compact(ccg: Graph) -> CompactCodeContextGraph:
+    """Return ccg as a CompactCodeContextGraph, converting a networkx-backed graph."""
+    if isinstance(ccg, CompactCodeContextGraph):
+        return ccg
+    compact = CompactCodeContextGraph()
+    for node, attrs in ccg.graph.nodes(data=True):
+        compact.add_node(node, **attrs)
+    for u, v, attrs in ccg.graph.edges(data=True):
+        compact.add_edge(u, v, attrs.get('type'))
+    return compact
+
+
+def _int32(values) -> bytes:
+    column = array('i', values)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column.tobytes()
+
+
+def write_ccg(ccg: Graph, path: str) -> int:
+    """
+    Write ccg in the versioned binary format. Accepts either backend.
+    Returns the number of bytes written.
+    """
+    compact = to_compact(ccg)
+    strings = list(compact._string_table)
+    lookup = {s: i for i, s in enumerate(strings)}
+
+    def intern(value: str) -> int:
+        idx = lookup.get(value)
+        if idx is None:
+            idx = lookup[value] = len(strings)
+            strings.append(value)
+        return idx
+
+    num_nodes = len(compact._node_ids)
+    ids = [intern(n) for n in compact._node_ids]
+    extras = array('i', [-1]) * num_nodes
+    for idx, values in compact._extras.items():
+        extras[idx] = intern(json.dumps(values, separators=(',', ':'), sort_keys=True))
+    # untyped edges are stored under the empty string
+    groups = [(intern(t or ''), compact._edge_src[t], compact._edge_dst[t])
+              for t in compact._edge_src if len(compact._edge_src[t])]
+
+    encoded = [s.encode('utf-8') + b'\0' for s in strings]
+    offsets = array('q', [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    blob = b''.join(encoded)
+    flags = FLAG_NUL_SPLIT if blob.count(b'\0') == len(strings) else 0
+
+    columns = [ids, compact._name, compact._kind, compact._signature,
+               compact._docstring, compact._module, compact._line, extras]
+
+    written = 0
+    with open(path, 'wb') as f:
+        def emit(data: bytes):
+            nonlocal written
+            f.write(data)
+            f.write(b'\0' * _pad(len(data)))
+            written += len(data) + _pad(len(data))
+
+        emit(HEADER.pack(MAGIC, FORMAT_VERSION, flags, num_nodes, len(groups), len(strings), len(blob)))
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        emit(offsets.tobytes())
+        emit(blob)
+        for column in columns:
+            emit(_int32(column))
+        for type_idx, src, dst in groups:
+            emit(GROUP.pack(type_idx, len(src)))
+            emit(_int32(src))
+            emit(_int32(dst))
+    return written
+
+
+def read_ccg(path: str) -> CompactCodeContextGraph:
+    """
+    Load a graph written by write_ccg into a CompactCodeContextGraph.
+
+    The file is memory-mapped and the columns are bulk-copied from it, so
+    loading costs roughly one pass over the string table.
+    """
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            return _load(view)
+        finally:
+            view.release()
+
+
+def _int32_column(section: memoryview) -> array:
+    column = array('i')
+    column.frombytes(section)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+
+def _load(view: memoryview) -> CompactCodeContextGraph:
+    if len(view) < HEADER.size:
+        raise ValueError("Not a CCG file: truncated header")
+    magic, version, flags, num_nodes, num_groups, num_strings, blob_size = HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a CCG file: bad magic")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported CCG format version {version} (expected {FORMAT_VERSION})")
+
+    pos = HEADER.size + _pad(HEADER.size)
+
+    def take(nbytes: int) -> memoryview:
+        nonlocal pos
+        if pos + nbytes > len(view):
+            raise ValueError("Not a CCG file: truncated data")
+        section = view[pos:pos + nbytes]
+        pos += nbytes + _pad(nbytes)
+        return section
+
+    offsets = array('q')
+    offsets.frombytes(take(8 * (num_strings + 1)))
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+    blob = bytes(take(blob_size))
+    if flags & FLAG_NUL_SPLIT:
+        strings = blob.decode('utf-8').split('\0')[:num_strings]
+    else:
+        strings = [blob[offsets[i]:offsets[i + 1] - 1].decode('utf-8') for i in range(num_strings)]
+
+    columns = {name: _int32_column(take(4 * num_nodes)) for name in NODE_COLUMNS}
+
+    ccg = CompactCodeContextGraph()
+    ccg._string_table = strings
+    ccg._strings = None
+    ccg._node_ids = [strings[i] for i in columns['id']]
+    ccg._ids = {n: i for i, n in enumerate(ccg._node_ids)}
+    ccg._name = columns['name']
+    ccg._kind = array('b', columns['kind'])
+    ccg._signature = columns['signature']
+    ccg._docstring = columns['docstring']
+    ccg._module = columns['module']
+    ccg._line = columns['line']
+
+    decoded: Dict[int, Dict[str, Any]] = {}
+    for idx, extra in enumerate(columns['extras']):
+        if extra >= 0:
+            if extra not in decoded:
+                decoded[extra] = json.loads(strings[extra])
+            ccg._extras[idx] = decoded[extra]
+
+    for _ in range(num_groups):
+        type_idx, count = GROUP.unpack_from(take(GROUP.size))
+        edge_type = strings[type_idx] or None
+        ccg._edge_src[edge_type] = _int32_column(take(4 * count))
+        ccg._edge_dst[edge_type] = _int32_column(take(4 * count))
+
+    # the symbol index is rebuilt on first use (see CompactCodeContextGraph.index)
+    ccg._index = None
+    return ccg
+
+
+# -- streaming NDJSON ------------------------------------------------------
+
+def _iter_nodes(ccg: Graph) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    if isinstance(ccg, CompactCodeContextGraph):
+        for idx, node_id in enumerate(ccg._node_ids):
+            yield node_id, ccg._attrs(idx)
+    else:
+        yield from ccg.graph.nodes(data=True)
+
+
+def _iter_edges(ccg: Graph) -> Iterator[Tuple[str, str, str]]:
+    if isinstance(ccg, CompactCodeContextGraph):
+        yield from ccg.iter_edges()
+    else:
+        for u, v, attrs in ccg.graph.edges(data=True):
+            yield u, v, attrs.get('type')
+
+
+def write_ndjson(ccg: Graph, out: Union[str, IO[str]]) -> int:
+    """
+    Stream ccg as newline-delimited JSON: a header line, one line per node
+    ({"node": id, "attrs": {...}}) and one per edge ({"edge": [source,
+    target, type]}). Nothing is buffered beyond a single line. out is a path
+    or a text file object; returns the number of lines written.
+    """
+    if isinstance(out, str):
+        with open(out, 'w', encoding='utf-8') as f:
+            return write_ndjson(ccg, f)
+
+    dumps = json.JSONEncoder(separators=(',', ':')).encode
+    out.write(dumps({'format': NDJSON_FORMAT, 'version': FORMAT_VERSION}) + '\n')
+    lines = 1
+    for node_id, attrs in _iter_nodes(ccg):
+        out.write(dumps({'node': node_id, 'attrs': attrs}) + '\n')
+        lines += 1
+    for u, v, edge_type in _iter_edges(ccg):
+        out.write(dumps({'edge': [u, v, edge_type]}) + '\n')
+        lines += 1
+    return lines
+
+
+def read_ndjson(source: Union[str, IO[str]], backend: str = 'compact') -> Graph:
+    """Load a graph written by write_ndjson, one line at a time."""
+    if isinstance(source, str):
+        with open(source, 'r', encoding='utf-8') as f:
+            return read_ndjson(f, backend)
+
+    try:
+        from .ccg import CCG_BACKENDS
+    except ImportError:
+        from ccg import CCG_BACKENDS
+
+    header = json.loads(source.readline() or '{}')
+    if header.get('format') != NDJSON_FORMAT:
+        raise ValueError("Not a CCG NDJSON stream: missing header")
+    if header.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported CCG format version {header.get('version')} (expected {FORMAT_VERSION})")
+
+    ccg = CCG_BACKENDS[backend]()
+    compact = isinstance(ccg, CompactCodeContextGraph)
+    for line in source:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if 'node' in record:
+            attrs = record['attrs']
+            if compact:
+                ccg.add_node(record['node'], **attrs)
+            else:
+                ccg.graph.add_node(record['node'], **attrs)
+            if 'module' in attrs and 'name' in attrs:
+                ccg.index.add_symbol(attrs, record['node'])
+        else:
+            u, v, edge_type = record['edge']
+            if compact:
+                ccg.add_edge(u, v, edge_type)
+            else:
+                ccg.graph.add_edge(u, v, type=edge_type)
+    return ccg
@@ -1,76 +1,134 @@
 import os
 from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
 import networkx as nx
-try:
-    from networkx.drawing.nx_agraph import graphviz_layout
-    GRAPHVIZ_AVAILABLE = True
-except ImportError:
-    GRAPHVIZ_AVAILABLE = False
 import matplotlib.pyplot as plt
 from .ccg import CodeContextGraph
+from .graph_summary import (DEFAULT_NODE_BUDGET, DEFAULT_LAYOUT_TIMEOUT, dot_available, layout_positions,
+                            module_of, package_graph, packages, summarize)
 
-def generate_call_graph(ccg: 'CodeContextGraph', output_dir: str, repo_name: str):
-    """
-    Generate call graph diagram from CCG.
-    """
-    # Create subgraph of function nodes and call edges
-    call_graph = nx.DiGraph()
+# dot is only used for node positions; without it a spring layout is used
+GRAPHVIZ_AVAILABLE = dot_available()
+
+def _edge_graph(ccg: CodeContextGraph, edge_type: str) -> nx.DiGraph:
+    graph = nx.DiGraph()
     for u, v, data in ccg.graph.edges(data=True):
-        if data.get('type') == 'calls':
-            call_graph.add_edge(u, v)
+        if data.get('type') == edge_type:
+            graph.add_edge(u, v)
+    return graph
+
+def _module_key(module_paths: Optional[Dict[str, str]]) -> Callable[[str], Optional[str]]:
+    # node ids carry the grandparent-relative module label (parser_utils.module_name);
+    # packages are only meaningful on repo-relative paths, so map labels through module_paths
+    if module_paths is None:
+        return module_of
 
-    if call_graph.number_of_nodes() == 0:
+    def module(node: str) -> Optional[str]:
+        label = module_of(node)
+        return module_paths.get(label, label) if label is not None else None
+    return module
+
+def _draw(graph: nx.DiGraph, output_path: Path, title: str, color: str, budget: int, mode: str,
+          layout_timeout: float, module: Callable[[str], Optional[str]] = module_of) -> Optional[Dict]:
+    """Summarize graph to the node budget, lay it out and save a PNG; None if there is nothing to draw."""
+    view, info = summarize(graph, budget, mode, module=module)
+    if view.number_of_nodes() == 0:
         return None
+    pos, info['layout'] = layout_positions(view, layout_timeout)
 
-    plt.figure(figsize=(12, 8))
-    if GRAPHVIZ_AVAILABLE:
-        pos = graphviz_layout(call_graph, prog='dot')
-    else:
-        pos = nx.spring_layout(call_graph)
-    nx.draw(call_graph, pos, with_labels=True, node_color='lightblue', 
-            node_size=2000, font_size=10, arrows=True)
-    plt.title(f"Call Graph - {repo_name}")
+    clusters = sorted({str(d.get('cluster')) for _, d in view.nodes(data=True)})
+    palette = plt.get_cmap('tab20')
+    colors = [palette(clusters.index(str(d.get('cluster'))) % 20) if len(clusters) > 1 else color
+              for _, d in view.nodes(data=True)]
+    sizes = [600 + 300 * min(d.get('size', 1), 20) ** 0.5 for _, d in view.nodes(data=True)]
+    widths = [0.5 + min(d.get('weight', 1), 16) ** 0.5 for _, _, d in view.edges(data=True)]
+    side = min(8 + view.number_of_nodes() / 6, 24)
 
-    output_path = Path(output_dir) / "diagrams" / "call_graph.png"
+    plt.figure(figsize=(side * 1.5, side))
+    nx.draw(view, pos, labels={n: d.get('label', n) for n, d in view.nodes(data=True)}, node_color=colors,
+            node_size=sizes, width=widths, font_size=8, arrows=True)
+    shown = f"{info['shown']} of {info['nodes']}" if info['level'] == 'symbol' else f"{info['shown']} {info['level']}s"
+    plt.title(f"{title} ({shown})")
     output_path.parent.mkdir(parents=True, exist_ok=True)
     plt.savefig(output_path, dpi=150, bbox_inches='tight')
     plt.close()
-    return str(output_path)
+    info['path'] = str(output_path)
+    return info
 
-def generate_class_diagram(ccg: CodeContextGraph, output_dir: str, repo_name: str):
+def generate_call_graph(ccg: 'CodeContextGraph', output_dir: str, repo_name: str,
+                        budget: int = DEFAULT_NODE_BUDGET, mode: str = 'auto',
+                        layout_timeout: float = DEFAULT_LAYOUT_TIMEOUT, views: dict = None,
+                        module_paths: Dict[str, str] = None):
     """
-    Generate class inheritance diagram from CCG.
+    Generate call graph diagram from CCG.
+    At most budget nodes are drawn: functions when they fit, otherwise the
+    graph condensed to modules or packages (see graph_summary.summarize).
+    module_paths maps module labels to repo-relative paths, which modules
+    are grouped into packages by. views, if given, receives the summary
+    description under 'call_graph'.
     """
-    class_graph = nx.DiGraph()
-    for u, v, data in ccg.graph.edges(data=True):
-        if data.get('type') == 'inherits':
-            class_graph.add_edge(u, v)
+    info = _draw(_edge_graph(ccg, 'calls'), Path(output_dir) / "diagrams" / "call_graph.png",
+                 f"Call Graph - {repo_name}", 'lightblue', budget, mode, layout_timeout, _module_key(module_paths))
+    if views is not None:
+        views['call_graph'] = info
+    return info and info['path']
 
-    if class_graph.number_of_nodes() == 0:
-        return None
-
-    plt.figure(figsize=(12, 8))
-    if GRAPHVIZ_AVAILABLE:
-        pos = graphviz_layout(class_graph, prog='dot')
-    else:
-        pos = nx.spring_layout(class_graph)
-    nx.draw(class_graph, pos, with_labels=True, node_color='lightgreen', 
-            node_size=2000, font_size=10, arrows=True)
-    plt.title(f"Class Inheritance - {repo_name}")
+def generate_class_diagram(ccg: CodeContextGraph, output_dir: str, repo_name: str,
+                           budget: int = DEFAULT_NODE_BUDGET, mode: str = 'auto',
+                           layout_timeout: float = DEFAULT_LAYOUT_TIMEOUT, views: dict = None,
+                           module_paths: Dict[str, str] = None):
+    """
+    Generate class inheritance diagram from CCG, summarized like the call graph.
+    """
+    info = _draw(_edge_graph(ccg, 'inherits'), Path(output_dir) / "diagrams" / "class_diagram.png",
+                 f"Class Inheritance - {repo_name}", 'lightgreen', budget, mode, layout_timeout,
+                 _module_key(module_paths))
+    if views is not None:
+        views['class_diagram'] = info
+    return info and info['path']
 
-    output_path = Path(output_dir) / "diagrams" / "class_diagram.png"
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(output_path, dpi=150, bbox_inches='tight')
-    plt.close()
-    return str(output_path)
+def generate_package_diagrams(ccg: CodeContextGraph, output_dir: str, repo_name: str,
+                              package_names: Iterable[str] = None, budget: int = DEFAULT_NODE_BUDGET,
+                              layout_timeout: float = DEFAULT_LAYOUT_TIMEOUT,
+                              module_paths: Dict[str, str] = None) -> Dict[str, Optional[str]]:
+    """
+    Call graph of each package on its own (default: every package), saved
+    as diagrams/packages/<package>.png. Packages are top-level directories
+    of the repo-relative paths in module_paths. Returns {package: path or None}.
+    """
+    calls = _edge_graph(ccg, 'calls')
+    module = _module_key(module_paths)
+    if package_names is None:
+        package_names = sorted(packages(calls, module=module))
+    paths = {}
+    for package in package_names:
+        file_name = package.replace('/', '__') if package != '.' else '_root'
+        info = _draw(package_graph(calls, package, module=module),
+                     Path(output_dir) / "diagrams" / "packages" / f"{file_name}.png",
+                     f"Call Graph - {repo_name}/{package}", 'lightblue', budget, 'auto', layout_timeout, module)
+        paths[package] = info and info['path']
+    return paths
 
-def generate_diagrams(ccg: CodeContextGraph, output_dir: str, repo_name: str):
+def generate_diagrams(ccg: CodeContextGraph, output_dir: str, repo_name: str,
+                      budget: int = DEFAULT_NODE_BUDGET, layout_timeout: float = DEFAULT_LAYOUT_TIMEOUT,
+                      package_names: Iterable[str] = None, module_paths: Dict[str, str] = None):
     """
     Generate all diagrams and return paths.
+    'views' describes how each diagram was summarized; package_names also
+    renders those packages' call graphs under 'packages'. module_paths
+    ({module label: repo-relative path}) lets modules be grouped by package.
     """
-    call_graph_path = generate_call_graph(ccg, output_dir, repo_name)
-    class_diagram_path = generate_class_diagram(ccg, output_dir, repo_name)
-    return {
+    views = {}
+    call_graph_path = generate_call_graph(ccg, output_dir, repo_name, budget, layout_timeout=layout_timeout,
+                                          views=views, module_paths=module_paths)
+    class_diagram_path = generate_class_diagram(ccg, output_dir, repo_name, budget, layout_timeout=layout_timeout,
+                                                views=views, module_paths=module_paths)
+    diagrams = {
         'call_graph': call_graph_path,
-        'class_diagram': class_diagram_path
+        'class_diagram': class_diagram_path,
+        'views': views
     }
+    if package_names:
+        diagrams['packages'] = generate_package_diagrams(ccg, output_dir, repo_name, package_names, budget,
+                                                         layout_timeout, module_paths)
+    return diagrams
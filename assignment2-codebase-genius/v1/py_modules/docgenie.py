@@ -8,6 +8,9 @@ from .doc_template import (
 )
 from .diagram import generate_diagrams
 from .ccg import CodeContextGraph, summarize_module
+from .parse_store import ParseStore
+from .llm_batch import LLMBatcher
+from .tracing import Tracer, maybe_span, hit_rate
 
 def rewrite_section_with_llm(section_name: str, content: str) -> str:
     """
@@ -50,9 +53,13 @@ def detect_installation_info(file_tree: Dict) -> Dict:
         'has_pyproject': has_pyproject
     }
 
-def assemble_api_reference(symbols: List[Dict], targets: List[str]) -> Dict[str, str]:
+def assemble_api_reference(symbols: List[Dict], targets: List[str], store: 'ParseStore' = None,
+                           llm: 'LLMBatcher' = None) -> Dict[str, str]:
     """
     Group symbols by module and generate LLM summaries for each module.
+    Code snippets come from store when given, so files are not re-read.
+    With llm, small modules are batched into shared prompts and the prompts
+    run concurrently; modules the model fails on use the plain summary.
     """
     api = {}
     for sym in symbols:
@@ -62,64 +69,90 @@ def assemble_api_reference(symbols: List[Dict], targets: List[str]) -> Dict[str,
         api[module].append(sym)
     
     # Generate summaries
-    summaries = {}
+    requests = []
     for module, syms in api.items():
         # Find a target file that matches the module
         code_snippet = ""
         for target in targets:
             if module in target:
+                if store is not None:
+                    code_snippet = (store.source(target) or "")[:1000]
+                    break
                 try:
                     with open(target, 'r', encoding='utf-8') as f:
                         code_snippet = f.read()[:1000]  # First 1000 chars
                     break
                 except:
                     pass
-        summary = summarize_module(module, syms, code_snippet)
-        summaries[module] = summary
-    
-    return summaries
+        requests.append((module, syms, code_snippet))
+
+    if llm is not None:
+        return llm.summarize_modules(requests, fallback=summarize_module)
+    return {module: summarize_module(module, syms, code_snippet) for module, syms, code_snippet in requests}
 
-def generate_docs(repo_url: str, repo_map: Dict, ccg: 'CodeContextGraph', symbols: List[Dict], targets: List[str], output_dir: str) -> str:
+def generate_docs(repo_url: str, repo_map: Dict, ccg: 'CodeContextGraph', symbols: List[Dict], targets: List[str], output_dir: str, store: 'ParseStore' = None, llm: 'LLMBatcher' = None, tracer: 'Tracer' = None,
+                  module_paths: Dict[str, str] = None) -> str:
     """
     Generate the full documentation.
+    With llm (an LLMBatcher), module summaries and the section rewrites are
+    sent to the model concurrently; without it the plain templates are used.
+    tracer (a tracing.Tracer) records a span per step. module_paths maps
+    module labels to repo-relative paths so diagrams group them by package.
     """
     repo_name = repo_url.split('/')[-1]
     output_path = Path(output_dir) / repo_name / "docs.md"
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
     # Generate diagrams
-    diagrams = generate_diagrams(ccg, str(output_path.parent), repo_name)
+    with maybe_span(tracer, "diagrams") as span:
+        diagrams = generate_diagrams(ccg, str(output_path.parent), repo_name, module_paths=module_paths)
+        span.set(diagrams=sum(1 for path in diagrams.values() if isinstance(path, str)),
+                 levels={name: view['level'] for name, view in diagrams['views'].items() if view})
 
-    # Detect installation
-    install_info = detect_installation_info(repo_map['file_tree'])
+    with maybe_span(tracer, "render_sections"):
+        # Detect installation
+        install_info = detect_installation_info(repo_map['file_tree'])
 
-    # Sections
-    overview = render_overview(repo_map['readme_summary'])
-    overview = rewrite_section_with_llm("Overview", overview)
+        # Sections
+        overview = render_overview(repo_map['readme_summary'])
 
-    installation = render_installation(repo_url, repo_name, install_info['has_setup_py'])
+        installation = render_installation(repo_url, repo_name, install_info['has_setup_py'])
 
-    examples = generate_usage_examples(ccg, symbols)
-    usage = render_usage(examples)
-    usage = rewrite_section_with_llm("Usage", usage)
+        examples = generate_usage_examples(ccg, symbols)
+        usage = render_usage(examples)
 
-    api_data = assemble_api_reference(symbols, targets)
+    with maybe_span(tracer, "llm_summaries", llm=llm is not None) as span:
+        api_data = assemble_api_reference(symbols, targets, store, llm)
+        span.set(modules=len(api_data))
     api_reference = render_api_reference(api_data)
-    api_reference = rewrite_section_with_llm("API Reference", api_reference)
 
     architecture = render_architecture("This diagram shows the relationships between functions and classes in the codebase.")
-    architecture = rewrite_section_with_llm("Architecture", architecture)
-
-    contributing = render_contributing()
-
-    # Assemble
-    full_docs = assemble_docs(
-        repo_name, repo_url, overview, installation, usage, 
-        api_reference, architecture, contributing
-    )
-
-    # Save
-    with open(output_path, 'w') as f:
-        f.write(full_docs)
 
-    return str(output_path)
\ No newline at end of file
+    sections = {"Overview": overview, "Usage": usage, "API Reference": api_reference, "Architecture": architecture}
+    with maybe_span(tracer, "llm_rewrite", llm=llm is not None, sections=len(sections)) as span:
+        if llm is not None:
+            sections = llm.rewrite_sections(sections)
+            stats = llm.stats()
+            span.set(**stats)
+            if "cache_hits" in stats:
+                span.set(cache_hit_rate=hit_rate(stats["cache_hits"], stats["cache_misses"]))
+        else:
+            sections = {name: rewrite_section_with_llm(name, content) for name, content in sections.items()}
+    overview, usage, api_reference, architecture = (
+        sections["Overview"], sections["Usage"], sections["API Reference"], sections["Architecture"])
+
+    with maybe_span(tracer, "assemble_docs") as span:
+        contributing = render_contributing()
+
+        # Assemble
+        full_docs = assemble_docs(
+            repo_name, repo_url, overview, installation, usage, 
+            api_reference, architecture, contributing
+        )
+
+        # Save
+        with open(output_path, 'w') as f:
+            f.write(full_docs)
+        span.set(bytes=len(full_docs.encode('utf-8')))
+
+    return str(output_path)
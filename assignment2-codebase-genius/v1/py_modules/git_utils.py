@@ -1,16 +1,237 @@
 import tempfile
 import os
-from git import Repo, GitCommandError, InvalidGitRepositoryError
+import hashlib
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from git import Git, Repo, GitCommandError, InvalidGitRepositoryError
 
-def clone_repo(repo_url: str) -> dict:
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+try:
+    from .parse_cache import default_cache_dir
+    from .parser_utils import PARSERS
+    from .repo_mapper import ENTRY_POINT_FILES
+    from .repo_source import GitTreeSource
+except ImportError:
+    from parse_cache import default_cache_dir
+    from parser_utils import PARSERS
+    from repo_mapper import ENTRY_POINT_FILES
+    from repo_source import GitTreeSource
+
+DEFAULT_MIRROR_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# Non-source files the mapper reads besides READMEs in a sparse clone
+PACKAGING_FILES = ("setup.cfg", "requirements*.txt", "Pipfile")
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _objects_size(git_dir: Path) -> int:
+    return _dir_size(Path(git_dir) / "objects")
+
+
+def sparse_patterns(extensions=None) -> list:
+    """
+    Sparse-checkout patterns for the files the pipeline reads: sources with
+    a registered parser (parser_utils.PARSERS unless extensions is given),
+    READMEs and packaging files.
+    """
+    if extensions is None:
+        extensions = PARSERS.keys()
+    patterns = [f"*{ext}" for ext in extensions]
+    patterns += ["README*", "readme*"]
+    patterns += [f"/{name}" for name in ENTRY_POINT_FILES + PACKAGING_FILES]
+    return patterns
+
+
+def sparse_clone(repo_url: str, dest: str, patterns: list = None) -> int:
+    """
+    Partial clone of repo_url into dest that only materialises files
+    matching patterns (default: sparse_patterns()).
+
+    The clone is blobless (--filter=blob:none, depth 1), so only commits
+    and trees are transferred up front; the blobs of matching files are
+    fetched on checkout and everything else is never downloaded. Servers
+    that do not support filters send a full shallow clone instead.
+    Returns the number of object bytes transferred.
+    """
+    repo = Repo.clone_from(repo_url, dest, filter="blob:none", no_checkout=True, depth=1)
+    repo.git.config("core.sparseCheckout", "true")
+    with open(Path(repo.git_dir) / "info" / "sparse-checkout", "w") as f:
+        f.write("\n".join(patterns or sparse_patterns()) + "\n")
+    repo.git.read_tree("-mu", "HEAD")
+    return _objects_size(repo.git_dir)
+
+
+class MirrorCache:
+    """
+    Managed cache of bare mirrors, one per repository URL.
+
+    checkout() fetches only new objects into the URL's mirror (cloning it
+    the first time) and then makes a local working copy that hardlinks the
+    mirror's object files (copies them across filesystems), so it costs
+    little more than a `--shared` clone yet owns its objects and stays
+    valid once the mirror is evicted. Each mirror has a lock file so
+    concurrent requests for the same repository serialise their fetches;
+    other repositories proceed in parallel. Mirrors are evicted least
+    recently used first once the cache exceeds max_bytes; eviction never
+    touches a mirror whose lock is held.
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MIRROR_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._thread_locks = {}
+        self._guard = threading.Lock()
+
+    @classmethod
+    def default(cls, max_bytes: int = DEFAULT_MIRROR_MAX_BYTES) -> "MirrorCache":
+        return cls(default_cache_dir() / "mirrors", max_bytes)
+
+    @staticmethod
+    def key(repo_url: str) -> str:
+        url = repo_url.rstrip("/")
+        if url.endswith(".git"):
+            url = url[:-4]
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()[:24]
+
+    def mirror_path(self, repo_url: str) -> Path:
+        return self.root / f"{self.key(repo_url)}.git"
+
+    @contextmanager
+    def _lock(self, key: str, blocking: bool = True):
+        with self._guard:
+            thread_lock = self._thread_locks.setdefault(key, threading.Lock())
+        if not thread_lock.acquire(blocking):
+            yield False
+            return
+        try:
+            if fcntl is None:
+                yield True
+                return
+            with open(self.root / f"{key}.lock", "w") as lock_file:
+                flags = fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB)
+                try:
+                    fcntl.flock(lock_file, flags)
+                except BlockingIOError:
+                    yield False
+                    return
+                try:
+                    yield True
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            thread_lock.release()
+
+    def update(self, repo_url: str) -> Path:
+        """Create or fetch the mirror for repo_url and return its path."""
+        key = self.key(repo_url)
+        path = self.mirror_path(repo_url)
+        with self._lock(key):
+            if (path / "HEAD").exists():
+                Repo(path).git.fetch("--prune", "origin")
+            else:
+                shutil.rmtree(path, ignore_errors=True)
+                Repo.clone_from(repo_url, path, mirror=True)
+            os.utime(path)
+        return path
+
+    def checkout(self, repo_url: str, dest: str = None) -> str:
+        """Return a fresh working copy of repo_url backed by its mirror."""
+        mirror = self.update(repo_url)
+        made_dest = dest is None
+        if made_dest:
+            dest = tempfile.mkdtemp(prefix="repo_clone_")
+        try:
+            with self._lock(self.key(repo_url)):
+                Repo.clone_from(str(mirror), dest, local=True)
+        except BaseException:
+            if made_dest:
+                shutil.rmtree(dest, ignore_errors=True)
+            raise
+        self.evict(keep=repo_url)
+        return dest
+
+    def entries(self) -> list:
+        """(mirror path, size in bytes, last used timestamp) for every mirror."""
+        result = []
+        for path in self.root.glob("*.git"):
+            try:
+                result.append((path, _dir_size(path), path.stat().st_mtime))
+            except OSError:
+                continue
+        return result
+
+    def evict(self, keep: str = None) -> list:
+        """Delete least recently used mirrors until the cache fits max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        keep_path = self.mirror_path(keep) if keep else None
+        removed = []
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            if total <= self.max_bytes:
+                break
+            if path == keep_path:
+                continue
+            with self._lock(path.stem, blocking=False) as locked:
+                if not locked:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed.append(str(path))
+        return removed
+
+
+_default_mirrors = None
+
+
+def _mirror_cache():
+    global _default_mirrors
+    if _default_mirrors is None:
+        try:
+            _default_mirrors = MirrorCache.default()
+        except OSError:
+            return None
+    return _default_mirrors
+
+
+def clone_repo(repo_url: str, mirrors: MirrorCache = None, sparse: bool = False, checkout: bool = True) -> dict:
     """
     Clone a GitHub repository to a temporary directory.
 
+    The working copy is made from a locally cached bare mirror (see
+    MirrorCache), so repeat requests only fetch new objects. If the mirror
+    cache is unavailable it falls back to a shallow clone. With sparse=True
+    it instead makes a blobless partial clone that only checks out the
+    files the pipeline reads (see sparse_clone). With checkout=False
+    nothing is written outside the mirror cache: the result carries a
+    GitTreeSource that reads HEAD straight from the mirror, and "path" is
+    None (there is nothing to clean up).
+
     Args:
         repo_url (str): The GitHub repository URL to clone.
+        mirrors (MirrorCache): Mirror cache to use; defaults to the shared one.
+        sparse (bool): Only materialise source, README and packaging files.
+        checkout (bool): Make a working copy; False returns a GitTreeSource.
 
     Returns:
-        dict: {"success": bool, "path": str or None, "error": str or None}
+        dict: {"success": bool, "path": str or None, "error": str or None,
+               "bytes_transferred": int, "source": GitTreeSource (checkout=False)}
     """
     try:
         # Validate URL format (basic check)
@@ -22,13 +243,43 @@ def clone_repo(repo_url: str) -> dict:
         if len(parts) < 2:
             return {"success": False, "path": None, "error": "Invalid GitHub URL format. Expected format: https://github.com/owner/repo"}
 
+        if not checkout:
+            mirrors = mirrors or MirrorCache.default()
+            mirror = mirrors.mirror_path(repo_url)
+            before = _objects_size(mirror) if mirror.exists() else 0
+            mirrors.update(repo_url)
+            # files are reported under a virtual directory named after the
+            # repository, which is where a checkout would have put them
+            repo_name = parts[1][:-4] if parts[1].endswith(".git") else parts[1]
+            source = GitTreeSource(str(mirror), root=os.path.join(tempfile.gettempdir(), repo_name))
+            transferred = max(_objects_size(mirror) - before, 0)
+            return {"success": True, "path": None, "error": None,
+                    "bytes_transferred": transferred, "source": source}
+
         # Create a temporary directory
         temp_dir = tempfile.mkdtemp(prefix="repo_clone_")
 
-        # Clone the repository (shallow clone for speed)
-        Repo.clone_from(repo_url, temp_dir, depth=1)
+        try:
+            if sparse:
+                transferred = sparse_clone(repo_url, temp_dir)
+            else:
+                if mirrors is None:
+                    mirrors = _mirror_cache()
+                if mirrors is not None:
+                    mirror = mirrors.mirror_path(repo_url)
+                    before = _objects_size(mirror) if mirror.exists() else 0
+                    mirrors.checkout(repo_url, temp_dir)
+                    transferred = max(_objects_size(mirror) - before, 0)
+                else:
+                    # Clone the repository (shallow clone for speed)
+                    Repo.clone_from(repo_url, temp_dir, depth=1)
+                    transferred = _objects_size(Path(temp_dir) / ".git")
+        except BaseException:
+            # a failed clone leaves nothing behind for the caller to clean up
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
 
-        return {"success": True, "path": temp_dir, "error": None}
+        return {"success": True, "path": temp_dir, "error": None, "bytes_transferred": transferred}
 
     except GitCommandError as e:
         error_msg = str(e)
@@ -42,3 +293,56 @@ def clone_repo(repo_url: str) -> dict:
         return {"success": False, "path": None, "error": f"Invalid repository: {str(e)}"}
     except Exception as e:
         return {"success": False, "path": None, "error": f"Unexpected error during cloning: {str(e)}"}
+
+def diff_name_status(repo_path: str, old_rev: str, new_rev: str = "HEAD") -> dict:
+    """
+    List the files that differ between two commits of a local clone, as
+    reported by `git diff --name-status`.
+
+    Renames count as a deletion of the old path plus an addition of the new
+    one. Paths are absolute (joined onto repo_path) so they can be passed
+    straight to ccg.update_ccg. Both commits must be present locally, which
+    a depth=1 clone does not guarantee.
+
+    Returns:
+        dict: {"success": bool, "changed": list, "added": list, "deleted": list, "error": str or None}
+    """
+    result = {"success": False, "changed": [], "added": [], "deleted": [], "error": None}
+    try:
+        output = Repo(repo_path).git.diff("--name-status", "-M", old_rev, new_rev)
+    except (GitCommandError, InvalidGitRepositoryError) as e:
+        result["error"] = f"Git diff failed: {str(e)}"
+        return result
+
+    for line in output.splitlines():
+        fields = line.split("\t")
+        status, paths = fields[0], [os.path.join(repo_path, p) for p in fields[1:]]
+        if status.startswith("R"):
+            result["deleted"].append(paths[0])
+            result["added"].append(paths[1])
+        elif status.startswith("C") or status == "A":
+            result["added"].append(paths[-1])
+        elif status == "D":
+            result["deleted"].append(paths[0])
+        else:
+            result["changed"].append(paths[0])
+
+    result["success"] = True
+    return result
+
+def resolve_head(repo_url: str) -> dict:
+    """
+    Resolve the commit SHA that HEAD of repo_url points at, without cloning
+    (`git ls-remote <url> HEAD`).
+
+    Returns:
+        dict: {"success": bool, "sha": str or None, "error": str or None}
+    """
+    try:
+        output = Git().ls_remote(repo_url, "HEAD")
+    except GitCommandError as e:
+        return {"success": False, "sha": None, "error": f"Git ls-remote failed: {str(e)}"}
+    sha = output.split()[0] if output.strip() else None
+    if not sha:
+        return {"success": False, "sha": None, "error": "Repository has no HEAD"}
+    return {"success": True, "sha": sha, "error": None}
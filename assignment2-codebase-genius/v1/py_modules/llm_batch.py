@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .parse_cache import ParseCache, default_cache_dir
+except ImportError:
+    from parse_cache import ParseCache, default_cache_dir
+
+DEFAULT_CONCURRENCY = 4
+# Rough prompt budget for one batched summary request
+DEFAULT_TOKEN_BUDGET = 3000
+SNIPPET_CHARS = 1000
+MODULE_MARKER = "### MODULE: "
+
+SECTION_PROMPT = (
+    "Rewrite the following {name} section to be more user-friendly and professional. "
+    "Keep it concise but informative. Do not add new information.\n\nOriginal:\n{content}\n\nRewritten:"
+)
+MODULE_PROMPT = (
+    "Return a Markdown fragment with heading equal to module path, then 2-3 sentence description, "
+    "list exported functions/classes with one-line descriptions, and sample usage if a main entry point "
+    "exists. If unsure about a function's behavior, use 'behaviour unclear from source'."
+)
+BATCH_PROMPT = (
+    MODULE_PROMPT + "\n\nDo this for each of the {count} modules below. Start each fragment with a line "
+    "'" + MODULE_MARKER + "<module path>' and keep the modules in the order given."
+)
+
+# A module summary request: (module path, symbols, code snippet)
+ModuleRequest = Tuple[str, List[Dict], str]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def prompt_digest(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def section_prompt(section_name: str, content: str) -> str:
+    return SECTION_PROMPT.format(name=section_name, content=content)
+
+
+def _module_block(module_path: str, symbols: List[Dict], code_snippet: str) -> str:
+    return ("Module: " + module_path + "\n\nSymbols:\n" + json.dumps(symbols, indent=2) +
+            "\n\nCode snippet:\n" + code_snippet[:SNIPPET_CHARS])
+
+
+def module_prompt(module_path: str, symbols: List[Dict], code_snippet: str = "") -> str:
+    return MODULE_PROMPT + "\n\n" + _module_block(module_path, symbols, code_snippet)
+
+
+def batch_prompt(modules: Sequence[ModuleRequest]) -> str:
+    blocks = [_module_block(*m) for m in modules]
+    return BATCH_PROMPT.format(count=len(modules)) + "\n\n" + "\n\n---\n\n".join(blocks)
+
+
+def split_batch_response(response: str, modules: Sequence[str]) -> Dict[str, str]:
+    """Split a batched summary response on its module markers; unknown or missing modules are dropped."""
+    wanted = set(modules)
+    parts = {}
+    pattern = re.compile("^" + re.escape(MODULE_MARKER) + r"\s*(.+?)\s*$", re.MULTILINE)
+    matches = list(pattern.finditer(response))
+    for i, match in enumerate(matches):
+        module = match.group(1).strip('`*')
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(response)
+        body = response[match.end():end].strip()
+        if module in wanted and body:
+            parts[module] = f"# {module}\n\n{body}" if not body.startswith("#") else body
+    return parts
+
+
+def pack_modules(modules: Sequence[ModuleRequest], token_budget: int = DEFAULT_TOKEN_BUDGET) -> List[List[ModuleRequest]]:
+    """
+    Greedily group module requests so each group's prompt stays within
+    token_budget. A module too large for the budget on its own gets a group
+    of its own; order is preserved.
+    """
+    overhead = estimate_tokens(BATCH_PROMPT)
+    batches, current, used = [], [], overhead
+    for module in modules:
+        cost = estimate_tokens(_module_block(*module))
+        if current and used + cost > token_budget:
+            batches.append(current)
+            current, used = [], overhead
+        current.append(module)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+class LLMBatcher:
+    """
+    Issues DocGenie's LLM prompts concurrently, with a response cache.
+
+    generate(prompt) -> str is the model call (byllm's generate, or a stub in
+    tests); up to max_concurrency calls are in flight at once. Responses are
+    cached by (model_name, SHA-256 of the prompt), so a re-run over unchanged
+    code costs no model calls; identical prompts within one run are sent
+    once. Small module summaries are packed into shared prompts up to
+    token_budget. A failed or empty response falls back to the unrewritten
+    text, so the pipeline never fails because of the model.
+    """
+
+    def __init__(self, generate: Callable[[str], str], max_concurrency: int = None,
+                 cache: Optional[ParseCache] = None, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 model_name: str = "default"):
+        if max_concurrency is None:
+            max_concurrency = int(os.environ.get("CODEGENIUS_LLM_CONCURRENCY", DEFAULT_CONCURRENCY))
+        self.generate = generate
+        self.max_concurrency = max(1, max_concurrency)
+        self.cache = cache
+        self.token_budget = token_budget
+        self.model_name = model_name
+        self.calls = 0
+        self.errors = 0
+
+    @staticmethod
+    def default_cache() -> ParseCache:
+        return ParseCache(default_cache_dir() / "llm_cache.sqlite")
+
+    def _key(self, prompt: str) -> str:
+        return ParseCache.make_key(f"llm-{self.model_name}", prompt_digest(prompt))
+
+    def _call(self, prompt: str) -> Optional[str]:
+        try:
+            response = self.generate(prompt)
+        except Exception:
+            return None
+        if not isinstance(response, str) or not response.strip():
+            return None
+        if self.cache is not None:
+            self.cache.put(self._key(prompt), {"response": response})
+        return response
+
+    def complete(self, prompts: Sequence[str]) -> List[Optional[str]]:
+        """Responses for prompts, in order; None where the model failed."""
+        responses: Dict[str, Optional[str]] = {}
+        pending = []
+        for prompt in prompts:
+            if prompt in responses:
+                continue
+            responses[prompt] = None
+            hit = self.cache.get(self._key(prompt)) if self.cache is not None else None
+            if hit is not None:
+                responses[prompt] = hit["response"]
+            else:
+                pending.append(prompt)
+
+        self.calls += len(pending)
+        if len(pending) == 1 or self.max_concurrency == 1:
+            for prompt in pending:
+                responses[prompt] = self._call(prompt)
+        elif pending:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(pending))) as pool:
+                for prompt, response in zip(pending, pool.map(self._call, pending)):
+                    responses[prompt] = response
+        self.errors += sum(1 for p in pending if responses[p] is None)
+        return [responses[p] for p in prompts]
+
+    def rewrite_sections(self, sections: Dict[str, str]) -> Dict[str, str]:
+        """Rewrite every section concurrently; sections the model fails on are returned unchanged."""
+        names = list(sections)
+        responses = self.complete([section_prompt(n, sections[n]) for n in names])
+        return {n: (r.strip() if r else sections[n]) for n, r in zip(names, responses)}
+
+    def summarize_modules(self, modules: Sequence[ModuleRequest],
+                          fallback: Callable[[str, List[Dict], str], str] = None) -> Dict[str, str]:
+        """
+        Summaries for (module path, symbols, code snippet) requests. Modules
+        are packed into batches under the token budget and the batches are
+        sent concurrently; a module missing from its batch's response is
+        retried on its own, then falls back to fallback(...) when given.
+        """
+        batches = pack_modules(modules, self.token_budget)
+        prompts = [module_prompt(*b[0]) if len(b) == 1 else batch_prompt(b) for b in batches]
+        summaries: Dict[str, str] = {}
+        batched = set()
+        for batch, response in zip(batches, self.complete(prompts)):
+            if len(batch) > 1:
+                batched.update(m[0] for m in batch)
+            if response is None:
+                continue
+            if len(batch) == 1:
+                summaries[batch[0][0]] = response
+            else:
+                summaries.update(split_batch_response(response, [m[0] for m in batch]))
+
+        missing = [m for m in modules if m[0] in batched and m[0] not in summaries]
+        for module, response in zip(missing, self.complete([module_prompt(*m) for m in missing])):
+            if response is not None:
+                summaries[module[0]] = response
+
+        if fallback is not None:
+            for module in modules:
+                if module[0] not in summaries:
+                    summaries[module[0]] = fallback(*module)
+        return summaries
+
+    def stats(self) -> Dict[str, int]:
+        stats = {"calls": self.calls, "errors": self.errors}
+        if self.cache is not None:
+            stats.update(cache_hits=self.cache.hits, cache_misses=self.cache.misses)
+        return stats
+
+
+def rewrite_sections(sections: Dict[str, str], generate: Callable[[str], str],
+                     max_concurrency: int = None) -> Dict[str, str]:
+    """Helper for the Jac walkers: rewrite sections concurrently with the on-disk response cache."""
+    cache = LLMBatcher.default_cache()
+    try:
+        return LLMBatcher(generate, max_concurrency, cache=cache).rewrite_sections(sections)
+    finally:
+        cache.close()
+
+
+def summarize_modules(modules: Sequence[ModuleRequest], generate: Callable[[str], str],
+                      max_concurrency: int = None, token_budget: int = DEFAULT_TOKEN_BUDGET) -> Dict[str, str]:
+    """Helper for the Jac walkers: batched, concurrent module summaries."""
+    cache = LLMBatcher.default_cache()
+    try:
+        return LLMBatcher(generate, max_concurrency, cache=cache, token_budget=token_budget).summarize_modules(modules)
+    finally:
+        cache.close()
@@ -0,0 +1,203 @@
+import math
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+try:
+    from .parser_utils import parse_source, empty_result
+except ImportError:
+    from parser_utils import parse_source, empty_result
+
+# Below this many files, process start-up costs more than parallel parsing saves
+DEFAULT_SERIAL_THRESHOLD = 32
+DEFAULT_CHUNK_SIZE = 16
+DEFAULT_TIMEOUT = 30.0
+# slack on top of the per-file timeouts for worker start-up and pickling
+DEADLINE_GRACE = 5.0
+
+ParseOutcome = Tuple[str, Dict[str, Any], Optional[str]]
+
+
+def pool_context():
+    """
+    Start method for parse workers: forkserver where available, else spawn.
+    Forking straight from a threaded process (job queue workers, the LLM
+    thread pool) can copy a lock some other thread holds into the child,
+    which then deadlocks the first time it takes that lock.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class ParseTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise ParseTimeout()
+
+
+def _can_time_out(timeout: Optional[float]) -> bool:
+    return bool(timeout) and hasattr(signal, "setitimer")
+
+
+def _parse_one(file_path: str, source: str, timeout: Optional[float]) -> ParseOutcome:
+    """Parse one file, returning (path, result, error). Never raises."""
+    armed = _can_time_out(timeout)
+    if armed:
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return file_path, parse_source(source, file_path), None
+    except ParseTimeout:
+        return file_path, empty_result(), f"timed out after {timeout}s"
+    except Exception as e:
+        return file_path, empty_result(), str(e)
+    finally:
+        if armed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _parse_chunk(items: List[Tuple[str, str]], timeout: Optional[float]) -> List[ParseOutcome]:
+    # Runs in a pool worker: SIGALRM enforces the per-file timeout there.
+    if _can_time_out(timeout):
+        signal.signal(signal.SIGALRM, _on_alarm)
+    return [_parse_one(file_path, source, timeout) for file_path, source in items]
+
+
+class ParsePool:
+    """
+    A worker pool kept open across parse_sources calls (pass it as pool=),
+    so files parsed batch by batch (see target_selection.parse_within_budget)
+    start the workers once, and every batch, however small, runs on all of
+    them. Use as a context manager, or call close().
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=pool_context())
+        return self._executor
+
+    def discard(self):
+        """Drop a broken executor; the next batch starts a fresh one."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _chunks(items: List[Tuple[str, str]], chunk_size: int, workers: int) -> List[List[Tuple[str, str]]]:
+    # no larger than chunk_size, and small enough that every worker gets one
+    size = max(1, min(chunk_size, math.ceil(len(items) / workers)))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _deadline(chunks, workers: int, timeout: Optional[float]) -> Optional[float]:
+    # every file in every chunk a worker gets may use its whole timeout
+    if not timeout:
+        return None
+    rounds = math.ceil(len(chunks) / workers)
+    return rounds * max(len(chunk) for chunk in chunks) * timeout + DEADLINE_GRACE
+
+
+def _terminate(executor: ProcessPoolExecutor):
+    # a worker stuck in native parser code never sees SIGALRM; kill it so
+    # shutting the executor down cannot hang on it
+    for process in list((executor._processes or {}).values()):
+        process.kill()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_chunks(executor: ProcessPoolExecutor, chunks, workers: int, timeout: Optional[float],
+                pool: ParsePool = None):
+    futures = {executor.submit(_parse_chunk, chunk, timeout): chunk for chunk in chunks}
+    deadline = _deadline(chunks, workers, timeout)
+    pending = set(futures)
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            pending.discard(future)
+            try:
+                outcomes = future.result()
+            except BrokenProcessPool as e:
+                if pool is not None:
+                    pool.discard()
+                outcomes = [(file_path, empty_result(), f"worker died: {e}") for file_path, _ in futures[future]]
+            yield from outcomes
+    except FuturesTimeout:
+        _terminate(executor)
+        if pool is not None:
+            pool.discard()
+        for future in pending:
+            for file_path, _ in futures[future]:
+                yield file_path, empty_result(), f"timed out: no result within {deadline:.1f}s"
+
+
+def parse_sources(
+    items: List[Tuple[str, str]],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+    serial_threshold: int = DEFAULT_SERIAL_THRESHOLD,
+    pool: ParsePool = None,
+) -> Iterator[ParseOutcome]:
+    """
+    Parse (file_path, source) pairs, yielding (file_path, result, error) as
+    each chunk finishes.
+
+    Work is fanned out to a ProcessPoolExecutor in chunks of at most
+    chunk_size, split so every worker gets a share. Small inputs (fewer
+    than serial_threshold items) or workers <= 1 are parsed in-process,
+    unless pool (a ParsePool, whose workers are already running) is given.
+    A file that exceeds timeout seconds yields an empty result with an
+    error instead of stalling the job: workers enforce it per file with
+    SIGALRM, and a pool run also stops waiting once every worker has had
+    its files' full timeouts (plus DEADLINE_GRACE), killing workers stuck
+    where SIGALRM cannot reach them (native parser code, platforms without
+    it). In-process runs rely on SIGALRM alone (Unix, main thread).
+    """
+    if pool is not None:
+        workers = pool.workers
+        serial_threshold = 0
+    elif workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(items) < serial_threshold or not items:
+        serial_timeout = timeout if _can_time_out(timeout) else None
+        previous = None
+        if serial_timeout:
+            try:
+                previous = signal.signal(signal.SIGALRM, _on_alarm)
+            except ValueError:
+                # handlers can only be installed from the main thread
+                serial_timeout = None
+        try:
+            for file_path, source in items:
+                yield _parse_one(file_path, source, serial_timeout)
+        finally:
+            if previous is not None:
+                signal.signal(signal.SIGALRM, previous)
+        return
+
+    chunks = _chunks(items, chunk_size, workers)
+    if pool is not None:
+        yield from _run_chunks(pool.executor(), chunks, workers, timeout, pool)
+        return
+    workers = min(workers, len(chunks))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context()) as executor:
+        yield from _run_chunks(executor, chunks, workers, timeout)
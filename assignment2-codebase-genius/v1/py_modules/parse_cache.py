@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def content_digest(data: bytes) -> str:
+    """Return the hex content hash used to key parse results."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def default_cache_dir() -> Path:
+    """Cache directory, overridable with CODEGENIUS_CACHE_DIR."""
+    env = os.environ.get("CODEGENIUS_CACHE_DIR")
+    if env:
+        return Path(env)
+    return Path.home() / ".cache" / "codebase_genius"
+
+
+class ParseCache:
+    """
+    On-disk, content-addressed cache of parser results.
+
+    Entries live in a single SQLite file keyed by parser version and content
+    hash, stored as zlib-compressed compact JSON. The total payload size is
+    bounded by max_bytes; the least recently used entries are evicted first.
+    Results are stored independent of the file's location, so a renamed or
+    re-cloned file still hits.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS parse_cache ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+            " size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS parse_cache_accessed ON parse_cache(accessed)")
+        self._conn.commit()
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM parse_cache").fetchone()
+        self._total_bytes = row[0]
+
+    @classmethod
+    def default(cls, max_bytes: int = DEFAULT_MAX_BYTES) -> "ParseCache":
+        return cls(default_cache_dir() / "parse_cache.sqlite", max_bytes)
+
+    @staticmethod
+    def make_key(parser_version: str, digest: str) -> str:
+        return f"{parser_version}:{digest}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM parse_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE parse_cache SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, result: Dict[str, Any]):
+        value = zlib.compress(json.dumps(result, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM parse_cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parse_cache (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            self._total_bytes += len(value) - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        cursor = self._conn.execute("SELECT key, size FROM parse_cache ORDER BY accessed ASC")
+        doomed = []
+        for key, size in cursor:
+            if self._total_bytes <= self.max_bytes:
+                break
+            doomed.append((key,))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM parse_cache WHERE key = ?", doomed)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM parse_cache").fetchone()[0]
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
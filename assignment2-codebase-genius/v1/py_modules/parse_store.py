@@ -0,0 +1,138 @@
+import os
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+try:
+    from .parser_utils import parse_source, empty_result, cache_key, rebind_module, module_name
+    from .parse_cache import ParseCache, content_digest
+    from .parallel_parse import parse_sources, DEFAULT_TIMEOUT
+except ImportError:
+    from parser_utils import parse_source, empty_result, cache_key, rebind_module, module_name
+    from parse_cache import ParseCache, content_digest
+    from parallel_parse import parse_sources, DEFAULT_TIMEOUT
+
+
+class ParseStore:
+    """
+    Per-run store of file contents and parse results.
+
+    Entries are keyed by path and remember the content hash they were parsed
+    from, so every stage of a job (CCG build, symbol collection, API reference
+    snippets) shares one read and one parse per source file. An optional
+    persistent ParseCache lets unchanged files skip parsing across runs.
+    """
+
+    def __init__(self, cache: ParseCache = None, repo_source: 'RepoSource' = None):
+        self.cache = cache
+        # read files through a RepoSource (e.g. a git tree) instead of from disk
+        self.repo_source = repo_source
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self.reads = 0
+        self.parses = 0
+        # path -> error message for files whose parse failed or timed out
+        self.errors: Dict[str, str] = {}
+
+    def _load(self, file_path: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(file_path)
+        if entry is not None:
+            return entry
+
+        try:
+            if self.repo_source is not None:
+                data = self.repo_source.read(file_path)
+            else:
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+        except OSError:
+            return None
+        self.reads += 1
+
+        try:
+            source = data.decode('utf-8')
+        except UnicodeDecodeError:
+            source = None
+
+        entry = {
+            'path': file_path,
+            'digest': content_digest(data),
+            'source': source,
+            'parsed': None,
+        }
+        self._entries[file_path] = entry
+        return entry
+
+    def __contains__(self, file_path: str) -> bool:
+        return file_path in self._entries
+
+    def exists(self, file_path: str) -> bool:
+        if self.repo_source is not None:
+            return self.repo_source.exists(file_path)
+        return os.path.exists(file_path)
+
+    def digest(self, file_path: str) -> Optional[str]:
+        entry = self._load(file_path)
+        return entry['digest'] if entry else None
+
+    def source(self, file_path: str) -> Optional[str]:
+        """Return the decoded text of file_path, reading it at most once."""
+        entry = self._load(file_path)
+        return entry['source'] if entry else None
+
+    def parse(self, file_path: str) -> Dict[str, Any]:
+        """Return the parse result for file_path, parsing it at most once."""
+        entry = self._load(file_path)
+        if entry is None:
+            return empty_result()
+        if entry['parsed'] is None:
+            if entry['source'] is None:
+                entry['parsed'] = empty_result()
+            else:
+                entry['parsed'] = parse_source(entry['source'], file_path, self.cache, entry['digest'])
+                self.parses += 1
+        return entry['parsed']
+
+    def parse_many(self, file_paths: List[str], workers: Optional[int] = None,
+                   timeout: Optional[float] = DEFAULT_TIMEOUT, **pool_options) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yield (path, parse result) for every readable file in file_paths.
+
+        Files already in the store or in the persistent cache are yielded
+        first; the rest are parsed by parse_sources (a process pool for
+        large batches) and streamed back as they finish. pool_options are
+        passed through to parse_sources.
+        """
+        pending = []
+        keys = {}
+        for file_path in file_paths:
+            entry = self._load(file_path)
+            if entry is None:
+                continue
+            if entry['parsed'] is None and entry['source'] is None:
+                entry['parsed'] = empty_result()
+            if entry['parsed'] is None and self.cache is not None:
+                key = cache_key(file_path, entry['digest'])
+                cached = self.cache.get(key) if key else None
+                if cached is not None:
+                    entry['parsed'] = rebind_module(cached, module_name(file_path))
+                else:
+                    keys[file_path] = key
+            if entry['parsed'] is not None:
+                yield file_path, entry['parsed']
+            else:
+                pending.append((file_path, entry['source']))
+
+        for file_path, parsed, error in parse_sources(pending, workers=workers, timeout=timeout, **pool_options):
+            entry = self._entries[file_path]
+            entry['parsed'] = parsed
+            self.parses += 1
+            if error:
+                self.errors[file_path] = error
+            elif keys.get(file_path):
+                self.cache.put(keys[file_path], parsed)
+            yield file_path, parsed
+
+    def symbols(self, file_paths: List[str]) -> List[Dict]:
+        """Collect the symbols of every file in file_paths."""
+        symbols = []
+        for file_path in file_paths:
+            symbols.extend(self.parse(file_path).get('symbols', []))
+        return symbols
@@ -1,231 +1,477 @@
 import ast
+import inspect
 import re
+from bisect import bisect_right
+from itertools import accumulate
 from pathlib import Path
 from typing import List, Dict, Any
 
 try:
-    from tree_sitter import Parser
-    from tree_sitter_python import language
-    parser = Parser(language())
+    from .parse_cache import ParseCache, content_digest
+except ImportError:
+    from parse_cache import ParseCache, content_digest
+
+# One compiled query covers everything the Python parser extracts; each
+# pattern tags its match with a distinct capture name.
+PY_QUERY_SOURCE = """
+(function_definition name: (identifier) @name) @def
+(class_definition name: (identifier) @name) @class
+[(import_statement) (import_from_statement)] @import
+(call function: (identifier) @callee) @call
+"""
+
+try:
+    from tree_sitter import Language, Parser, Query, QueryCursor
+    import tree_sitter_python
+    PY_LANGUAGE = Language(tree_sitter_python.language())
+    parser = Parser(PY_LANGUAGE)
+    PY_QUERY = Query(PY_LANGUAGE, PY_QUERY_SOURCE)
     TREE_SITTER_AVAILABLE = True
 except Exception:
     parser = None
+    PY_QUERY = None
     TREE_SITTER_AVAILABLE = False
 
-def parse_python_file(file_path: str) -> Dict[str, Any]:
+# Bump whenever the shape or content of parser output changes so that
+# persisted cache entries from older parsers are ignored.
+PARSER_VERSION = "3"
+
+def empty_result() -> Dict[str, Any]:
+    return {'symbols': [], 'imports': [], 'calls': []}
+
+def module_name(file_path: str) -> str:
     """
-    Parse a Python file using Tree-sitter for robust AST extraction.
-    Falls back to Python AST if Tree-sitter fails.
+    Module label recorded on symbols, imports and calls: the file path
+    relative to its grandparent directory.
+    """
+    path = Path(file_path)
+    return str(path.relative_to(path.parent.parent))
+
+def rebind_module(result: Dict[str, Any], module: str) -> Dict[str, Any]:
+    """
+    Point every entry of a (cached) parse result at module.
+    """
+    for key in ('symbols', 'imports', 'calls'):
+        for item in result.get(key, []):
+            item['module'] = module
+    return result
+
+def read_source(file_path: str):
+    """
+    Read a source file as text, returning None if it cannot be read.
     """
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            source = f.read()
+            return f.read()
     except Exception:
-        return {'symbols': [], 'imports': [], 'calls': []}
+        return None
 
-    # Try Tree-sitter first
-    try:
-        tree = parser.parse(bytes(source, 'utf8'))
-        symbols = []
-        imports = []
-        calls = []
-
-        def traverse(node):
-            if node.type == 'function_definition':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    name = source[name_node.start_byte:name_node.end_byte]
-                    parameters = node.child_by_field_name('parameters')
-                    sig = f"def {name}("
-                    if parameters:
-                        # Simple parameter extraction
-                        params = []
-                        for param in parameters.children:
-                            if param.type == 'identifier':
-                                params.append(source[param.start_byte:param.end_byte])
-                        sig += ', '.join(params)
-                    sig += ")"
-                    symbols.append({
-                        'name': name,
-                        'kind': 'function',
-                        'signature': sig,
-                        'docstring': '',
-                        'module': str(Path(file_path).relative_to(Path(file_path).parent.parent)),
-                        'line': node.start_point[0] + 1
-                    })
-            elif node.type == 'class_definition':
-                name_node = node.child_by_field_name('name')
-                if name_node:
-                    name = source[name_node.start_byte:name_node.end_byte]
-                    symbols.append({
-                        'name': name,
-                        'kind': 'class',
-                        'signature': f"class {name}()",
-                        'docstring': '',
-                        'module': str(Path(file_path).relative_to(Path(file_path).parent.parent)),
-                        'line': node.start_point[0] + 1
-                    })
-            # Add more for imports and calls if needed
-            for child in node.children:
-                traverse(child)
-
-        traverse(tree.root_node)
-        return {'symbols': symbols, 'imports': imports, 'calls': calls}
-    except Exception:
-        # Fallback to AST
-        try:
-            tree = ast.parse(source, filename=file_path)
-        except SyntaxError:
-            return {'symbols': [], 'imports': [], 'calls': []}
-
-        symbols = []
-        imports = []
-        calls = []
-
-        def extract_signature(func_node):
-            args = []
-            for arg in func_node.args.args:
-                arg_str = arg.arg
-                if arg.annotation:
-                    arg_str += f": {ast.unparse(arg.annotation)}"
-                args.append(arg_str)
-            if func_node.args.vararg:
-                args.append(f"*{func_node.args.vararg.arg}")
-            if func_node.args.kwarg:
-                args.append(f"**{func_node.args.kwarg.arg}")
-            defaults = [None] * (len(func_node.args.args) - len(func_node.args.defaults)) + func_node.args.defaults
-            for i, default in enumerate(defaults):
-                if default:
-                    args[i] += f"={ast.unparse(default)}"
-            return f"({', '.join(args)})"
-
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                symbols.append({
-                    'name': node.name,
-                    'kind': 'function',
-                    'signature': f"def {node.name}{extract_signature(node)}",
-                    'docstring': ast.get_docstring(node) or '',
-                    'module': str(Path(file_path).relative_to(Path(file_path).parent.parent)),
-                    'line': node.lineno
-                })
-            elif isinstance(node, ast.ClassDef):
-                bases = [ast.unparse(base) for base in node.bases]
-                symbols.append({
-                    'name': node.name,
-                    'kind': 'class',
-                    'signature': f"class {node.name}({', '.join(bases)})",
-                    'docstring': ast.get_docstring(node) or '',
-                    'module': str(Path(file_path).relative_to(Path(file_path).parent.parent)),
-                    'line': node.lineno
-                })
-            elif isinstance(node, ast.Import):
-                for alias in node.names:
-                    imports.append({
-                        'name': alias.name,
-                        'as': alias.asname,
-                        'module': str(Path(file_path).relative_to(Path(file_path).parent.parent))
-                    })
-            elif isinstance(node, ast.ImportFrom):
-                module = node.module or ''
-                for alias in node.names:
-                    imports.append({
-                        'name': f"{module}.{alias.name}",
-                        'as': alias.asname,
-                        'module': str(Path(file_path).relative_to(Path(file_path).parent.parent))
-                    })
-            elif isinstance(node, ast.Call):
-                if isinstance(node.func, ast.Name):
-                    calls.append({
-                        'caller': None,  # will be set based on context
-                        'callee': node.func.id,
-                        'module': str(Path(file_path).relative_to(Path(file_path).parent.parent)),
-                        'line': node.lineno
-                    })
-
-        # Associate calls with containing functions
-        symbols.sort(key=lambda x: x['line'])
-        for call in calls:
-            for sym in reversed(symbols):
-                if sym['line'] <= call['line']:
-                    call['caller'] = sym['name']
-                    break
-
-        return {'symbols': symbols, 'imports': imports, 'calls': calls}
-
-def parse_jac_file(file_path: str) -> Dict[str, Any]:
+def parse_python_file(file_path: str, cache: 'ParseCache' = None) -> Dict[str, Any]:
     """
-    Parse a Jac file using regex heuristics to extract symbols.
-    Note: Tree-sitter grammar for Jac is not available; using regex for now.
+    Parse a Python file using Tree-sitter for robust AST extraction.
+    Falls back to Python AST if Tree-sitter fails.
+    """
+    source = read_source(file_path)
+    if source is None:
+        return empty_result()
+    return _cached_parse(parse_python_source, source, file_path, cache)
+
+def parse_python_source(source: str, file_path: str) -> Dict[str, Any]:
     """
+    Parse already-loaded Python source; file_path is only used for module names.
+    Uses compiled Tree-sitter queries when available and falls back to
+    Python's ast module otherwise.
+    """
+    module = module_name(file_path)
+
+    if TREE_SITTER_AVAILABLE:
+        try:
+            return _parse_python_tree_sitter(source, module)
+        except Exception:
+            pass
+    return _parse_python_ast(source, file_path, module)
+
+def _node_text(node) -> str:
+    return node.text.decode('utf-8')
+
+def _ts_docstring(definition) -> str:
+    body = definition.child_by_field_name('body')
+    if body is None or body.named_child_count == 0:
+        return ''
+    first = body.named_children[0]
+    if first.type != 'expression_statement' or first.named_child_count != 1:
+        return ''
+    literal = first.named_children[0]
+    if literal.type != 'string':
+        return ''
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source = f.read()
-    except:
-        return {'symbols': [], 'imports': [], 'calls': []}
+        value = ast.literal_eval(_node_text(literal))
+    except Exception:
+        return ''
+    return inspect.cleandoc(value) if isinstance(value, str) else ''
+
+def _ts_decorators(definition) -> List[str]:
+    parent = definition.parent
+    if parent is None or parent.type != 'decorated_definition':
+        return []
+    return [_node_text(d)[1:].strip() for d in parent.named_children if d.type == 'decorator']
+
+def _ts_parameter(param) -> str:
+    kind = param.type
+    if kind in ('default_parameter', 'typed_default_parameter'):
+        name = _node_text(param.child_by_field_name('name'))
+        annotation = param.child_by_field_name('type')
+        value = _node_text(param.child_by_field_name('value'))
+        if annotation is not None:
+            return f"{name}: {_node_text(annotation)}={value}"
+        return f"{name}={value}"
+    if kind == 'typed_parameter':
+        annotation = param.child_by_field_name('type')
+        return f"{_node_text(param.named_children[0])}: {_node_text(annotation)}"
+    return _node_text(param)
+
+def _ts_signature(definition, name: str) -> str:
+    parameters = definition.child_by_field_name('parameters')
+    params = [_ts_parameter(p) for p in parameters.named_children if p.type != 'comment'] if parameters else []
+    prefix = 'async def' if definition.children[0].type == 'async' else 'def'
+    sig = f"{prefix} {name}({', '.join(params)})"
+    return_type = definition.child_by_field_name('return_type')
+    if return_type is not None:
+        sig += f" -> {_node_text(return_type)}"
+    return sig
 
+def _ts_bases(definition) -> List[str]:
+    superclasses = definition.child_by_field_name('superclasses')
+    if superclasses is None:
+        return []
+    return [_node_text(b) for b in superclasses.named_children if b.type not in ('keyword_argument', 'comment')]
+
+def _ts_imports(statement, module: str) -> List[Dict[str, Any]]:
+    prefix = ''
+    if statement.type == 'import_from_statement':
+        source_module = statement.child_by_field_name('module_name')
+        if source_module.type == 'relative_import':
+            # like ast.ImportFrom.module, drop the leading dots
+            dotted = [c for c in source_module.named_children if c.type == 'dotted_name']
+            prefix = (_node_text(dotted[0]) if dotted else '') + '.'
+        else:
+            prefix = _node_text(source_module) + '.'
+        if any(c.type == 'wildcard_import' for c in statement.named_children):
+            return [{'name': prefix + '*', 'as': None, 'module': module}]
+
+    imports = []
+    for name_node in statement.children_by_field_name('name'):
+        alias = None
+        if name_node.type == 'aliased_import':
+            alias = _node_text(name_node.child_by_field_name('alias'))
+            name_node = name_node.child_by_field_name('name')
+        imports.append({'name': prefix + _node_text(name_node), 'as': alias, 'module': module})
+    return imports
+
+def _parse_python_tree_sitter(source: str, module: str) -> Dict[str, Any]:
+    tree = parser.parse(source.encode('utf-8'))
     symbols = []
     imports = []
     calls = []
 
-    # Regex for function defs
-    func_pattern = r'def\s+(\w+)\s*\(([^)]*)\)\s*:\s*(?:"""(.*?)"""|\'\'\'(.*?)\'\'\'|)'
-    for match in re.finditer(func_pattern, source, re.DOTALL):
-        name = match.group(1)
-        args = match.group(2)
-        doc = match.group(3) or match.group(4) or ''
-        symbols.append({
-            'name': name,
+    # Matches arrive in document order, so a stack of open definitions
+    # gives each call its innermost enclosing function or class.
+    scopes = []
+    for _, captures in QueryCursor(PY_QUERY).matches(tree.root_node):
+        node = (captures.get('def') or captures.get('class') or captures.get('import') or captures.get('call'))[0]
+        while scopes and scopes[-1][0] <= node.start_byte:
+            scopes.pop()
+
+        if 'def' in captures:
+            name = _node_text(captures['name'][0])
+            symbols.append({
+                'name': name,
+                'kind': 'function',
+                'signature': _ts_signature(node, name),
+                'docstring': _ts_docstring(node),
+                'decorators': _ts_decorators(node),
+                'module': module,
+                'line': node.start_point[0] + 1
+            })
+            scopes.append((node.end_byte, name))
+        elif 'class' in captures:
+            name = _node_text(captures['name'][0])
+            bases = _ts_bases(node)
+            symbols.append({
+                'name': name,
+                'kind': 'class',
+                'signature': f"class {name}({', '.join(bases)})",
+                'docstring': _ts_docstring(node),
+                'decorators': _ts_decorators(node),
+                'bases': bases,
+                'module': module,
+                'line': node.start_point[0] + 1
+            })
+            scopes.append((node.end_byte, name))
+        elif 'import' in captures:
+            imports.extend(_ts_imports(node, module))
+        else:
+            calls.append({
+                'caller': scopes[-1][1] if scopes else None,
+                'callee': _node_text(captures['callee'][0]),
+                'module': module,
+                'line': node.start_point[0] + 1
+            })
+
+    return {'symbols': symbols, 'imports': imports, 'calls': calls}
+
+def _ast_signature(node) -> str:
+    args = node.args
+
+    def render(arg, default=None):
+        text = arg.arg
+        if arg.annotation:
+            text += f": {ast.unparse(arg.annotation)}"
+        if default is not None:
+            text += f"={ast.unparse(default)}"
+        return text
+
+    positional = args.posonlyargs + args.args
+    defaults = [None] * (len(positional) - len(args.defaults)) + args.defaults
+    params = [render(a, d) for a, d in zip(positional, defaults)]
+    if args.posonlyargs:
+        params.insert(len(args.posonlyargs), '/')
+    if args.vararg:
+        params.append(f"*{render(args.vararg)}")
+    elif args.kwonlyargs:
+        params.append('*')
+    params.extend(render(a, d) for a, d in zip(args.kwonlyargs, args.kw_defaults))
+    if args.kwarg:
+        params.append(f"**{render(args.kwarg)}")
+
+    prefix = 'async def' if isinstance(node, ast.AsyncFunctionDef) else 'def'
+    sig = f"{prefix} {node.name}({', '.join(params)})"
+    if node.returns is not None:
+        sig += f" -> {ast.unparse(node.returns)}"
+    return sig
+
+class _PythonAstVisitor(ast.NodeVisitor):
+    """
+    Single pass over a module. A stack of open definitions gives every call
+    its innermost enclosing function, method or class in O(1).
+    """
+
+    def __init__(self, module: str):
+        self.module = module
+        self.scopes: List[str] = []
+        self.symbols = []
+        self.imports = []
+        self.calls = []
+
+    def _visit_scope(self, node, header):
+        # decorators, defaults and bases are evaluated in the enclosing scope
+        for child in header:
+            self.visit(child)
+        self.scopes.append(node.name)
+        for stmt in node.body:
+            self.visit(stmt)
+        self.scopes.pop()
+
+    def _visit_function(self, node):
+        self.symbols.append({
+            'name': node.name,
             'kind': 'function',
-            'signature': f"def {name}({args})",
-            'docstring': doc.strip(),
-            'module': str(Path(file_path).relative_to(Path(file_path).parent.parent)),
-            'line': source[:match.start()].count('\n') + 1
+            'signature': _ast_signature(node),
+            'docstring': ast.get_docstring(node) or '',
+            'decorators': [ast.unparse(d) for d in node.decorator_list],
+            'module': self.module,
+            'line': node.lineno
         })
+        header = node.decorator_list + [node.args]
+        if node.returns is not None:
+            header.append(node.returns)
+        self._visit_scope(node, header)
 
-    # Regex for class defs
-    class_pattern = r'class\s+(\w+)\s*\(([^)]*)\)\s*:\s*(?:"""(.*?)"""|\'\'\'(.*?)\'\'\'|)'
-    for match in re.finditer(class_pattern, source, re.DOTALL):
-        name = match.group(1)
-        bases = match.group(2)
-        doc = match.group(3) or match.group(4) or ''
-        symbols.append({
-            'name': name,
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def visit_ClassDef(self, node):
+        bases = [ast.unparse(base) for base in node.bases]
+        self.symbols.append({
+            'name': node.name,
             'kind': 'class',
-            'signature': f"class {name}({bases})",
-            'docstring': doc.strip(),
-            'module': str(Path(file_path).relative_to(Path(file_path).parent.parent)),
-            'line': source[:match.start()].count('\n') + 1
+            'signature': f"class {node.name}({', '.join(bases)})",
+            'docstring': ast.get_docstring(node) or '',
+            'decorators': [ast.unparse(d) for d in node.decorator_list],
+            'bases': bases,
+            'module': self.module,
+            'line': node.lineno
         })
+        self._visit_scope(node, node.decorator_list + node.bases + node.keywords)
 
-    # Simple import regex
-    import_pattern = r'import\s+(\w+)'
-    for match in re.finditer(import_pattern, source):
-        imports.append({
-            'name': match.group(1),
-            'as': None,
-            'module': str(Path(file_path).relative_to(Path(file_path).parent.parent))
-        })
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imports.append({
+                'name': alias.name,
+                'as': alias.asname,
+                'module': self.module
+            })
 
-    # Simple call regex (heuristic)
-    call_pattern = r'(\w+)\s*\('
-    for match in re.finditer(call_pattern, source):
-        calls.append({
-            'caller': None,
-            'callee': match.group(1),
-            'module': str(Path(file_path).relative_to(Path(file_path).parent.parent)),
-            'line': source[:match.start()].count('\n') + 1
-        })
+    def visit_ImportFrom(self, node):
+        from_module = node.module or ''
+        for alias in node.names:
+            self.imports.append({
+                'name': f"{from_module}.{alias.name}",
+                'as': alias.asname,
+                'module': self.module
+            })
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Name):
+            self.calls.append({
+                'caller': self.scopes[-1] if self.scopes else None,
+                'callee': node.func.id,
+                'module': self.module,
+                'line': node.lineno
+            })
+        self.generic_visit(node)
+
+def _parse_python_ast(source: str, file_path: str, module: str) -> Dict[str, Any]:
+    try:
+        tree = ast.parse(source, filename=file_path)
+    except SyntaxError:
+        return {'symbols': [], 'imports': [], 'calls': []}
+
+    visitor = _PythonAstVisitor(module)
+    visitor.visit(tree)
+    return {'symbols': visitor.symbols, 'imports': visitor.imports, 'calls': visitor.calls}
+
+def parse_jac_file(file_path: str, cache: 'ParseCache' = None) -> Dict[str, Any]:
+    """
+    Parse a Jac file using regex heuristics to extract symbols.
+    Note: Tree-sitter grammar for Jac is not available; using regex for now.
+    """
+    source = read_source(file_path)
+    if source is None:
+        return empty_result()
+    return _cached_parse(parse_jac_source, source, file_path, cache)
+
+# Single tokenizer for the Jac heuristics: definitions are tried before the
+# catch-all call pattern, so a definition's own name is not reported as a call.
+JAC_TOKEN_PATTERN = re.compile(
+    r'(?P<def>def|class)\s+(?P<name>\w+)\s*\((?P<args>[^)]*)\)\s*:\s*(?:"""(?P<doc>.*?)"""|\'\'\'(?P<doc_alt>.*?)\'\'\'|)'
+    r'|import\s+(?P<import>\w+)'
+    r'|(?P<callee>\w+)\s*\(',
+    re.DOTALL
+)
+
+def line_starts(source: str) -> List[int]:
+    """
+    Offsets at which each line of source starts; resolve an offset to its
+    1-based line number with bisect_right(starts, offset).
+    """
+    starts = [0]
+    starts.extend(accumulate(len(line) + 1 for line in source.split('\n')[:-1]))
+    return starts
+
+def parse_jac_source(source: str, file_path: str) -> Dict[str, Any]:
+    """
+    Parse already-loaded Jac source; file_path is only used for module names.
+    """
+    module = module_name(file_path)
+    symbols = []
+    imports = []
+    calls = []
+    starts = line_starts(source)
+
+    for match in JAC_TOKEN_PATTERN.finditer(source):
+        groups = match.groupdict()
+        if groups['def']:
+            name = groups['name']
+            doc = groups['doc'] or groups['doc_alt'] or ''
+            keyword = groups['def']
+            symbols.append({
+                'name': name,
+                'kind': 'function' if keyword == 'def' else 'class',
+                'signature': f"{keyword} {name}({groups['args']})",
+                'docstring': doc.strip(),
+                'module': module,
+                'line': bisect_right(starts, match.start())
+            })
+        elif groups['import']:
+            imports.append({
+                'name': groups['import'],
+                'as': None,
+                'module': module
+            })
+        else:
+            calls.append({
+                'caller': None,
+                'callee': groups['callee'],
+                'module': module,
+                'line': bisect_right(starts, match.start())
+            })
 
     return {'symbols': symbols, 'imports': imports, 'calls': calls}
 
-def parse_file(file_path: str) -> Dict[str, Any]:
+# Source parsers keyed by file extension
+PARSERS = {
+    '.py': parse_python_source,
+    '.jac': parse_jac_source,
+}
+
+def get_parser(file_path: str):
+    """
+    Return the source parser for file_path, or None if the extension is unsupported.
+    """
+    return PARSERS.get(Path(file_path).suffix)
+
+def parser_version(parser_fn) -> str:
     """
-    Parse a file based on extension.
+    Version tag for cache keys; distinguishes parsers and the Python backend.
     """
-    if file_path.endswith('.py'):
-        return parse_python_file(file_path)
-    elif file_path.endswith('.jac'):
-        return parse_jac_file(file_path)
+    backend = 'ts' if TREE_SITTER_AVAILABLE else 'ast'
+    return f"{PARSER_VERSION}:{parser_fn.__name__}:{backend}"
+
+def cache_key(file_path: str, digest: str):
+    """
+    ParseCache key for content with the given digest at file_path, or None
+    if no parser handles the file's extension.
+    """
+    parser_fn = get_parser(file_path)
+    if parser_fn is None:
+        return None
+    return ParseCache.make_key(parser_version(parser_fn), digest)
+
+def _cached_parse(parser_fn, source: str, file_path: str, cache: 'ParseCache' = None, digest: str = None) -> Dict[str, Any]:
+    if cache is None:
+        return parser_fn(source, file_path)
+    if digest is None:
+        digest = content_digest(source.encode('utf-8'))
+    key = ParseCache.make_key(parser_version(parser_fn), digest)
+    cached = cache.get(key)
+    if cached is not None:
+        return rebind_module(cached, module_name(file_path))
+    result = parser_fn(source, file_path)
+    cache.put(key, result)
+    return result
+
+def parse_source(source: str, file_path: str, cache: 'ParseCache' = None, digest: str = None) -> Dict[str, Any]:
+    """
+    Parse already-loaded source based on the extension of file_path.
+    With a cache, unchanged content (same digest) skips parsing entirely.
+    """
+    parser_fn = get_parser(file_path)
+    if parser_fn is None:
+        return empty_result()
+    return _cached_parse(parser_fn, source, file_path, cache, digest)
+
+def parse_file(file_path: str, cache: 'ParseCache' = None, repo_source: 'RepoSource' = None) -> Dict[str, Any]:
+    """
+    Parse a file based on extension. Pass a RepoSource to read file_path
+    through it (e.g. from a git tree) instead of from disk.
+    """
+    if get_parser(file_path) is None:
+        return empty_result()
+    if repo_source is not None:
+        source = repo_source.read_text(file_path)
     else:
-        return {'symbols': [], 'imports': [], 'calls': []}
+        source = read_source(file_path)
+    if source is None:
+        return empty_result()
+    return parse_source(source, file_path, cache)
@@ -1,63 +1,198 @@
+import mmap
 import os
+from collections import deque
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 
+try:
+    from .repo_source import RepoSource, FilesystemSource
+except ImportError:
+    from repo_source import RepoSource, FilesystemSource
 
-def build_file_tree(root_path: str) -> Dict[str, Any]:
-    """Build a nested dict representing files and folders under root_path.
 
-    Directories are represented as dicts; files map to None.
+IGNORED_DIRS = {'.git', '__pycache__', 'node_modules', '.venv', 'venv', 'env', 'build', 'dist', '.pytest_cache', '.mypy_cache'}
+IGNORED_FILES = {'.DS_Store', 'Thumbs.db'}
+
+README_CANDIDATES = ("README.md", "README.rst", "README")
+ENTRY_POINT_FILES = ("setup.py", "pyproject.toml")
+MAIN_GUARD = b"if __name__"
+
+
+def _has_main_guard(path: str, size: int) -> bool:
+    """Return True if the file at path contains a ``if __name__`` guard.
+
+    The file is memory-mapped and searched as bytes so large modules are
+    never decoded or copied into a Python string.
+    """
+    if size <= 0:
+        return False
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm.find(MAIN_GUARD) != -1
+    except (OSError, ValueError):
+        return False
+
+
+def scan_repo(root_path: Union[str, RepoSource], ignored_dirs=IGNORED_DIRS, ignored_files=IGNORED_FILES) -> Dict[str, Any]:
+    """Scan root_path once with os.scandir and collect everything map_repo needs.
+
+    root_path may also be a RepoSource; sources other than a working tree
+    (e.g. GitTreeSource) are scanned from their file listing instead, and
+    the returned paths are under the source's root.
+
+    Returns keys:
+      - file_tree: nested dict, directories are dicts and files map to None
+      - readme_path: absolute path of the preferred README, or None
+      - entry_points: absolute paths of probable entry points
+      - files: repo-relative path -> {"size": int, "mtime": float}
+
+    Directories in ``ignored_dirs`` are not descended into. A top-level
+    README.md / README.rst / README wins; otherwise the shallowest file whose
+    name starts with README is used.
     """
-    root = Path(root_path)
+    if isinstance(root_path, FilesystemSource):
+        root_path = root_path.root
+    elif isinstance(root_path, RepoSource):
+        return _scan_source(root_path, ignored_dirs, ignored_files)
+
+    root = os.path.abspath(root_path)
     tree: Dict[str, Any] = {}
+    files: Dict[str, Dict[str, Any]] = {}
+    entry_points: List[str] = []
+    top_readmes: Dict[str, str] = {}
+    fallback_readme: Optional[str] = None
+
+    # breadth-first so the README fallback picks the shallowest match
+    queue = deque([(root, "", tree)])
+    while queue:
+        dirpath, rel_dir, container = queue.popleft()
+        try:
+            entries = os.scandir(dirpath)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                name = entry.name
+                rel = os.path.join(rel_dir, name) if rel_dir else name
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    continue
+
+                if is_dir:
+                    if name in ignored_dirs:
+                        continue
+                    sub = container.setdefault(name, {})
+                    # like os.walk, list symlinked dirs but do not follow them
+                    if not entry.is_symlink():
+                        queue.append((entry.path, rel, sub))
+                    continue
 
-    for dirpath, dirnames, filenames in os.walk(root):
-        rel_dir = os.path.relpath(dirpath, root)
-        # normalize root
-        if rel_dir == ".":
-            container = tree
-        else:
-            parts = rel_dir.split(os.sep)
-            container = tree
-            for p in parts:
-                container = container.setdefault(p, {})
+                if name in ignored_files:
+                    continue
+                container[name] = None
+                try:
+                    st = entry.stat()
+                    size, mtime = st.st_size, st.st_mtime
+                except OSError:
+                    size, mtime = 0, 0.0
+                files[rel] = {"size": size, "mtime": mtime}
 
-        for d in dirnames:
-            container.setdefault(d, {})
-        for f in filenames:
-            # store files as True (or could store metadata)
-            container[f] = None
+                if not rel_dir and name in README_CANDIDATES:
+                    top_readmes[name] = entry.path
+                if fallback_readme is None and name.upper().startswith("README"):
+                    fallback_readme = entry.path
 
-    return tree
+                lower = name.lower()
+                if lower in ENTRY_POINT_FILES:
+                    entry_points.append(entry.path)
+                elif lower.endswith(".py") and _has_main_guard(entry.path, size):
+                    entry_points.append(entry.path)
 
+    readme_path = next((top_readmes[n] for n in README_CANDIDATES if n in top_readmes), fallback_readme)
 
-def find_readme(root_path: str) -> Optional[str]:
-    """Search for a README file (README.md, README.rst, README) and return its text.
+    return {
+        "file_tree": tree,
+        "readme_path": readme_path,
+        "entry_points": entry_points,
+        "files": files,
+    }
 
-    Search prefers top-level README, case-insensitive.
-    """
-    root = Path(root_path)
-    candidates = ["README.md", "README.rst", "README"]
 
-    # check top-level first
-    for name in candidates:
-        p = root / name
-        if p.exists():
+def _scan_source(source: RepoSource, ignored_dirs, ignored_files) -> Dict[str, Any]:
+    # Same result as the scandir walk, built from the source's file listing.
+    tree: Dict[str, Any] = {}
+    files: Dict[str, Dict[str, Any]] = {}
+    entry_points: List[str] = []
+    top_readmes: Dict[str, str] = {}
+    readmes: List[tuple] = []
+
+    for rel, size in sorted(source.files()):
+        *dirs, name = rel.split("/")
+        if any(d in ignored_dirs for d in dirs) or name in ignored_files:
+            continue
+        container = tree
+        for d in dirs:
+            container = container.setdefault(d, {})
+        container[name] = None
+        files[rel] = {"size": size, "mtime": 0.0}
+
+        path = source.path(rel)
+        if not dirs and name in README_CANDIDATES:
+            top_readmes[name] = path
+        if name.upper().startswith("README"):
+            readmes.append((len(dirs), path))
+
+        lower = name.lower()
+        if lower in ENTRY_POINT_FILES:
+            entry_points.append(path)
+        elif lower.endswith(".py") and size > 0:
             try:
-                return p.read_text(encoding="utf-8")
-            except Exception:
-                return None
-
-    # fallback: walk and find first match
-    for dirpath, dirnames, filenames in os.walk(root):
-        for fn in filenames:
-            if fn.upper().startswith("README"):
-                try:
-                    return Path(dirpath, fn).read_text(encoding="utf-8")
-                except Exception:
-                    return None
+                if MAIN_GUARD in source.read(rel):
+                    entry_points.append(path)
+            except OSError:
+                pass
 
-    return None
+    fallback_readme = min(readmes)[1] if readmes else None
+    readme_path = next((top_readmes[n] for n in README_CANDIDATES if n in top_readmes), fallback_readme)
+
+    return {
+        "file_tree": tree,
+        "readme_path": readme_path,
+        "entry_points": entry_points,
+        "files": files,
+    }
+
+
+def _read_readme(readme_path: Optional[str], source: RepoSource = None) -> Optional[str]:
+    if not readme_path:
+        return None
+    if source is not None:
+        return source.read_text(readme_path)
+    try:
+        return Path(readme_path).read_text(encoding="utf-8")
+    except Exception:
+        return None
+
+
+def _source_of(root_path) -> Optional[RepoSource]:
+    return root_path if isinstance(root_path, RepoSource) else None
+
+
+def build_file_tree(root_path: Union[str, RepoSource]) -> Dict[str, Any]:
+    """Build a nested dict representing files and folders under root_path.
+
+    Directories are represented as dicts; files map to None.
+    """
+    return scan_repo(root_path)["file_tree"]
+
+
+def find_readme(root_path: Union[str, RepoSource]) -> Optional[str]:
+    """Search for a README file (README.md, README.rst, README) and return its text.
+
+    Search prefers top-level README, case-insensitive.
+    """
+    return _read_readme(scan_repo(root_path)["readme_path"], _source_of(root_path))
 
 
 def summarize_readme(content: str) -> str:
@@ -78,55 +213,31 @@ def summarize_readme(content: str) -> str:
     return summary
 
 
-def find_entry_points(root_path: str) -> List[str]:
+def find_entry_points(root_path: Union[str, RepoSource]) -> List[str]:
     """Find probable entry points in the repository.
 
     Looks for files named setup.py, pyproject.toml, and any .py containing
     "if __name__ == '__main__'". Returns absolute paths as strings.
     """
-    root = Path(root_path)
-    entry_points: List[str] = []
+    return scan_repo(root_path)["entry_points"]
 
-    for dirpath, dirnames, filenames in os.walk(root):
-        for fn in filenames:
-            lower = fn.lower()
-            full = os.path.join(dirpath, fn)
-            if lower in ("setup.py", "pyproject.toml"):
-                entry_points.append(os.path.abspath(full))
-                continue
-            if lower.endswith(".py"):
-                try:
-                    text = Path(full).read_text(encoding="utf-8")
-                except Exception:
-                    continue
-                if "if __name__" in text:
-                    entry_points.append(os.path.abspath(full))
-
-    # deduplicate while preserving order
-    seen = set()
-    filtered: List[str] = []
-    for p in entry_points:
-        if p not in seen:
-            seen.add(p)
-            filtered.append(p)
 
-    return filtered
-
-
-def map_repo(local_path: str) -> Dict[str, Any]:
+def map_repo(local_path: Union[str, RepoSource]) -> Dict[str, Any]:
     """High-level mapping of a local repo into a small metadata structure.
 
-    Returns keys: file_tree, readme_summary, entry_points
+    Returns keys: file_tree, readme_summary, entry_points, files. The
+    repository is traversed a single time (see scan_repo). local_path may
+    be a RepoSource, e.g. a GitTreeSource to map a commit without a checkout.
     """
-    file_tree = build_file_tree(local_path)
-    readme = find_readme(local_path)
+    scan = scan_repo(local_path)
+    readme = _read_readme(scan["readme_path"], _source_of(local_path))
     readme_summary = summarize_readme(readme or "")
-    entry_points = find_entry_points(local_path)
 
     return {
-        "file_tree": file_tree,
+        "file_tree": scan["file_tree"],
         "readme_summary": readme_summary,
-        "entry_points": entry_points,
+        "entry_points": scan["entry_points"],
+        "files": scan["files"],
     }
 
 
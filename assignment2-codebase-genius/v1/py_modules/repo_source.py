@@ -0,0 +1,140 @@
+import codecs
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, Optional, Tuple
+
+from git import Repo
+
+
+class RepoSource(ABC):
+    """
+    Read-only view of a repository's files for the mapper and parsers.
+
+    Files are addressed by path under ``root`` (os.path.join(root, rel)),
+    the same form the pipeline uses for checked-out files, so module labels
+    and entry point paths do not depend on where the bytes come from.
+    """
+
+    root: str
+
+    def path(self, rel_path: str) -> str:
+        return os.path.join(self.root, rel_path)
+
+    def relpath(self, path: str) -> str:
+        if os.path.isabs(path):
+            path = os.path.relpath(path, self.root)
+        return path.replace(os.sep, '/')
+
+    @abstractmethod
+    def files(self) -> Iterator[Tuple[str, int]]:
+        """Yield (repo-relative posix path, size in bytes) for every file."""
+
+    @abstractmethod
+    def read(self, path: str) -> bytes:
+        """Return the contents of path (absolute under root, or relative). Raises OSError."""
+
+    @abstractmethod
+    def exists(self, path: str) -> bool:
+        """Whether path names a file in the source."""
+
+    def read_head(self, path: str, size: int) -> bytes:
+        """Return at most the first size bytes of path. Raises OSError."""
+        return self.read(path)[:size]
+
+    def read_text(self, path: str, limit: Optional[int] = None) -> Optional[str]:
+        """
+        Decoded UTF-8 text of path (only its first limit bytes, if given),
+        or None if it cannot be read.
+        """
+        try:
+            if limit is None:
+                return self.read(path).decode('utf-8')
+            # a multi-byte character cut off at the limit is dropped, not an error
+            return codecs.getincrementaldecoder('utf-8')().decode(self.read_head(path, limit))
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FilesystemSource(RepoSource):
+    """Files of a checked-out working tree."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def files(self) -> Iterator[Tuple[str, int]]:
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d != '.git']
+            for name in filenames:
+                full = os.path.join(dirpath, name)
+                try:
+                    size = os.path.getsize(full)
+                except OSError:
+                    continue
+                yield self.relpath(full), size
+
+    def read(self, path: str) -> bytes:
+        with open(self.path(self.relpath(path)), 'rb') as f:
+            return f.read()
+
+    def read_head(self, path: str, size: int) -> bytes:
+        with open(self.path(self.relpath(path)), 'rb') as f:
+            return f.read(size)
+
+    def exists(self, path: str) -> bool:
+        return os.path.isfile(self.path(self.relpath(path)))
+
+
+class GitTreeSource(RepoSource):
+    """
+    Files of one commit, read straight from a repository's object database
+    (bare or not) with no checkout.
+
+    The tree is listed once with `git ls-tree -r -l`; blobs are read through
+    a persistent `git cat-file --batch` process. root is the directory the
+    files are reported under; it need not exist (by default the repository
+    path without its '.git' suffix).
+    """
+
+    def __init__(self, repo_path: str, rev: str = "HEAD", root: str = None):
+        self.repo = Repo(repo_path)
+        if root is None:
+            root = os.path.abspath(repo_path).rstrip(os.sep)
+            if root.endswith('.git'):
+                root = root[:-4].rstrip(os.sep) or root
+        self.root = os.path.abspath(root)
+        self.rev = rev
+        self._blobs: Dict[str, Tuple[str, int]] = {}
+        listing = self.repo.git.ls_tree('-r', '-l', '-z', rev, strip_newline_in_stdout=False)
+        for record in listing.split('\0'):
+            if not record:
+                continue
+            meta, _, rel = record.partition('\t')
+            mode, kind, sha, size = meta.split()
+            # skip submodules (commits) and symlinks
+            if kind == 'blob' and mode != '120000':
+                self._blobs[rel] = (sha, int(size))
+
+    def files(self) -> Iterator[Tuple[str, int]]:
+        for rel, (_, size) in self._blobs.items():
+            yield rel, size
+
+    def read(self, path: str) -> bytes:
+        blob = self._blobs.get(self.relpath(path))
+        if blob is None:
+            raise FileNotFoundError(path)
+        return self.repo.git.get_object_data(blob[0])[3]
+
+    def exists(self, path: str) -> bool:
+        return self.relpath(path) in self._blobs
+
+    def close(self):
+        self.repo.close()
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+try:
+    from .parse_cache import default_cache_dir
+    from .parser_utils import PARSER_VERSION
+except ImportError:
+    from parse_cache import default_cache_dir
+    from parser_utils import PARSER_VERSION
+
+# Bump when generated docs, diagrams or the CCG format change shape
+PIPELINE_VERSION = f"1-parser{PARSER_VERSION}"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+DEFAULT_TTL = 7 * 24 * 3600
+META_FILE = "meta.json"
+
+
+def config_hash(config: Dict[str, Any]) -> str:
+    """Stable hash of the options that change the generated artefacts."""
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def result_key(repo_url: str, commit: str, pipeline_version: str = PIPELINE_VERSION, config: str = "") -> str:
+    url = repo_url.rstrip("/")
+    if url.endswith(".git"):
+        url = url[:-4]
+    raw = "\n".join((url, commit, pipeline_version, config))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def _dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+class ResultCache:
+    """
+    Finished pipeline outputs (docs.md, diagrams, ccg.bin) keyed by
+    (repository URL, commit SHA, pipeline version, config hash).
+
+    Each entry is a directory holding a copy of the job's output directory
+    plus meta.json. Entries older than ttl seconds are dropped on read, and
+    the least recently used ones are evicted once the store exceeds
+    max_bytes. Entries are written to a temporary directory and renamed into
+    place, so readers never see a half-written entry.
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = DEFAULT_TTL):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def default(cls, max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = DEFAULT_TTL) -> "ResultCache":
+        return cls(default_cache_dir() / "results", max_bytes, ttl)
+
+    def _meta(self, entry: Path) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads((entry / META_FILE).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def get(self, key: str) -> Optional[Path]:
+        """Directory holding the cached outputs for key, or None."""
+        entry = self.root / key
+        with self._lock:
+            meta = self._meta(entry)
+            if meta is None or time.time() - meta["created"] > self.ttl:
+                if meta is not None:
+                    shutil.rmtree(entry, ignore_errors=True)
+                self.misses += 1
+                return None
+            os.utime(entry / META_FILE)
+            self.hits += 1
+        return entry / "outputs"
+
+    def put(self, key: str, output_dir: str, meta: Dict[str, Any] = None) -> Path:
+        """Copy output_dir into the store under key and return the entry's output directory."""
+        staging = Path(tempfile.mkdtemp(prefix=f".{key}.", dir=self.root))
+        entry = self.root / key
+        try:
+            shutil.copytree(output_dir, staging / "outputs")
+            meta = dict(meta or {}, key=key, created=time.time(), size=_dir_size(staging))
+            (staging / META_FILE).write_text(json.dumps(meta))
+            with self._lock:
+                shutil.rmtree(entry, ignore_errors=True)
+                os.replace(staging, entry)
+                self._evict(keep=key)
+        except BaseException:
+            # _evict skips dot-entries, so a half-written staging dir would never be reclaimed
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return entry / "outputs"
+
+    def restore(self, key: str, dest_dir: str) -> Optional[Path]:
+        """
+        Replace dest_dir with the cached outputs for key; None on a miss.
+        Files already in dest_dir (e.g. diagrams from another commit) are
+        removed, so the result holds exactly what was cached.
+        """
+        cached = self.get(key)
+        if cached is None:
+            return None
+        dest = Path(dest_dir)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".{dest.name}.", dir=dest.parent))
+        try:
+            shutil.copytree(cached, staging / "outputs")
+            shutil.rmtree(dest, ignore_errors=True)
+            os.replace(staging / "outputs", dest)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return dest
+
+    def _evict(self, keep: str = None):
+        # called with the lock held
+        entries = []
+        now = time.time()
+        for entry in self.root.iterdir():
+            if entry.name.startswith("."):
+                continue
+            meta = self._meta(entry)
+            if meta is None or now - meta["created"] > self.ttl:
+                shutil.rmtree(entry, ignore_errors=True)
+                continue
+            entries.append((os.stat(entry / META_FILE).st_mtime, entry, meta.get("size", 0)))
+
+        total = sum(size for _, _, size in entries)
+        for _, entry, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if entry.name == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
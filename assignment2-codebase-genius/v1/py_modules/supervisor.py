@@ -1,17 +1,100 @@
+import os
 import shutil
 from pathlib import Path
+from git import Repo
 
 # Bring in the existing helpers
-from .git_utils import clone_repo
+from .git_utils import clone_repo, resolve_head
 from .repo_mapper import map_repo
+from .parser_utils import module_name
 from .ccg import build_ccg
-from .parser_utils import parse_file
+from .parse_store import ParseStore
+from .parse_cache import ParseCache
+from .parallel_parse import DEFAULT_TIMEOUT
+from .ccg_format import write_ccg
+from .repo_source import FilesystemSource, GitTreeSource
+from .result_cache import ResultCache, result_key, config_hash, PIPELINE_VERSION
+from .llm_batch import LLMBatcher
+from .tracing import Tracer, hit_rate
+from .target_selection import score_files, parse_within_budget, DEFAULT_MAX_FILES, DEFAULT_TIME_BUDGET
 from . import docgenie as docgenie_mod
 
-def generate_docs(repo_url: str, outputs_dir: str = "./outputs"):
+def _open_parse_cache():
+    try:
+        return ParseCache.default()
+    except Exception:
+        # the cache is an optimisation; never fail a job because of it
+        return None
+
+
+def _open_result_cache():
+    try:
+        return ResultCache.default()
+    except Exception:
+        return None
+
+
+def _head_sha(local_path, source):
+    """Commit the pipeline actually ran on, or None if it cannot be told."""
+    try:
+        if isinstance(source, GitTreeSource):
+            return source.repo.rev_parse(source.rev).hexsha
+        return Repo(local_path).head.commit.hexsha
+    except Exception:
+        return None
+
+
+def _cached_result(result_cache, key, repo_url, outputs_dir, commit):
+    repo_dir = Path(outputs_dir) / repo_url.split('/')[-1]
+    if result_cache.restore(key, str(repo_dir)) is None:
+        return None
+    result = {"success": True, "cached": True, "commit": commit,
+              "docs_path": str(repo_dir / "docs.md"), "result_cache": result_cache.stats()}
+    if (repo_dir / "ccg.bin").exists():
+        result["ccg_path"] = str(repo_dir / "ccg.bin")
+    return result
+
+
+def generate_docs(repo_url: str, outputs_dir: str = "./outputs", parse_cache: ParseCache = None,
+                  parse_workers: int = None, parse_timeout: float = DEFAULT_TIMEOUT,
+                  sparse_clone: bool = False, checkout: bool = True,
+                  result_cache: ResultCache = None, refresh: bool = False, llm: LLMBatcher = None,
+                  trace_path: str = None, chrome_trace_path: str = None,
+                  max_files: int = DEFAULT_MAX_FILES, time_budget: float = DEFAULT_TIME_BUDGET):
     """High-level wrapper to run the full pipeline and return a result dict or docs path.
 
     This function is intended to be called from Jac via py_module.supervisor.generate_docs(repo_url).
+    Every source file is ranked by target_selection.score_files (entry
+    points, import fan-in, path heuristics, size) and files are parsed in
+    that order until max_files are done or time_budget seconds of parsing
+    have passed (None disables either limit); what was selected is
+    returned under "targets".
+    Parse results are cached on disk across runs (see ParseCache); pass
+    parse_cache to use a specific cache. Hit/miss counts are returned under
+    "parse_cache". parse_workers and parse_timeout (seconds per file)
+    configure the parallel parse stage; files that fail or time out are
+    listed under "parse_errors". sparse_clone=True fetches only the files
+    the pipeline reads (see git_utils.sparse_clone); the clone size is
+    returned under "bytes_transferred". checkout=False skips the working
+    copy and reads files straight from the cached mirror's object database
+    (see repo_source.GitTreeSource).
+
+    Finished outputs are stored in a ResultCache keyed by the repository's
+    HEAD commit (resolved with `git ls-remote`), the pipeline version and
+    the options that affect the output. When nothing changed, the cached
+    docs.md, diagrams and ccg.bin are copied to outputs_dir and returned
+    with "cached": True, without cloning. refresh=True always recomputes.
+
+    llm (an llm_batch.LLMBatcher) enables model-written module summaries
+    and section rewrites, issued concurrently; its call counts are returned
+    under "llm".
+
+    Every stage runs inside a tracing span (wall and CPU time, peak RSS,
+    file/byte counts, cache hit rates). The spans are returned under
+    "trace", a per-stage breakdown under "stages", and the spans are
+    appended as JSON lines to trace_path (default CODEGENIUS_TRACE_FILE or
+    outputs_dir/traces.jsonl). chrome_trace_path also writes them in Chrome
+    trace-event format.
     """
     # Validate input
     if not repo_url or not isinstance(repo_url, str):
@@ -21,28 +104,70 @@ def generate_docs(repo_url: str, outputs_dir: str = "./outputs"):
     if not (repo_url.startswith("https://github.com/") or repo_url.startswith("http://github.com/")):
         return {"success": False, "error": "Only GitHub repository URLs are supported"}
 
-    clone_result = clone_repo(repo_url)
+    tracer = Tracer(trace_id=repo_url)
+    result = _run_pipeline(tracer, repo_url, outputs_dir, parse_cache, parse_workers, parse_timeout,
+                           sparse_clone, checkout, result_cache, refresh, llm, max_files, time_budget)
+    result["trace"] = tracer.to_dicts()
+    result["stages"] = tracer.summary()
+    try:
+        tracer.write_jsonl(trace_path or os.environ.get("CODEGENIUS_TRACE_FILE") or str(Path(outputs_dir) / "traces.jsonl"))
+        if chrome_trace_path:
+            tracer.write_chrome_trace(chrome_trace_path)
+            result["chrome_trace_path"] = chrome_trace_path
+    except OSError:
+        pass
+    return result
+
+
+def _run_pipeline(tracer, repo_url, outputs_dir, parse_cache, parse_workers, parse_timeout,
+                  sparse_clone, checkout, result_cache, refresh, llm, max_files, time_budget):
+    cache_key = commit = None
+    # a cache opened here is closed here; a caller's cache is left open for reuse
+    own_parse_cache = parse_cache is None
+    if result_cache is None:
+        result_cache = _open_result_cache()
+    if result_cache is not None:
+        with tracer.span("result_cache") as span:
+            head = resolve_head(repo_url)
+            if head["success"]:
+                commit = head["sha"]
+                # time_budget is left out: results cut short by it are not stored
+                config = {"sparse_clone": sparse_clone, "llm": llm.model_name if llm else None, "max_files": max_files}
+                cache_key = result_key(repo_url, commit, PIPELINE_VERSION, config_hash(config))
+                if not refresh:
+                    cached = _cached_result(result_cache, cache_key, repo_url, outputs_dir, commit)
+                    span.set(hit=bool(cached))
+                    if cached:
+                        return cached
+
+    with tracer.span("clone", sparse=sparse_clone, checkout=checkout) as span:
+        clone_result = clone_repo(repo_url, sparse=sparse_clone, checkout=checkout)
+        span.set(bytes=clone_result.get("bytes_transferred"))
     if not clone_result.get("success"):
         return {"success": False, "error": f"Failed to clone repository: {clone_result.get('error')}"}
 
     local_path = clone_result.get("path")
+    source = clone_result.get("source") or FilesystemSource(local_path)
     try:
-        repo_map = map_repo(local_path)
+        with tracer.span("map_repo") as span:
+            repo_map = map_repo(source)
+            files = repo_map.get("files") or {}
+            span.set(files=len(files), bytes=sum(f["size"] for f in files.values()))
         if not repo_map.get('readme_summary') and not repo_map.get('entry_points'):
             return {"success": False, "error": "Repository appears to be empty or inaccessible"}
 
-        targets = repo_map.get("entry_points") or []
-        if not targets:
-            # Fallback: a small set of Python/Jac files
-            all_files = list(Path(local_path).rglob("*.py")) + list(Path(local_path).rglob("*.jac"))
-            targets = [str(p) for p in all_files[:10]]
+        # Rank every source file, then parse in priority order under the budget
+        with tracer.span("select_targets") as span:
+            ranked = score_files(source, repo_map.get("files") or {}, repo_map.get("entry_points") or [])
+            span.set(candidates=len(ranked))
+        targets = [r["path"] for r in ranked]
 
         if not targets:
             # Gather some diagnostics to help the UI and logs explain why there
             # were no supported source files. Return a small sample of scanned
             # files and a compact repo_map summary so callers can show useful
             # feedback to users instead of a terse message.
-            scanned_files = [str(p) for p in Path(local_path).rglob("*") if p.is_file()]
+            scanned_files = [source.path(f) for f in repo_map.get("files") or {}]
             scanned_sample = scanned_files[:50]
             repo_map_summary = {
                 "readme_summary_present": bool(repo_map.get("readme_summary")),
@@ -57,12 +182,29 @@ def generate_docs(repo_url: str, outputs_dir: str = "./outputs"):
                 "repo_map_summary": repo_map_summary,
             }
 
-        ccg = build_ccg(targets)
+        # One read and one parse per file, shared by every stage below
+        if parse_cache is None:
+            parse_cache = _open_parse_cache()
+        store = ParseStore(cache=parse_cache, repo_source=source)
+        with tracer.span("parse", candidates=len(targets), max_files=max_files, time_budget=time_budget) as span:
+            hits0, misses0 = (parse_cache.hits, parse_cache.misses) if parse_cache is not None else (0, 0)
+            selection = parse_within_budget(store, targets, max_files=max_files, time_budget=time_budget,
+                                            workers=parse_workers, timeout=parse_timeout)
+            targets = selection["targets"]
+            span.set(files=len(targets), stopped=selection["stopped"], reads=store.reads, parses=store.parses,
+                     errors=len(store.errors))
+            if parse_cache is not None:
+                hits, misses = parse_cache.hits - hits0, parse_cache.misses - misses0
+                span.set(cache_hits=hits, cache_misses=misses, cache_hit_rate=hit_rate(hits, misses))
+        with tracer.span("build_ccg") as span:
+            # every file is already in the store, so this is indexing and linking only
+            ccg = build_ccg(targets, store=store, workers=parse_workers, timeout=parse_timeout)
+            span.set(nodes=ccg.graph.number_of_nodes(), edges=ccg.graph.number_of_edges())
 
         symbols = []
         for t in targets:
             try:
-                parsed = parse_file(t)
+                parsed = store.parse(t)
                 symbols.extend(parsed.get("symbols", []))
             except Exception as e:
                 # Continue with other files if one fails
@@ -71,13 +213,53 @@ def generate_docs(repo_url: str, outputs_dir: str = "./outputs"):
         if not symbols:
             return {"success": False, "error": "Failed to parse any source files"}
 
-        docs_path = docgenie_mod.generate_docs(repo_url, repo_map, ccg, symbols, targets, outputs_dir)
-        return {"success": True, "docs_path": docs_path}
+        # a batcher may be shared between jobs, so count only this run's failures
+        llm_errors = llm.errors if llm is not None else 0
+        with tracer.span("docgenie"):
+            docs_path = docgenie_mod.generate_docs(repo_url, repo_map, ccg, symbols, targets, outputs_dir,
+                                                   store, llm, tracer=tracer,
+                                                   module_paths={module_name(t): source.relpath(t) for t in targets})
+        result = {"success": True, "docs_path": docs_path,
+                  "bytes_transferred": clone_result.get("bytes_transferred"),
+                  "targets": {"selected": len(targets), "candidates": len(ranked),
+                              "stopped": selection["stopped"], "top": targets[:20]}}
+        if llm is not None:
+            result["llm"] = llm.stats()
+        try:
+            # compact binary graph next to the docs; ccg_format.read_ccg
+            # reloads it without re-parsing the repository
+            ccg_path = Path(docs_path).parent / "ccg.bin"
+            with tracer.span("write_ccg") as span:
+                span.set(bytes=write_ccg(ccg, str(ccg_path)))
+            result["ccg_path"] = str(ccg_path)
+        except Exception:
+            pass
+        llm_failed = llm is not None and llm.errors > llm_errors
+        if (cache_key and selection["stopped"] != "time_budget" and not llm_failed
+                and _head_sha(local_path, source) == commit):
+            # only cache complete results built from the commit the key names; docs
+            # where the model failed hold template fallbacks and would stick for the TTL
+            try:
+                with tracer.span("result_cache_store"):
+                    result_cache.put(cache_key, str(Path(docs_path).parent),
+                                     {"repo_url": repo_url, "commit": commit, "pipeline_version": PIPELINE_VERSION})
+                result["commit"] = commit
+            except Exception:
+                pass
+        if parse_cache is not None:
+            result["parse_cache"] = parse_cache.stats()
+        if store.errors:
+            result["parse_errors"] = store.errors
+        return result
     except Exception as e:
         return {"success": False, "error": f"Documentation generation failed: {str(e)}"}
     finally:
         # best-effort cleanup
-        try:
-            shutil.rmtree(local_path)
-        except Exception:
-            pass
+        source.close()
+        if own_parse_cache and parse_cache is not None:
+            parse_cache.close()
+        if local_path:
+            try:
+                shutil.rmtree(local_path)
+            except Exception:
+                pass
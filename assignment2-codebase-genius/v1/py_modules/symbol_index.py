@@ -0,0 +1,162 @@
+from pathlib import PurePosixPath
+from typing import Dict, Iterator, List, Optional, Tuple
+
+Edge = Tuple[str, str, str]
+
+
+def module_dotted_names(module: str) -> List[str]:
+    """
+    Dotted import paths under which a module label may be imported.
+
+    'pkg/sub/util.py' -> ['pkg.sub.util', 'sub.util', 'util']; a package's
+    '__init__.py' is importable under the package name. Every suffix is
+    returned because labels are relative to an arbitrary ancestor directory.
+    """
+    parts = list(PurePosixPath(module.replace('\\', '/')).with_suffix('').parts)
+    if parts and parts[-1] == '__init__':
+        parts.pop()
+    return ['.'.join(parts[i:]) for i in range(len(parts))]
+
+
+class SymbolIndex:
+    """
+    Hash indexes for resolving call targets, base classes and imports
+    across modules.
+
+    - symbols: (module label, name) -> node id
+    - modules: dotted import path (and each suffix) -> module labels
+    - aliases: module label -> local name -> dotted import target
+    - star_imports: module label -> dotted modules imported with '*'
+
+    Every lookup is a constant number of dict probes, so resolving all
+    calls stays linear in the number of calls.
+    """
+
+    def __init__(self):
+        self.symbols: Dict[Tuple[str, str], str] = {}
+        self.modules: Dict[str, List[str]] = {}
+        self.aliases: Dict[str, Dict[str, str]] = {}
+        self.star_imports: Dict[str, List[str]] = {}
+        self._module_symbols: Dict[str, List[str]] = {}
+
+    def add_module(self, module: str):
+        if module in self._module_symbols:
+            return
+        self._module_symbols[module] = []
+        for dotted in module_dotted_names(module):
+            self.modules.setdefault(dotted, []).append(module)
+
+    def add_symbol(self, sym: Dict, node_id: str):
+        self.add_module(sym['module'])
+        self.symbols[(sym['module'], sym['name'])] = node_id
+        self._module_symbols[sym['module']].append(sym['name'])
+
+    def remove_module(self, module: str):
+        """Forget everything indexed for module (used by incremental updates)."""
+        for name in self._module_symbols.pop(module, ()):
+            self.symbols.pop((module, name), None)
+        for dotted in module_dotted_names(module):
+            labels = self.modules.get(dotted)
+            if labels and module in labels:
+                labels.remove(module)
+                if not labels:
+                    del self.modules[dotted]
+        self.aliases.pop(module, None)
+        self.star_imports.pop(module, None)
+
+    def add_imports(self, imports: List[Dict]):
+        for imp in imports:
+            module, name = imp['module'], imp['name']
+            if name.endswith('.*'):
+                self.star_imports.setdefault(module, []).append(name[:-2])
+            else:
+                local = imp.get('as') or name.rsplit('.', 1)[-1]
+                self.aliases.setdefault(module, {})[local] = name
+
+    def _match(self, dotted: str) -> Tuple[List[str], int]:
+        # labels keep only the last directories of a path, so 'pkg.sub.util'
+        # is registered as 'sub.util' and 'util': drop leading components
+        # until a match, and report how many components matched
+        parts = dotted.split('.') if dotted else []
+        for i in range(len(parts)):
+            labels = self.modules.get('.'.join(parts[i:]))
+            if labels:
+                return labels, len(parts) - i
+        return [], 0
+
+    def module_labels(self, dotted: str) -> List[str]:
+        """Module labels matching the longest trailing part of a dotted module path."""
+        return self._match(dotted)[0]
+
+    def lookup_dotted(self, dotted: str) -> Optional[str]:
+        """
+        Node id for a fully dotted 'module.path.Symbol', if defined in the
+        repo by exactly one of the modules the path matches.
+        """
+        mod, _, name = dotted.rpartition('.')
+        found = [self.symbols[(label, name)] for label in self.module_labels(mod) if (label, name) in self.symbols]
+        return found[0] if len(found) == 1 else None
+
+    def resolve(self, module: str, name: str) -> Optional[str]:
+        """
+        Resolve a name used in module to a symbol node id: first a local
+        definition, then the module's imports (aliases, then star imports).
+        Dotted names such as 'mod.Base' resolve through the alias of 'mod'.
+        """
+        node_id = self.symbols.get((module, name))
+        if node_id:
+            return node_id
+
+        head, _, rest = name.partition('.')
+        target = self.aliases.get(module, {}).get(head)
+        if target:
+            node_id = self.lookup_dotted(f"{target}.{rest}" if rest else target)
+            if node_id:
+                return node_id
+
+        if not rest:
+            for star in self.star_imports.get(module, ()):
+                for label in self.module_labels(star):
+                    node_id = self.symbols.get((label, name))
+                    if node_id:
+                        return node_id
+        return None
+
+    def resolve_module(self, dotted: str) -> Optional[str]:
+        """
+        Module label for an import target: the module itself, or the module
+        that defines the imported name ('pkg.util.helper' -> 'pkg/util.py').
+        None when the target matches several modules equally well.
+        """
+        labels, matched = self._match(dotted)
+        parent_labels, parent_matched = self._match(dotted.rpartition('.')[0])
+        if parent_matched > matched:
+            labels = parent_labels
+        return labels[0] if len(labels) == 1 else None
+
+    # -- edge generation shared by the CCG backends -------------------------
+
+    def call_edges(self, calls: List[Dict]) -> Iterator[Edge]:
+        for call in calls:
+            if call['caller']:
+                callee_id = self.resolve(call['module'], call['callee'])
+                if callee_id:
+                    yield f"{call['module']}::{call['caller']}", callee_id, 'calls'
+
+    def inherit_edges(self, symbols: List[Dict]) -> Iterator[Edge]:
+        for sym in symbols:
+            if sym['kind'] == 'class' and 'bases' in sym:
+                child_id = f"{sym['module']}::{sym['name']}"
+                for base in sym['bases']:
+                    base_id = self.resolve(sym['module'], base)
+                    if base_id and base_id != child_id:
+                        yield child_id, base_id, 'inherits'
+
+    def import_edges(self, imports: List[Dict]) -> Iterator[Edge]:
+        # Imports of repo modules point at that module's label (the node that
+        # owns its own import edges); external imports keep the dotted name.
+        for imp in imports:
+            name = imp['name'][:-2] if imp['name'].endswith('.*') else imp['name']
+            target = self.resolve_module(name) or imp['name']
+            if target != imp['module']:
+                yield f"{imp['module']}", target, 'imports'
@@ -0,0 +1,180 @@
+import math
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    from .parser_utils import PARSERS
+    from .symbol_index import module_dotted_names
+    from .parallel_parse import DEFAULT_TIMEOUT, DEFAULT_SERIAL_THRESHOLD, ParsePool
+except ImportError:
+    from parser_utils import PARSERS
+    from symbol_index import module_dotted_names
+    from parallel_parse import DEFAULT_TIMEOUT, DEFAULT_SERIAL_THRESHOLD, ParsePool
+
+DEFAULT_MAX_FILES = 200
+DEFAULT_TIME_BUDGET = 60.0
+DEFAULT_BATCH_SIZE = 64
+# the first batch only measures the parse rate, so keep it small
+PROBE_BATCH_SIZE = 16
+# imports sit at the top of a module; the scan never reads further
+IMPORT_SCAN_BYTES = 64 * 1024
+
+IMPORT_PATTERN = re.compile(
+    r'^[ \t]*(?:from[ \t]+(?P<from>\.*[\w.]*)[ \t]+import[ \t]+(?:\((?P<wrapped>[^)]*)\)|(?P<names>[\w.*, \t]+))'
+    r'|import[ \t]+(?P<modules>[\w., \t]+))',
+    re.MULTILINE,
+)
+
+# Path heuristics: (directory or file name, score adjustment)
+LOW_VALUE_DIRS = {'tests': -4.0, 'test': -4.0, 'testing': -3.0, 'examples': -2.5, 'example': -2.5,
+                  'docs': -3.0, 'doc': -3.0, 'scripts': -1.5, 'benchmarks': -2.5, 'migrations': -3.0,
+                  'vendor': -5.0, 'third_party': -5.0, 'fixtures': -4.0}
+LOW_VALUE_FILES = {'setup.py': -1.0, 'conftest.py': -4.0, '__main__.py': 1.0, 'version.py': -2.0, '_version.py': -2.0}
+HIGH_VALUE_NAMES = {'core': 1.0, 'api': 1.0, 'main': 1.0, 'app': 1.0, 'cli': 0.5, 'models': 0.5}
+
+
+def scan_imports(source: str) -> List[str]:
+    """
+    Dotted names a module imports, from a regex scan of its header.
+    'from a.b import c, d' yields 'a.b', 'a.b.c' and 'a.b.d' (c may be a
+    submodule); relative imports keep their leading dots.
+    """
+    found = []
+    for match in IMPORT_PATTERN.finditer(source[:IMPORT_SCAN_BYTES]):
+        if match.group('from') is not None:
+            base = match.group('from')
+            found.append(base)
+            names = match.group('wrapped') or match.group('names') or ''
+            for name in names.replace('\n', ',').split(','):
+                name = name.split(' as ')[0].strip()
+                if name and name != '*':
+                    found.append(base + name if base.endswith('.') else f"{base}.{name}")
+        else:
+            for name in match.group('modules').split(','):
+                name = name.split(' as ')[0].strip()
+                if name:
+                    found.append(name)
+    return [name for name in found if name.strip('.')]
+
+
+def _resolve_relative(name: str, rel_path: str) -> str:
+    # '.util' in pkg/sub/mod.py -> 'pkg.sub.util'
+    dots = len(name) - len(name.lstrip('.'))
+    parts = rel_path.split('/')[:-1]
+    if dots > 1:
+        parts = parts[:len(parts) - (dots - 1)]
+    rest = name[dots:]
+    return '.'.join(parts + ([rest] if rest else []))
+
+
+def _path_score(rel_path: str) -> float:
+    parts = rel_path.lower().split('/')
+    score = sum(LOW_VALUE_DIRS.get(d, 0.0) for d in parts[:-1])
+    name = parts[-1]
+    stem = os.path.splitext(name)[0]
+    score += LOW_VALUE_FILES.get(name, 0.0) + HIGH_VALUE_NAMES.get(stem, 0.0)
+    if stem.startswith('test_') or stem.endswith('_test'):
+        score -= 4.0
+    if stem.startswith('_') and stem != '__init__' and name != '__main__.py':
+        score -= 0.5
+    # shallow modules tend to be the public surface
+    return score - 0.3 * max(len(parts) - 2, 0)
+
+
+def _size_score(size: int) -> float:
+    if size < 64:
+        return -3.0  # empty __init__.py and the like
+    # grows with size but flattens out; huge generated files gain nothing extra
+    return min(math.log2(size / 64.0), 10.0) * 0.3
+
+
+def score_files(source: 'RepoSource', files: Dict[str, Dict[str, Any]], entry_points: List[str] = ()) -> List[Dict[str, Any]]:
+    """
+    Rank every parseable file in files (repo-relative path -> {"size"}) by
+    how much it is likely to matter for the docs, cheapest signals only:
+    entry-point status, import fan-in from a regex scan of each file's
+    header, path heuristics (tests, examples, vendored code, depth) and size.
+
+    Returns [{"path", "score", "fan_in", "entry_point"}] sorted best first;
+    paths are absolute under source.root.
+    """
+    candidates = [rel for rel in files if os.path.splitext(rel)[1] in PARSERS]
+    entry = {source.relpath(p) for p in entry_points}
+
+    modules = [rel for rel in candidates if rel.endswith('.py')]
+    # full dotted paths first, so a suffix never shadows a module's own name
+    by_dotted: Dict[str, str] = {module_dotted_names(rel)[0]: rel for rel in modules if module_dotted_names(rel)}
+    for rel in modules:
+        for dotted in module_dotted_names(rel)[1:]:
+            by_dotted.setdefault(dotted, rel)
+
+    importers: Dict[str, set] = {rel: set() for rel in candidates}
+    for rel in candidates:
+        text = source.read_text(rel, limit=IMPORT_SCAN_BYTES)
+        if not text:
+            continue
+        for name in scan_imports(text):
+            if name.startswith('.'):
+                name = _resolve_relative(name, rel)
+            target = by_dotted.get(name)
+            if target and target != rel:
+                importers[target].add(rel)
+
+    ranked = []
+    for rel in candidates:
+        fan_in = len(importers[rel])
+        is_entry = rel in entry
+        # a short main.py is still where a reader starts
+        size_score = max(_size_score(files[rel].get('size', 0)), 0.0) if is_entry else _size_score(files[rel].get('size', 0))
+        score = 2.0 * math.log2(1 + fan_in) + (6.0 if is_entry else 0.0) + _path_score(rel) + size_score
+        ranked.append({'path': source.path(rel), 'score': round(score, 4), 'fan_in': fan_in, 'entry_point': is_entry})
+    ranked.sort(key=lambda r: (-r['score'], r['path']))
+    return ranked
+
+
+def parse_within_budget(store: 'ParseStore', paths: List[str], max_files: Optional[int] = DEFAULT_MAX_FILES,
+                        time_budget: Optional[float] = DEFAULT_TIME_BUDGET, workers: Optional[int] = None,
+                        timeout: Optional[float] = DEFAULT_TIMEOUT, batch_size: int = DEFAULT_BATCH_SIZE,
+                        clock=time.monotonic) -> Dict[str, Any]:
+    """
+    Parse paths in the given (priority) order into store, batch by batch,
+    until max_files files are parsed or time_budget seconds have passed.
+    Each batch is sized from the parse rate seen so far so the last one
+    should still finish inside the budget. All batches, the probe batch
+    included, run on one ParsePool (or all in-process for a selection
+    below the serial threshold), so the rate measured is the rate later
+    batches get. None disables a limit.
+
+    Returns {"targets": parsed paths in priority order, "stopped": None,
+    "max_files" or "time_budget", "elapsed"}.
+    """
+    start = clock()
+    limit = len(paths) if max_files is None else min(max_files, len(paths))
+    done: List[str] = []
+    # too few files to be worth starting workers: every batch parses in-process
+    with ParsePool(1 if limit < DEFAULT_SERIAL_THRESHOLD else workers) as pool:
+        stopped = _parse_batches(store, paths, limit, done, pool, time_budget, timeout, batch_size, clock, start)
+    if stopped is None and limit < len(paths):
+        stopped = 'max_files'
+    return {'targets': done, 'stopped': stopped, 'elapsed': clock() - start}
+
+
+def _parse_batches(store, paths, limit, done, pool, time_budget, timeout, batch_size, clock, start) -> Optional[str]:
+    per_file = None
+    while len(done) < limit:
+        size = min(batch_size if per_file else min(PROBE_BATCH_SIZE, batch_size), limit - len(done))
+        if time_budget is not None:
+            remaining = time_budget - (clock() - start)
+            if remaining <= 0 or (per_file and remaining < per_file):
+                return 'time_budget'
+            if per_file:
+                size = min(size, int(remaining / per_file))
+        batch = paths[len(done):len(done) + size]
+        batch_start = clock()
+        for _ in store.parse_many(batch, timeout=timeout, pool=pool):
+            pass
+        per_file = max((clock() - batch_start) / len(batch), 1e-6)
+        done.extend(batch)
+    return None
@@ -0,0 +1,181 @@
+# Vendored: v1 (py_modules/) and v2 (py_module/) each ship an identical copy
+# of this module. The two apps are deployed and run from their own
+# directories, where Jac and main.py import py_module.* / py_modules.*, so
+# neither can import the other's package. v1's test_tracing checks that the
+# copies have not drifted apart; change both together.
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Peak resident set size of this process so far, in KiB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KiB elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def hit_rate(hits: int, misses: int) -> Optional[float]:
+    total = hits + misses
+    return round(hits / total, 4) if total else None
+
+
+class Span:
+    """One timed stage. attrs holds counts such as files, bytes or cache hits."""
+
+    def __init__(self, name: str, span_id: int, parent_id: Optional[int], attrs: Dict[str, Any]):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.attrs = dict(attrs)
+        self.thread_id = threading.get_ident()
+        self.start = time.time()
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self.wall = None
+        self.cpu = None
+        self.peak_rss_kb = None
+        self.rss_growth_kb = None
+        self.error = None
+        self._rss0 = peak_rss_kb()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self):
+        self.wall = time.perf_counter() - self._wall0
+        self.cpu = time.process_time() - self._cpu0
+        self.peak_rss_kb = peak_rss_kb()
+        if self.peak_rss_kb is not None and self._rss0 is not None:
+            # how much this stage raised the process's high-water mark
+            self.rss_growth_kb = self.peak_rss_kb - self._rss0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'id': self.span_id,
+            'parent': self.parent_id,
+            'start': self.start,
+            'wall_s': round(self.wall, 6) if self.wall is not None else None,
+            'cpu_s': round(self.cpu, 6) if self.cpu is not None else None,
+            'peak_rss_kb': self.peak_rss_kb,
+            'rss_growth_kb': self.rss_growth_kb,
+            'error': self.error,
+            'attrs': self.attrs,
+        }
+
+
+class Tracer:
+    """
+    Collects nested spans around pipeline stages.
+
+        tracer = Tracer()
+        with tracer.span('parse', files=len(targets)) as span:
+            ...
+            span.set(cache_hits=cache.hits)
+
+    Each span records wall time, process CPU time (all threads) and the
+    process's peak RSS; nesting follows the calling thread. Spans can be
+    returned as dicts, appended to a JSON-lines file, or exported in the
+    Chrome trace-event format (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self, trace_id: str = None):
+        self.trace_id = trace_id
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._next_id = 1
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        with self._lock:
+            span = Span(name, self._next_id, stack[-1].span_id if stack else None, attrs)
+            self._next_id += 1
+            self.spans.append(span)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            stack.pop()
+            span.finish()
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [s.to_dict() for s in self.spans if s.wall is not None]
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Per-stage breakdown in start order: name, nesting depth, wall and CPU
+        seconds, and wall time as a share of all top-level stages.
+        """
+        spans = self.to_dicts()
+        depth = {}
+        for s in spans:
+            depth[s['id']] = depth[s['parent']] + 1 if s['parent'] in depth else 0
+        total = sum(s['wall_s'] for s in spans if s['parent'] is None) or 1.0
+        return [{'stage': s['name'], 'depth': depth[s['id']], 'wall_s': s['wall_s'], 'cpu_s': s['cpu_s'],
+                 'peak_rss_kb': s['peak_rss_kb'], 'share': round(s['wall_s'] / total, 4), 'attrs': s['attrs']}
+                for s in spans]
+
+    def write_jsonl(self, path: str) -> int:
+        """Append one JSON line per finished span; returns the number written."""
+        spans = self.to_dicts()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for span in spans:
+                if self.trace_id:
+                    span = dict(span, trace=self.trace_id)
+                f.write(json.dumps(span, default=str) + '\n')
+        return len(spans)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """The spans as complete ('X') trace events."""
+        pid = os.getpid()
+        events = []
+        for span in self.spans:
+            if span.wall is None:
+                continue
+            args = dict(span.attrs, cpu_s=round(span.cpu, 6))
+            if span.peak_rss_kb is not None:
+                args['peak_rss_kb'] = span.peak_rss_kb
+            if span.error:
+                args['error'] = span.error
+            events.append({
+                'name': span.name, 'cat': 'pipeline', 'ph': 'X',
+                'ts': int(span.start * 1e6), 'dur': int(span.wall * 1e6),
+                'pid': pid, 'tid': span.thread_id, 'args': args,
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+
+
+@contextmanager
+def maybe_span(tracer: Optional[Tracer], name: str, **attrs):
+    """tracer.span(...), or a detached span when tracing is off."""
+    if tracer is None:
+        span = Span(name, 0, None, attrs)
+        yield span
+        span.finish()
+    else:
+        with tracer.span(name, **attrs) as span:
+            yield span
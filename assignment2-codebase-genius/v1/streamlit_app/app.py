@@ -7,6 +7,26 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from py_modules.supervisor import generate_docs
 
+def render_stage_breakdown(result: dict):
+    """Per-stage timing table and chart from the pipeline's tracing spans."""
+    stages = result.get('stages')
+    if not stages:
+        return
+    with st.expander('⏱️ Stage breakdown'):
+        rows = [{
+            'stage': '\u2003' * s.get('depth', 0) + s['stage'],
+            'wall (s)': s['wall_s'],
+            'cpu (s)': s['cpu_s'],
+            'share': f"{s['share']:.0%}" if s.get('depth', 0) == 0 else '',
+            'peak RSS (MiB)': round(s['peak_rss_kb'] / 1024, 1) if s.get('peak_rss_kb') else None,
+            'details': ', '.join(f'{k}={v}' for k, v in (s.get('attrs') or {}).items()),
+        } for s in stages]
+        st.dataframe(rows, use_container_width=True)
+        top = [s for s in stages if s.get('depth', 0) == 0]
+        st.bar_chart({'stage': [s['stage'] for s in top], 'wall (s)': [s['wall_s'] for s in top]},
+                     x='stage', y='wall (s)')
+
+
 st.title('Agentic Codebase Genius — Documentation Generator Demo')
 
 repo_url = st.text_input('GitHub repository URL', 'https://github.com/octocat/Hello-World')
@@ -25,6 +45,7 @@ if st.button('Generate Docs'):
                     st.write(docs_content)
                 else:
                     st.write(result)
+                render_stage_breakdown(result)
             else:
                 # Show error and full diagnostics returned by supervisor for
                 # faster debugging in the UI (scanned files sample, repo_map
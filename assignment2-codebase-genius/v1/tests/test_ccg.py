@@ -1,10 +1,52 @@
 import unittest
 import sys
 import os
+import tempfile
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'py_modules'))
 
-from ccg import CodeContextGraph
+from ccg import CodeContextGraph, build_ccg, update_ccg
+from ccg_compact import CompactCodeContextGraph
+from symbol_index import module_dotted_names
+
+def _sym(name, module, kind='function', bases=None):
+    sym = {'name': name, 'kind': kind, 'signature': '', 'docstring': '', 'module': module, 'line': 1}
+    if bases is not None:
+        sym['bases'] = bases
+    return sym
+
+# main.py is listed first so resolution cannot rely on parse order
+CROSS_MODULE = [
+    {
+        'symbols': [
+            _sym('run', 'pkg/main.py'),
+            _sym('Child', 'pkg/main.py', 'class', ['Base']),
+            _sym('Other', 'pkg/main.py', 'class', ['u.Base']),
+        ],
+        'calls': [
+            {'caller': 'run', 'callee': 'h', 'module': 'pkg/main.py', 'line': 2},
+            {'caller': 'run', 'callee': 'starred', 'module': 'pkg/main.py', 'line': 3},
+            {'caller': 'run', 'callee': 'print', 'module': 'pkg/main.py', 'line': 4},
+        ],
+        'imports': [
+            {'name': 'pkg.util.helper', 'as': 'h', 'module': 'pkg/main.py'},
+            {'name': 'util.Base', 'as': None, 'module': 'pkg/main.py'},
+            {'name': 'pkg.util', 'as': 'u', 'module': 'pkg/main.py'},
+            {'name': 'pkg.stars.*', 'as': None, 'module': 'pkg/main.py'},
+            {'name': 'os', 'as': None, 'module': 'pkg/main.py'},
+        ],
+    },
+    {
+        'symbols': [_sym('helper', 'pkg/util.py'), _sym('Base', 'pkg/util.py', 'class', [])],
+        'calls': [],
+        'imports': [],
+    },
+    {
+        'symbols': [_sym('starred', 'pkg/stars.py')],
+        'calls': [],
+        'imports': [],
+    },
+]
 
 class TestCCG(unittest.TestCase):
 
@@ -40,6 +82,12 @@ class TestCCG(unittest.TestCase):
         ccg.graph.add_edge('caller', 'hello', type='calls')
         callers = ccg.query_functions_calling('hello')
         self.assertIn('caller', callers)
+        # only call edges count, and edits after a query are picked up
+        ccg.graph.add_edge('Child', 'hello', type='inherits')
+        ccg.graph.add_edge('other', 'hello', type='calls')
+        self.assertEqual(sorted(ccg.query_functions_calling('hello')), ['caller', 'other'])
+        self.assertEqual(ccg.query_functions_calling_many(['hello', 'caller', 'missing']),
+                         {'hello': ccg.query_functions_calling('hello'), 'caller': [], 'missing': []})
 
     def test_get_high_impact_functions(self):
         ccg = CodeContextGraph()
@@ -49,5 +97,144 @@ class TestCCG(unittest.TestCase):
         high = ccg.get_high_impact_functions()
         self.assertIn('hello', high)
 
+    def test_cross_module_resolution(self):
+        for backend in (CodeContextGraph, CompactCodeContextGraph):
+            ccg = backend()
+            ccg.build_from_parsed(CROSS_MODULE)
+            graph = ccg.graph
+            edges = {(u, v): d['type'] for u, v, d in graph.edges(data=True)}
+            self.assertEqual(edges.get(('pkg/main.py::run', 'pkg/util.py::helper')), 'calls')
+            self.assertEqual(edges.get(('pkg/main.py::run', 'pkg/stars.py::starred')), 'calls')
+            self.assertEqual(edges.get(('pkg/main.py::Child', 'pkg/util.py::Base')), 'inherits')
+            self.assertEqual(edges.get(('pkg/main.py::Other', 'pkg/util.py::Base')), 'inherits')
+            self.assertEqual(edges.get(('pkg/main.py', 'pkg/util.py')), 'imports')
+            self.assertEqual(edges.get(('pkg/main.py', 'os')), 'imports')
+            self.assertFalse(any(v.endswith('::print') for v in graph.nodes))
+            self.assertEqual(ccg.query_functions_calling('pkg/util.py::helper'), ['pkg/main.py::run'])
+
+    def test_module_dotted_names(self):
+        self.assertEqual(module_dotted_names('pkg/sub/util.py'), ['pkg.sub.util', 'sub.util', 'util'])
+        self.assertEqual(module_dotted_names('pkg/__init__.py'), ['pkg'])
+
+    def test_deep_absolute_import(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            files = {
+                'pkg/main.py': "from pkg.sub.util import helper\nimport pkg.sub.deep.mod\n\ndef run():\n    helper()\n",
+                'pkg/sub/util.py': "def helper():\n    pass\n",
+                'pkg/sub/deep/mod.py': "def f():\n    pass\n",
+                'other/util.py': "def helper():\n    pass\n",
+            }
+            for rel, source in files.items():
+                os.makedirs(os.path.dirname(os.path.join(tmp, rel)), exist_ok=True)
+                with open(os.path.join(tmp, rel), 'w') as f:
+                    f.write(source)
+            ccg = build_ccg([os.path.join(tmp, rel) for rel in files], workers=1)
+            edges = {(u, v): d['type'] for u, v, d in ccg.graph.edges(data=True)}
+            self.assertEqual(edges.get(('pkg/main.py::run', 'sub/util.py::helper')), 'calls')
+            self.assertEqual(edges.get(('pkg/main.py', 'sub/util.py')), 'imports')
+            self.assertEqual(edges.get(('pkg/main.py', 'deep/mod.py')), 'imports')
+            self.assertNotIn('pkg.sub.util.helper', ccg.graph)
+
+    def test_ambiguous_module_is_not_guessed(self):
+        ccg = CodeContextGraph()
+        ccg.build_from_parsed([
+            {'symbols': [_sym('helper', 'a/util.py')], 'calls': [], 'imports': []},
+            {'symbols': [_sym('helper', 'b/util.py')], 'calls': [], 'imports': []},
+            {'symbols': [_sym('run', 'c/main.py')], 'calls': [{'caller': 'run', 'callee': 'helper', 'module': 'c/main.py', 'line': 2}],
+             'imports': [{'name': 'util.helper', 'as': None, 'module': 'c/main.py'}]},
+        ])
+        self.assertEqual(ccg.query_functions_calling('a/util.py::helper'), [])
+        self.assertEqual(ccg.query_functions_calling('b/util.py::helper'), [])
+        self.assertFalse(ccg.graph.has_edge('c/main.py', 'a/util.py'))
+
+    def test_update_ccg(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pkg = os.path.join(tmp, 'pkg')
+            os.makedirs(pkg)
+            files = {
+                'util.py': "def helper():\n    pass\n\ndef old():\n    pass\n",
+                'main.py': "from pkg.util import helper\n\ndef run():\n    helper()\n",
+                'gone.py': "def bye():\n    pass\n",
+            }
+            for name, source in files.items():
+                with open(os.path.join(pkg, name), 'w') as f:
+                    f.write(source)
+            paths = {name: os.path.join(pkg, name) for name in files}
+            previous = build_ccg(list(paths.values()), workers=1).to_json()
+
+            with open(paths['util.py'], 'w') as f:
+                f.write("def helper():\n    return new()\n\ndef new():\n    pass\n")
+            os.remove(paths['gone.py'])
+            with open(os.path.join(pkg, 'extra.py'), 'w') as f:
+                f.write("def extra():\n    pass\n")
+
+            result = update_ccg(previous, changed=[paths['util.py']],
+                                added=[os.path.join(pkg, 'extra.py')], deleted=[paths['gone.py']])
+            graph = result['ccg'].graph
+
+            self.assertEqual(result['updated_modules'], ['pkg/extra.py', 'pkg/util.py'])
+            self.assertEqual(result['removed_modules'], ['pkg/gone.py'])
+            self.assertEqual(result['dependent_modules'], ['pkg/main.py'])
+            self.assertNotIn('pkg/util.py::old', graph)
+            self.assertNotIn('pkg/gone.py::bye', graph)
+            self.assertIn('pkg/extra.py::extra', graph)
+            self.assertTrue(graph.has_edge('pkg/util.py::helper', 'pkg/util.py::new'))
+            # edges from the untouched module survive the splice
+            self.assertTrue(graph.has_edge('pkg/main.py::run', 'pkg/util.py::helper'))
+            self.assertTrue(graph.has_edge('pkg/main.py', 'pkg/util.py'))
+
+            rebuilt = build_ccg([paths['util.py'], paths['main.py'], os.path.join(pkg, 'extra.py')], workers=1)
+            self.assertEqual(set(graph.edges), set(rebuilt.graph.edges))
+            self.assertEqual(set(graph.nodes), set(rebuilt.graph.nodes))
+
+    def test_update_ccg_matches_rebuild(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            files = {
+                'a.py': "def other():\n    pass\n",
+                'b.py': "from proj.a import foo\nimport proj.c\n\ndef run():\n    foo()\n",
+                'util.py': "def helper():\n    pass\n",
+                'd.py': "from util import helper\n\ndef go():\n    helper()\n",
+            }
+            paths = {}
+            for name, source in files.items():
+                paths[name] = os.path.join(tmp, 'proj', name)
+                os.makedirs(os.path.dirname(paths[name]), exist_ok=True)
+                with open(paths[name], 'w') as f:
+                    f.write(source)
+            previous = build_ccg(list(paths.values()), workers=1).to_json()
+
+            with open(paths['a.py'], 'w') as f:
+                f.write("def other():\n    pass\n\ndef foo():\n    pass\n")
+            # b.py imports proj.c, which did not exist; a second util.py makes d.py's import ambiguous
+            paths['c.py'] = os.path.join(tmp, 'proj', 'c.py')
+            paths['util2'] = os.path.join(tmp, 'lib', 'util.py')
+            os.makedirs(os.path.dirname(paths['util2']))
+            for added in ('c.py', 'util2'):
+                with open(paths[added], 'w') as f:
+                    f.write("def helper():\n    pass\n")
+
+            result = update_ccg(previous, changed=[paths['a.py']], added=[paths['c.py'], paths['util2']],
+                                sources=list(paths.values()))
+            rebuilt = build_ccg(list(paths.values()), workers=1)
+            self.assertEqual(result['dependent_modules'], ['proj/b.py', 'proj/d.py'])
+            self.assertEqual(set(result['ccg'].graph.edges(data='type')), set(rebuilt.graph.edges(data='type')))
+            self.assertEqual(set(result['ccg'].graph.nodes), set(rebuilt.graph.nodes))
+            self.assertTrue(rebuilt.graph.has_edge('proj/b.py::run', 'proj/a.py::foo'))
+
+    def test_queries_see_in_place_updates(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'proj', 'a.py')
+            os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                f.write("def foo():\n    pass\n\ndef bar():\n    pass\n\ndef run():\n    foo()\n")
+            ccg = build_ccg([path], workers=1)
+            self.assertEqual(ccg.query_functions_calling('proj/a.py::foo'), ['proj/a.py::run'])
+
+            with open(path, 'w') as f:
+                f.write("def foo():\n    pass\n\ndef bar():\n    pass\n\ndef run():\n    bar()\n")
+            update_ccg(ccg, changed=[path])
+            self.assertEqual(ccg.query_functions_calling('proj/a.py::foo'), [])
+            self.assertEqual(ccg.query_functions_calling('proj/a.py::bar'), ['proj/a.py::run'])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,63 @@
+import unittest
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'py_modules'))
+
+from ccg import CodeContextGraph
+from ccg_compact import CompactCodeContextGraph
+
+SYMBOLS = [
+    {'name': 'hello', 'kind': 'function', 'signature': 'def hello()', 'docstring': '', 'module': 'test.py', 'line': 1},
+    {'name': 'Base', 'kind': 'class', 'signature': 'class Base()', 'docstring': 'Base.', 'module': 'test.py', 'line': 3, 'bases': []},
+    {'name': 'Greeter', 'kind': 'class', 'signature': 'class Greeter(Base)', 'docstring': '', 'module': 'test.py', 'line': 5, 'bases': ['Base'], 'decorators': ['dataclass']},
+    {'name': 'greet', 'kind': 'function', 'signature': 'def greet()', 'docstring': '', 'module': 'test.py', 'line': 7},
+    {'name': 'wave', 'kind': 'function', 'signature': 'def wave()', 'docstring': '', 'module': 'test.py', 'line': 9},
+]
+PARSED = [{
+    'symbols': SYMBOLS,
+    'calls': [
+        {'caller': 'greet', 'callee': 'hello', 'module': 'test.py', 'line': 8},
+        {'caller': 'wave', 'callee': 'hello', 'module': 'test.py', 'line': 10},
+        {'caller': 'wave', 'callee': 'hello', 'module': 'test.py', 'line': 11},
+        {'caller': 'wave', 'callee': 'greet', 'module': 'test.py', 'line': 12},
+    ],
+    'imports': [{'name': 'os', 'as': None, 'module': 'test.py'}],
+}]
+
+class TestCompactCCG(unittest.TestCase):
+
+    def setUp(self):
+        self.reference = CodeContextGraph()
+        self.reference.build_from_parsed(PARSED)
+        self.compact = CompactCodeContextGraph()
+        self.compact.build_from_parsed(PARSED)
+
+    def test_queries_match_networkx_backend(self):
+        self.assertEqual(sorted(self.compact.query_functions_calling('test.py::hello')),
+                         sorted(self.reference.query_functions_calling('test.py::hello')))
+        self.assertEqual(self.compact.get_high_impact_functions(), self.reference.get_high_impact_functions())
+        self.assertEqual(self.compact.query_functions_calling('missing'), [])
+        names = ['test.py::hello', 'test.py::greet', 'missing']
+        self.assertEqual({k: sorted(v) for k, v in self.compact.query_functions_calling_many(names).items()},
+                         {k: sorted(v) for k, v in self.reference.query_functions_calling_many(names).items()})
+
+    def test_to_json_matches_networkx_backend(self):
+        def normalise(text):
+            data = json.loads(text)
+            nodes = sorted(data['nodes'], key=lambda n: n['id'])
+            edges = sorted(data['edges'], key=lambda e: (e['source'], e['target']))
+            return nodes, edges
+        self.assertEqual(normalise(self.compact.to_json()), normalise(self.reference.to_json()))
+
+    def test_networkx_view(self):
+        graph = self.compact.graph
+        self.assertTrue(graph.has_edge('test.py::Greeter', 'test.py::Base'))
+        self.assertEqual(graph.edges['test.py::greet', 'test.py::hello']['type'], 'calls')
+        self.assertEqual(graph.nodes['test.py::Greeter']['decorators'], ['dataclass'])
+        self.compact.add_edge('test.py::hello', 'test.py::wave', 'calls')
+        self.assertTrue(self.compact.graph.has_edge('test.py::hello', 'test.py::wave'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+import io
+import json
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'py_modules'))
+
+from ccg import CodeContextGraph
+from ccg_compact import CompactCodeContextGraph
+from ccg_format import write_ccg, read_ccg, write_ndjson, read_ndjson
+from test_ccg import CROSS_MODULE
+
+def _snapshot(ccg):
+    data = json.loads(ccg.to_json())
+    nodes = {n['id']: n for n in data['nodes']}
+    edges = {(e['source'], e['target'], e['type']) for e in data['edges']}
+    return nodes, edges
+
+class TestCCGFormat(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'ccg.bin')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_binary_round_trip(self):
+        for backend in (CodeContextGraph, CompactCodeContextGraph):
+            ccg = backend()
+            ccg.build_from_parsed(CROSS_MODULE)
+            self.assertGreater(write_ccg(ccg, self.path), 0)
+            loaded = read_ccg(self.path)
+            self.assertIsInstance(loaded, CompactCodeContextGraph)
+            self.assertEqual(_snapshot(loaded), _snapshot(ccg))
+            self.assertEqual(loaded.node_attrs('pkg/main.py::Child')['bases'], ['Base'])
+            self.assertEqual(loaded.query_functions_calling('pkg/util.py::helper'), ['pkg/main.py::run'])
+            # the symbol index is rebuilt, so new edges still resolve
+            self.assertEqual(loaded.index.resolve('pkg/util.py', 'helper'), 'pkg/util.py::helper')
+
+    def test_binary_strings_with_nul(self):
+        ccg = CodeContextGraph()
+        ccg.add_symbols([{'name': 'f', 'kind': 'function', 'signature': 'def f()',
+                          'docstring': 'a\0b', 'module': 'm.py', 'line': 1}])
+        write_ccg(ccg, self.path)
+        self.assertEqual(read_ccg(self.path).node_attrs('m.py::f')['docstring'], 'a\0b')
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'{"nodes": [], "edges": []}')
+        with self.assertRaises(ValueError):
+            read_ccg(self.path)
+
+    def test_ndjson_round_trip(self):
+        ccg = CodeContextGraph()
+        ccg.build_from_parsed(CROSS_MODULE)
+        out = io.StringIO()
+        lines = write_ndjson(ccg, out)
+        self.assertEqual(lines, 1 + ccg.graph.number_of_nodes() + ccg.graph.number_of_edges())
+        for backend in ('networkx', 'compact'):
+            loaded = read_ndjson(io.StringIO(out.getvalue()), backend=backend)
+            self.assertEqual(_snapshot(loaded), _snapshot(ccg))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+import unittest
+import sys
+import os
+import subprocess
+import tempfile
+import threading
+import unittest.mock
+
+from git import GitCommandError
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'py_modules'))
+
+from git_utils import diff_name_status, MirrorCache, clone_repo, sparse_clone, sparse_patterns, resolve_head
+
+def _git(repo, *args):
+    subprocess.run(['git', '-C', repo, '-c', 'user.name=t', '-c', 'user.email=t@t', *args],
+                   check=True, capture_output=True)
+
+def _write(repo, name, text):
+    with open(os.path.join(repo, name), 'w') as f:
+        f.write(text)
+
+def _make_repo(path, files):
+    os.makedirs(path)
+    _git(path, 'init', '-q')
+    _commit(path, files)
+    return 'file://' + path
+
+def _commit(repo, files):
+    for name, text in files.items():
+        _write(repo, name, text)
+    _git(repo, 'add', '-A')
+    _git(repo, 'commit', '-q', '-m', 'update')
+
+class TestMirrorCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'mirrors')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_checkout_reuses_and_fetches_mirror(self):
+        src = os.path.join(self.tmp.name, 'src')
+        url = _make_repo(src, {'main.py': 'print(1)\n'})
+        cache = MirrorCache(self.root)
+
+        first = cache.checkout(url, os.path.join(self.tmp.name, 'one'))
+        self.assertTrue(os.path.exists(os.path.join(first, 'main.py')))
+        self.assertTrue(cache.mirror_path(url).exists())
+
+        _commit(src, {'extra.py': 'x = 1\n'})
+        second = cache.checkout(url, os.path.join(self.tmp.name, 'two'))
+        self.assertTrue(os.path.exists(os.path.join(second, 'extra.py')))
+        self.assertEqual(len(cache.entries()), 1)
+        # the working copy owns its objects rather than borrowing the mirror's
+        alternates = os.path.join(second, '.git', 'objects', 'info', 'alternates')
+        self.assertFalse(os.path.exists(alternates))
+
+    def test_evicts_least_recently_used(self):
+        urls = [_make_repo(os.path.join(self.tmp.name, name), {'a.py': name}) for name in ('r1', 'r2')]
+        cache = MirrorCache(self.root, max_bytes=1)
+        first = cache.checkout(urls[0], os.path.join(self.tmp.name, 'c1'))
+        cache.checkout(urls[1], os.path.join(self.tmp.name, 'c2'))
+        self.assertFalse(cache.mirror_path(urls[0]).exists())
+        self.assertTrue(cache.mirror_path(urls[1]).exists())
+        # a checkout outlives its evicted mirror
+        _git(first, 'fsck', '--no-progress')
+        _git(first, 'log', '-p')
+
+    def test_failed_clone_removes_temp_dir(self):
+        cache = MirrorCache(self.root)
+        temp = os.path.join(self.tmp.name, 'temp')
+        os.makedirs(temp)
+        url = _make_repo(os.path.join(self.tmp.name, 'src'), {'a.py': 'a'})
+        cache.update(url)
+        with unittest.mock.patch('tempfile.tempdir', temp):
+            with unittest.mock.patch('git_utils.Repo.clone_from', side_effect=GitCommandError('clone', 128)):
+                with self.assertRaises(GitCommandError):
+                    cache.checkout(url)
+            with unittest.mock.patch.object(MirrorCache, 'checkout', side_effect=GitCommandError('clone', 128)):
+                result = clone_repo('https://github.com/o/r', mirrors=cache)
+        self.assertFalse(result['success'])
+        self.assertEqual(os.listdir(temp), [])
+
+    def test_concurrent_checkouts(self):
+        url = _make_repo(os.path.join(self.tmp.name, 'src'), {'main.py': 'print(1)\n'})
+        cache = MirrorCache(self.root)
+        errors = []
+
+        def work(i):
+            try:
+                cache.checkout(url, os.path.join(self.tmp.name, f'c{i}'))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        for i in range(4):
+            self.assertTrue(os.path.exists(os.path.join(self.tmp.name, f'c{i}', 'main.py')))
+
+class TestGitUtils(unittest.TestCase):
+
+    def test_sparse_clone(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, 'src')
+            url = _make_repo(src, {'main.py': 'print(1)\n', 'README.md': '# Demo\n', 'pyproject.toml': ''})
+            os.makedirs(os.path.join(src, 'assets'))
+            with open(os.path.join(src, 'assets', 'blob.bin'), 'wb') as f:
+                f.write(os.urandom(200000))
+            _commit(src, {'lib.jac': 'walker w {}\n'})
+            _git(src, 'config', 'uploadpack.allowFilter', 'true')
+
+            dest = os.path.join(tmp, 'dest')
+            transferred = sparse_clone(url, dest)
+            self.assertEqual(sorted(f for f in os.listdir(dest) if f != '.git'),
+                             ['README.md', 'lib.jac', 'main.py', 'pyproject.toml'])
+            self.assertLess(transferred, 100000)
+
+    def test_resolve_head(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, 'src')
+            url = _make_repo(src, {'main.py': 'print(1)\n'})
+            sha = subprocess.run(['git', '-C', src, 'rev-parse', 'HEAD'], capture_output=True, text=True).stdout.strip()
+            self.assertEqual(resolve_head(url), {'success': True, 'sha': sha, 'error': None})
+            self.assertFalse(resolve_head('file://' + os.path.join(tmp, 'missing'))['success'])
+
+    def test_sparse_patterns_follow_parsers(self):
+        patterns = sparse_patterns()
+        self.assertIn('*.py', patterns)
+        self.assertIn('*.jac', patterns)
+        self.assertEqual(sparse_patterns(['.rs'])[0], '*.rs')
+
+    def test_diff_name_status(self):
+        with tempfile.TemporaryDirectory() as repo:
+            _git(repo, 'init', '-q')
+            _write(repo, 'a.py', 'a = 1\n')
+            _write(repo, 'b.py', 'b = 1\n')
+            _write(repo, 'c.py', 'def long_enough_to_detect_rename():\n    return 42\n')
+            _git(repo, 'add', '.')
+            _git(repo, 'commit', '-q', '-m', 'one')
+            _write(repo, 'a.py', 'a = 2\n')
+            os.remove(os.path.join(repo, 'b.py'))
+            os.rename(os.path.join(repo, 'c.py'), os.path.join(repo, 'd.py'))
+            _write(repo, 'e.py', 'e = 1\n')
+            _git(repo, 'add', '-A')
+            _git(repo, 'commit', '-q', '-m', 'two')
+
+            result = diff_name_status(repo, 'HEAD~1', 'HEAD')
+            self.assertTrue(result['success'])
+            self.assertEqual(result['changed'], [os.path.join(repo, 'a.py')])
+            self.assertEqual(sorted(result['added']), [os.path.join(repo, 'd.py'), os.path.join(repo, 'e.py')])
+            self.assertEqual(sorted(result['deleted']), [os.path.join(repo, 'b.py'), os.path.join(repo, 'c.py')])
+
+    def test_diff_name_status_bad_revision(self):
+        with tempfile.TemporaryDirectory() as repo:
+            _git(repo, 'init', '-q')
+            result = diff_name_status(repo, 'nope', 'HEAD')
+            self.assertFalse(result['success'])
+            self.assertIsNotNone(result['error'])
+
+if __name__ == '__main__':
+    unittest.main()
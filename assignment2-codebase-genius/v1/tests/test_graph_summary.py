@@ -0,0 +1,121 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+import networkx as nx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'py_modules'))
+
+import graph_summary
+from ccg import build_ccg
+from parser_utils import module_name
+from graph_summary import condense, layout_positions, module_of, package_graph, packages, summarize, to_dot
+
+V2_COPY = os.path.join(os.path.dirname(__file__), '..', '..', 'v2', 'agentic_codebase_genius', 'py_module',
+                       'graph_summary.py')
+
+def call_graph(packages_=3, modules=4, functions=5):
+    # a chain of calls inside each module, and from each module to the next
+    graph = nx.DiGraph()
+    names = [f"pkg{p}/mod{m}.py" for p in range(packages_) for m in range(modules)]
+    for i, module in enumerate(names):
+        for f in range(functions - 1):
+            graph.add_edge(f"{module}::f{f}", f"{module}::f{f + 1}", type='calls')
+        graph.add_edge(f"{module}::f{functions - 1}", f"{names[(i + 1) % len(names)]}::f0", type='calls')
+    graph.add_edge(f"{names[0]}::f0", 'print', type='calls')
+    return graph
+
+class TestGraphSummary(unittest.TestCase):
+
+    def test_module_of(self):
+        self.assertEqual(module_of('pkg/mod.py::Class.method'), 'pkg/mod.py')
+        self.assertEqual(module_of('pkg/mod.py'), 'pkg/mod.py')
+        self.assertIsNone(module_of('print'))
+
+    def test_condense_counts_members_and_weights_edges(self):
+        condensed = condense(call_graph(), module_of)
+        self.assertEqual(condensed.number_of_nodes(), 12)
+        self.assertEqual(condensed.nodes['pkg0/mod0.py']['size'], 5)
+        self.assertEqual(condensed['pkg0/mod0.py']['pkg0/mod1.py']['weight'], 1)
+        self.assertFalse(condensed.has_edge('pkg0/mod0.py', 'pkg0/mod0.py'))
+
+    def test_auto_takes_the_finest_level_that_fits(self):
+        graph = call_graph()
+        view, info = summarize(graph, budget=100)
+        self.assertEqual((info['level'], info['shown'], info['nodes']), ('symbol', 60, 60))
+        self.assertNotIn('print', view)
+        view, info = summarize(graph, budget=20)
+        self.assertEqual((info['level'], info['shown']), ('module', 12))
+        self.assertEqual(view.nodes['pkg1/mod0.py']['cluster'], 'pkg1')
+        view, info = summarize(graph, budget=5)
+        self.assertEqual((info['level'], info['shown'], info['truncated']), ('package', 3, False))
+        self.assertEqual(view.nodes['pkg2']['size'], 20)
+
+    def test_over_budget_keeps_most_connected(self):
+        graph = call_graph()
+        graph.add_edges_from((f"pkg0/mod0.py::f{i}", 'pkg1/mod1.py::f2') for i in range(4))
+        view, info = summarize(graph, budget=2, mode='top_k')
+        self.assertTrue(info['truncated'])
+        self.assertIn('pkg1/mod1.py::f2', view)
+        self.assertEqual(view.number_of_nodes(), 2)
+        view, info = summarize(graph, budget=2)
+        self.assertEqual((info['level'], info['shown'], info['truncated']), ('package', 2, True))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            summarize(call_graph(), mode='everything')
+
+    def test_packages(self):
+        graph = call_graph()
+        self.assertEqual(packages(graph), {'pkg0': 20, 'pkg1': 20, 'pkg2': 20})
+        part = package_graph(graph, 'pkg1')
+        self.assertEqual(part.number_of_nodes(), 20)
+        self.assertTrue(all(node.startswith('pkg1/') for node in part))
+
+    def test_packages_from_repo_paths(self):
+        # v1 ids carry grandparent-relative labels: 'pkg/a/x.py' and 'other/a/z.py'
+        # both become 'a/...', and top-level modules take the clone directory's name
+        with tempfile.TemporaryDirectory() as tmp:
+            root = os.path.join(tmp, 'repo_clone_x1')
+            files = {
+                'main.py': "from pkg.a.x import f\n\ndef run():\n    f()\n",
+                'pkg/a/x.py': "def f():\n    g()\n\ndef g():\n    pass\n",
+                'other/a/z.py': "def h():\n    pass\n\ndef k():\n    h()\n",
+            }
+            for rel, source in files.items():
+                os.makedirs(os.path.dirname(os.path.join(root, rel)), exist_ok=True)
+                with open(os.path.join(root, rel), 'w') as f:
+                    f.write(source)
+            ccg = build_ccg([os.path.join(root, rel) for rel in files], workers=1)
+        module_paths = {module_name(os.path.join(root, rel)): rel for rel in files}
+        module = lambda node: module_paths.get(module_of(node), module_of(node)) if module_of(node) else None
+
+        self.assertEqual(packages(ccg.graph, module=module), {'.': 2, 'pkg': 3, 'other': 2})
+        self.assertEqual(set(package_graph(ccg.graph, 'other', module=module)), {'a/z.py::h', 'a/z.py::k'})
+        view, info = summarize(ccg.graph, budget=3, module=module)
+        self.assertEqual((info['level'], set(view)), ('module', {'main.py', 'pkg/a/x.py', 'other/a/z.py'}))
+
+    def test_to_dot_names_nodes_and_clusters(self):
+        view, _ = summarize(call_graph(), budget=20)
+        source, names = to_dot(view, 'Call "graph"')
+        self.assertEqual(set(names.values()), set(view.nodes))
+        self.assertEqual(source.count('subgraph cluster_'), 3)
+        self.assertIn('label="Call \\"graph\\""', source)
+        self.assertNotIn('::', source)
+
+    @unittest.skipUnless(os.path.exists(V2_COPY), 'v2 app not checked out')
+    def test_v2_copy_is_identical(self):
+        with open(graph_summary.__file__, 'rb') as ours, open(V2_COPY, 'rb') as theirs:
+            self.assertEqual(ours.read(), theirs.read(), 'v1 and v2 graph_summary.py differ; change both together')
+
+    def test_layout_falls_back_without_dot(self):
+        view, _ = summarize(call_graph(), budget=20)
+        with patch.object(graph_summary, 'dot_available', return_value=False):
+            positions, engine = layout_positions(view)
+        self.assertEqual(engine, 'spring')
+        self.assertEqual(set(positions), set(view.nodes))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'py_modules'))
+
+import llm_batch
+from llm_batch import LLMBatcher, pack_modules, split_batch_response, MODULE_MARKER
+from parse_cache import ParseCache
+
+class StubModel:
+    """Local stand-in for the LLM: echoes a marker per module, records concurrency."""
+
+    def __init__(self, delay=0.0, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.prompts = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt):
+        with self._lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if self.fail_on and self.fail_on in prompt:
+                raise RuntimeError("model error")
+            modules = [line[len("Module: "):] for line in prompt.splitlines() if line.startswith("Module: ")]
+            if len(modules) > 1:
+                return "\n".join(f"{MODULE_MARKER}{m}\nAbout {m}." for m in modules)
+            if modules:
+                return f"# {modules[0]}\nAbout {modules[0]}."
+            return "REWRITTEN " + prompt.split("Original:\n", 1)[-1].split("\n\nRewritten:")[0]
+        finally:
+            with self._lock:
+                self.active -= 1
+
+def _modules(n, snippet=""):
+    return [(f"pkg/m{i}.py", [{"name": f"f{i}", "kind": "function"}], snippet) for i in range(n)]
+
+class TestLLMBatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ParseCache(os.path.join(self.tmp.name, 'llm.sqlite'))
+
+    def tearDown(self):
+        self.cache._conn.close()
+        self.tmp.cleanup()
+
+    def test_sections_run_concurrently(self):
+        model = StubModel(delay=0.2)
+        batcher = LLMBatcher(model, max_concurrency=4)
+        sections = {"Overview": "o", "Usage": "u", "API Reference": "a", "Architecture": "r"}
+        start = time.perf_counter()
+        result = batcher.rewrite_sections(sections)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(result["Usage"], "REWRITTEN u")
+        self.assertEqual(list(result), list(sections))
+        self.assertEqual(model.peak, 4)
+        self.assertLess(elapsed, 0.6)
+
+    def test_concurrency_limit(self):
+        model = StubModel(delay=0.05)
+        LLMBatcher(model, max_concurrency=2).rewrite_sections({str(i): str(i) for i in range(6)})
+        self.assertEqual(model.peak, 2)
+        self.assertEqual(len(model.prompts), 6)
+
+    def test_failed_section_keeps_original(self):
+        batcher = LLMBatcher(StubModel(fail_on="Usage"), max_concurrency=2)
+        result = batcher.rewrite_sections({"Overview": "o", "Usage": "u"})
+        self.assertEqual(result, {"Overview": "REWRITTEN o", "Usage": "u"})
+        self.assertEqual(batcher.stats()["errors"], 1)
+
+    def test_response_cache(self):
+        model = StubModel()
+        sections = {"Overview": "o", "Usage": "u"}
+        first = LLMBatcher(model, cache=self.cache).rewrite_sections(sections)
+        self.assertEqual(len(model.prompts), 2)
+
+        batcher = LLMBatcher(model, cache=self.cache)
+        self.assertEqual(batcher.rewrite_sections(sections), first)
+        self.assertEqual(len(model.prompts), 2)
+        self.assertEqual(batcher.stats()["calls"], 0)
+
+        # a different model name does not reuse the responses
+        LLMBatcher(model, cache=self.cache, model_name="other").rewrite_sections(sections)
+        self.assertEqual(len(model.prompts), 4)
+
+    def test_duplicate_prompts_sent_once(self):
+        model = StubModel()
+        responses = LLMBatcher(model).complete(["same", "same", "other"])
+        self.assertEqual(len(model.prompts), 2)
+        self.assertEqual(responses[0], responses[1])
+
+    def test_pack_modules(self):
+        self.assertEqual(len(pack_modules(_modules(10), token_budget=100000)), 1)
+        batches = pack_modules(_modules(10, snippet="x" * 1000), token_budget=1000)
+        self.assertGreater(len(batches), 1)
+        self.assertEqual([m for b in batches for m in b], _modules(10, snippet="x" * 1000))
+        # a module over the budget still gets a batch of its own
+        self.assertEqual(len(pack_modules(_modules(2, snippet="x" * 1000), token_budget=10)), 2)
+
+    def test_summaries_are_batched(self):
+        model = StubModel()
+        summaries = LLMBatcher(model, token_budget=100000).summarize_modules(_modules(8))
+        self.assertEqual(len(model.prompts), 1)
+        self.assertEqual(set(summaries), {f"pkg/m{i}.py" for i in range(8)})
+        self.assertIn("About pkg/m3.py.", summaries["pkg/m3.py"])
+
+    def test_missing_module_retried_then_fallback(self):
+        def model(prompt):
+            if "m1.py" in prompt and "m0.py" not in prompt:
+                raise RuntimeError("down")
+            return f"{MODULE_MARKER}pkg/m0.py\nAbout m0."
+
+        fallback = lambda module, symbols, snippet: f"# {module}\nfallback"
+        summaries = LLMBatcher(model, token_budget=100000).summarize_modules(_modules(2), fallback=fallback)
+        self.assertEqual(summaries["pkg/m0.py"], "# pkg/m0.py\n\nAbout m0.")
+        self.assertEqual(summaries["pkg/m1.py"], "# pkg/m1.py\nfallback")
+
+    def test_walker_helpers_close_the_default_cache(self):
+        closed = []
+
+        class TrackedCache(ParseCache):
+            def close(self):
+                closed.append(self)
+                super().close()
+
+        def default_cache():
+            return TrackedCache(os.path.join(self.tmp.name, 'default.sqlite'))
+
+        with patch.object(LLMBatcher, 'default_cache', staticmethod(default_cache)):
+            llm_batch.rewrite_sections({"Overview": "o"}, StubModel())
+            llm_batch.summarize_modules(_modules(2), StubModel())
+            with patch.object(LLMBatcher, 'summarize_modules', side_effect=RuntimeError("down")):
+                with self.assertRaises(RuntimeError):
+                    llm_batch.summarize_modules(_modules(1), StubModel())
+        self.assertEqual(len(closed), 3)
+
+    def test_split_batch_response(self):
+        response = f"intro\n{MODULE_MARKER}a.py\nA.\n{MODULE_MARKER}`b.py`\n# b.py\nB.\n{MODULE_MARKER}c.py\n"
+        parts = split_batch_response(response, ["a.py", "b.py", "c.py"])
+        self.assertEqual(parts, {"a.py": "# a.py\n\nA.", "b.py": "# b.py\nB."})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import tempfile
+import os
+import shutil
+import signal
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'py_modules'))
+
+import parallel_parse
+from parallel_parse import parse_sources, ParsePool, _chunks
+from ccg import build_ccg
+
+class TestParallelParse(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.paths = []
+        for i in range(6):
+            path = os.path.join(self.temp_dir, f'mod{i}.py')
+            with open(path, 'w') as f:
+                f.write(f'def helper{i}():\n    pass\n\ndef main{i}():\n    helper{i}()\n')
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def items(self):
+        return [(p, open(p).read()) for p in self.paths]
+
+    def test_pool_matches_serial(self):
+        serial = {p: r for p, r, _ in parse_sources(self.items(), workers=1)}
+        pooled = {p: r for p, r, _ in parse_sources(self.items(), workers=2, chunk_size=2, serial_threshold=0)}
+        self.assertEqual(serial, pooled)
+
+    def test_shared_pool_across_batches(self):
+        serial = {p: r for p, r, _ in parse_sources(self.items(), workers=1)}
+        pooled = {}
+        with ParsePool(2) as pool:
+            # below the serial threshold, but a pool that is already up is used anyway
+            pooled.update((p, r) for p, r, _ in parse_sources(self.items()[:3], pool=pool))
+            executor = pool._executor
+            self.assertIsNotNone(executor)
+            pooled.update((p, r) for p, r, _ in parse_sources(self.items()[3:], pool=pool))
+            self.assertIs(pool._executor, executor)
+        self.assertIsNone(pool._executor)
+        self.assertEqual(serial, pooled)
+
+    def test_workers_are_not_forked_from_the_caller(self):
+        self.assertIn(parallel_parse.pool_context().get_start_method(), ('forkserver', 'spawn'))
+        with ParsePool(2) as pool:
+            self.assertEqual(pool.executor()._mp_context.get_start_method(),
+                             parallel_parse.pool_context().get_start_method())
+
+    def test_chunks_cover_every_worker(self):
+        items = [(str(i), '') for i in range(64)]
+        self.assertEqual(len(_chunks(items, 16, 8)), 8)
+        self.assertEqual(len(_chunks(items[:16], 16, 8)), 8)
+        self.assertEqual(len(_chunks(items, 16, 2)), 4)
+        self.assertEqual(sum(len(c) for c in _chunks(items[:5], 16, 8)), 5)
+
+    def test_build_ccg_in_pool(self):
+        ccg = build_ccg(self.paths, workers=2, chunk_size=2, serial_threshold=0)
+        self.assertEqual(ccg.graph.number_of_nodes(), 12)
+        edge = (f"{os.path.basename(self.temp_dir)}/mod0.py::main0", f"{os.path.basename(self.temp_dir)}/mod0.py::helper0")
+        self.assertTrue(ccg.graph.has_edge(*edge))
+
+    def test_timeout_does_not_stall(self):
+        def slow_parse(source, file_path):
+            time.sleep(5)
+
+        with patch.object(parallel_parse, 'parse_source', slow_parse):
+            start = time.monotonic()
+            outcomes = list(parse_sources(self.items()[:2], workers=1, timeout=0.1))
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertTrue(all('timed out' in error for _, _, error in outcomes))
+        self.assertTrue(all(result['symbols'] == [] for _, result, _ in outcomes))
+
+    def test_deadline_recycles_a_stuck_pool(self):
+        with ParsePool(2) as pool:
+            list(parse_sources(self.items()[:2], pool=pool))
+            stuck = list(pool._executor._processes.values())
+            # stopped workers ignore SIGALRM, like a worker inside native parser code
+            for process in stuck:
+                os.kill(process.pid, signal.SIGSTOP)
+            with patch.object(parallel_parse, 'DEADLINE_GRACE', 0.5):
+                start = time.monotonic()
+                outcomes = list(parse_sources(self.items(), pool=pool, timeout=0.1))
+            self.assertLess(time.monotonic() - start, 3)
+            self.assertEqual(sorted(p for p, _, _ in outcomes), sorted(self.paths))
+            self.assertTrue(all('timed out' in error for _, _, error in outcomes))
+            for process in stuck:
+                process.join(5)
+                self.assertFalse(process.is_alive())
+
+            # the next batch gets fresh workers
+            recovered = list(parse_sources(self.items(), pool=pool))
+            self.assertTrue(all(error is None for _, _, error in recovered))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import tempfile
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'py_modules'))
+
+from parse_cache import ParseCache
+from parser_utils import parse_file, parse_python_file
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = ParseCache(os.path.join(self.temp_dir, 'cache.sqlite'))
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, rel, text):
+        path = os.path.join(self.temp_dir, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_hit_on_unchanged_content(self):
+        path = self.write('a/mod.py', 'def hello():\n    pass\n')
+        first = parse_file(path, cache=self.cache)
+        second = parse_python_file(path, cache=self.cache)
+        self.assertEqual(first, second)
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 1})
+
+    def test_hit_rebinds_module(self):
+        self.write('a/mod.py', 'def hello():\n    pass\n')
+        parse_file(os.path.join(self.temp_dir, 'a', 'mod.py'), cache=self.cache)
+        moved = self.write('b/mod.py', 'def hello():\n    pass\n')
+        result = parse_file(moved, cache=self.cache)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(result['symbols'][0]['module'], os.path.join('b', 'mod.py'))
+
+    def test_changed_content_misses(self):
+        path = self.write('a/mod.py', 'def hello():\n    pass\n')
+        parse_file(path, cache=self.cache)
+        self.write('a/mod.py', 'def world():\n    pass\n')
+        result = parse_file(path, cache=self.cache)
+        self.assertEqual(self.cache.stats(), {'hits': 0, 'misses': 2})
+        self.assertEqual(result['symbols'][0]['name'], 'world')
+
+    def test_lru_eviction(self):
+        cache = ParseCache(os.path.join(self.temp_dir, 'small.sqlite'), max_bytes=300)
+        # random names so the compressed payloads stay large
+        payload = lambda: {'symbols': [os.urandom(100).hex()], 'imports': [], 'calls': []}
+        cache.put('old', payload())
+        cache.put('new', payload())
+        self.assertLessEqual(cache.total_bytes, 300)
+        self.assertIsNone(cache.get('old'))
+        self.assertIsNotNone(cache.get('new'))
+        cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
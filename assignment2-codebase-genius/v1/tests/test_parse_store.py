@@ -0,0 +1,43 @@
+import unittest
+import tempfile
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'py_modules'))
+
+from parse_store import ParseStore
+from ccg import build_ccg
+
+class TestParseStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, 'mod.py')
+        with open(self.file_path, 'w') as f:
+            f.write('def helper():\n    pass\n\ndef main():\n    helper()\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_parses_each_file_once(self):
+        store = ParseStore()
+        ccg = build_ccg([self.file_path], store=store)
+        symbols = store.symbols([self.file_path])
+        source = store.source(self.file_path)
+
+        self.assertEqual(store.parses, 1)
+        self.assertEqual(store.reads, 1)
+        self.assertEqual({s['name'] for s in symbols}, {'helper', 'main'})
+        self.assertIn('def main', source)
+        self.assertEqual(len(store.digest(self.file_path)), 64)
+        self.assertTrue(any(n.endswith('::main') for n in ccg.graph.nodes))
+
+    def test_missing_file(self):
+        store = ParseStore()
+        missing = os.path.join(self.temp_dir, 'missing.py')
+        self.assertEqual(store.parse(missing)['symbols'], [])
+        self.assertIsNone(store.source(missing))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,7 +8,7 @@ from pathlib import Path
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'py_modules'))
 
-from repo_mapper import build_file_tree, find_readme, summarize_readme, find_entry_points, map_repo
+from repo_mapper import build_file_tree, find_readme, summarize_readme, find_entry_points, map_repo, scan_repo
 
 class TestRepoMapper(unittest.TestCase):
 
@@ -60,6 +60,30 @@ class TestRepoMapper(unittest.TestCase):
         self.assertIn('file_tree', result)
         self.assertIn('readme_summary', result)
         self.assertIn('entry_points', result)
+        self.assertEqual(result['files']['main.py']['size'], len('print("main")'))
+
+    def test_scan_repo_skips_ignored_dirs(self):
+        git_dir = Path(self.temp_dir) / '.git'
+        git_dir.mkdir()
+        (git_dir / 'hook.py').write_text('if __name__ == "__main__": pass')
+        pkg = Path(self.temp_dir) / 'pkg'
+        pkg.mkdir()
+        (pkg / 'cli.py').write_text('if __name__ == "__main__": pass')
+        (pkg / 'empty.py').write_text('')
+
+        scan = scan_repo(self.temp_dir)
+        self.assertNotIn('.git', scan['file_tree'])
+        self.assertIn('cli.py', scan['file_tree']['pkg'])
+        self.assertEqual(scan['entry_points'], [str(pkg / 'cli.py')])
+        self.assertIn(os.path.join('pkg', 'empty.py'), scan['files'])
+
+    def test_find_readme_prefers_top_level(self):
+        docs = Path(self.temp_dir) / 'docs'
+        docs.mkdir()
+        (docs / 'README.txt').write_text('nested')
+        self.assertEqual(find_readme(self.temp_dir), 'nested')
+        (Path(self.temp_dir) / 'README').write_text('top')
+        self.assertEqual(find_readme(self.temp_dir), 'top')
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+import subprocess
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'py_modules'))
+
+from repo_source import RepoSource, FilesystemSource, GitTreeSource
+from repo_mapper import map_repo, find_readme, find_entry_points, build_file_tree
+from parser_utils import parse_file
+from parse_store import ParseStore
+from ccg import build_ccg
+
+FILES = {
+    'README.md': '# Demo\n\nA demo repository.\n',
+    'main.py': 'from pkg.util import helper\n\ndef run():\n    helper()\n\nif __name__ == "__main__":\n    run()\n',
+    'pkg/util.py': 'def helper():\n    """Help."""\n    return 1\n',
+    'pkg/__pycache__/junk.pyc': 'x',
+}
+
+class TestRepoSource(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.work = os.path.join(self.tmp.name, 'demo')
+        for rel, text in FILES.items():
+            path = os.path.join(self.work, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(text)
+        git = ['git', '-C', self.work, '-c', 'user.name=t', '-c', 'user.email=t@t']
+        subprocess.run(git + ['init', '-q'], check=True)
+        subprocess.run(git + ['add', '.'], check=True)
+        subprocess.run(git + ['commit', '-q', '-m', 'init'], check=True)
+        self.bare = os.path.join(self.tmp.name, 'demo.git')
+        subprocess.run(['git', 'clone', '-q', '--bare', self.work, self.bare], check=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_incomplete_source_fails_on_construction(self):
+        class ListingOnly(RepoSource):
+            def files(self):
+                return iter(())
+
+        with self.assertRaises(TypeError):
+            ListingOnly()
+
+    def test_git_tree_source_reads_blobs(self):
+        with GitTreeSource(self.bare) as source:
+            self.assertEqual(source.root, self.work)
+            self.assertEqual(dict(source.files())['pkg/util.py'], len(FILES['pkg/util.py']))
+            self.assertEqual(source.read(os.path.join(self.work, 'pkg', 'util.py')), FILES['pkg/util.py'].encode())
+            self.assertEqual(source.read_text('README.md'), FILES['README.md'])
+            self.assertEqual(source.read_text('README.md', limit=6), '# Demo')
+            self.assertFalse(source.exists('missing.py'))
+            with self.assertRaises(OSError):
+                source.read('missing.py')
+
+    def test_read_text_limit_drops_a_split_character(self):
+        path = os.path.join(self.work, 'accents.py')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('s = "café"\n')
+        source = FilesystemSource(self.work)
+        # the limit falls inside the two-byte 'é'
+        self.assertEqual(source.read_text('accents.py', limit=9), 's = "caf')
+        self.assertEqual(source.read_head('accents.py', 3), b's =')
+        self.assertEqual(source.read_text('accents.py'), 's = "café"\n')
+
+    def test_mapper_matches_checkout(self):
+        on_disk = map_repo(self.work)
+        with GitTreeSource(self.bare) as source:
+            from_git = map_repo(source)
+            self.assertEqual(from_git['file_tree'], on_disk['file_tree'])
+            self.assertEqual(from_git['readme_summary'], on_disk['readme_summary'])
+            self.assertEqual(sorted(from_git['entry_points']), sorted(on_disk['entry_points']))
+            self.assertEqual(set(from_git['files']), set(on_disk['files']))
+            self.assertEqual(build_file_tree(source), build_file_tree(FilesystemSource(self.work)))
+            self.assertEqual(find_readme(source), FILES['README.md'])
+            self.assertEqual(find_entry_points(source), [os.path.join(self.work, 'main.py')])
+
+    def test_parse_and_build_without_checkout(self):
+        target = os.path.join(self.work, 'pkg', 'util.py')
+        expected = parse_file(target)
+        targets = [os.path.join(self.work, 'main.py'), target]
+        expected_graph = build_ccg(targets, workers=1).graph
+        with GitTreeSource(self.bare) as source:
+            self.assertEqual(parse_file(target, repo_source=source), expected)
+            graph = build_ccg(targets, store=ParseStore(repo_source=source), workers=1).graph
+            self.assertEqual(set(graph.edges), set(expected_graph.edges))
+            self.assertTrue(graph.has_edge('demo/main.py::run', 'pkg/util.py::helper'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'py_modules'))
+
+from result_cache import ResultCache, result_key, config_hash
+
+def _outputs(root, text):
+    out = os.path.join(root, 'out')
+    os.makedirs(os.path.join(out, 'diagrams'), exist_ok=True)
+    with open(os.path.join(out, 'docs.md'), 'w') as f:
+        f.write(text)
+    with open(os.path.join(out, 'diagrams', 'call_graph.png'), 'wb') as f:
+        f.write(b'png')
+    return out
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'results')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_keys(self):
+        base = result_key('https://github.com/o/r', 'a' * 40, '1', config_hash({'sparse_clone': False}))
+        self.assertEqual(base, result_key('https://github.com/o/r.git', 'a' * 40, '1', config_hash({'sparse_clone': False})))
+        self.assertNotEqual(base, result_key('https://github.com/o/r', 'b' * 40, '1', config_hash({'sparse_clone': False})))
+        self.assertNotEqual(base, result_key('https://github.com/o/r', 'a' * 40, '2', config_hash({'sparse_clone': False})))
+        self.assertNotEqual(base, result_key('https://github.com/o/r', 'a' * 40, '1', config_hash({'sparse_clone': True})))
+
+    def test_put_and_restore(self):
+        cache = ResultCache(self.root)
+        self.assertIsNone(cache.restore('k', os.path.join(self.tmp.name, 'dest')))
+        cache.put('k', _outputs(self.tmp.name, '# Docs'), {'commit': 'abc'})
+
+        dest = os.path.join(self.tmp.name, 'dest')
+        self.assertIsNotNone(cache.restore('k', dest))
+        with open(os.path.join(dest, 'docs.md')) as f:
+            self.assertEqual(f.read(), '# Docs')
+        self.assertTrue(os.path.exists(os.path.join(dest, 'diagrams', 'call_graph.png')))
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1})
+
+    def test_restore_replaces_stale_outputs(self):
+        cache = ResultCache(self.root)
+        src = os.path.join(self.tmp.name, 'src')
+        os.makedirs(src)
+        with open(os.path.join(src, 'docs.md'), 'w') as f:
+            f.write('# Cached')
+        cache.put('k', src)
+
+        dest = _outputs(self.tmp.name, '# Old')
+        cache.restore('k', dest)
+        self.assertEqual(sorted(os.listdir(dest)), ['docs.md'])
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['out', 'results', 'src'])
+
+    def test_failed_put_leaves_no_staging(self):
+        cache = ResultCache(self.root)
+        with self.assertRaises(OSError):
+            cache.put('k', os.path.join(self.tmp.name, 'missing'))
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_ttl_expiry(self):
+        cache = ResultCache(self.root, ttl=0.05)
+        cache.put('k', _outputs(self.tmp.name, '# Docs'))
+        self.assertIsNotNone(cache.get('k'))
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('k'))
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'k')))
+
+    def test_size_eviction_is_lru(self):
+        cache = ResultCache(self.root, max_bytes=100)
+        cache.put('old', _outputs(self.tmp.name, 'x' * 40))
+        time.sleep(0.01)
+        cache.put('mid', _outputs(self.tmp.name, 'y' * 40))
+        time.sleep(0.01)
+        cache.get('old')  # refresh 'old'; 'mid' is now least recently used
+        cache.put('new', _outputs(self.tmp.name, 'z' * 40))
+        self.assertIsNotNone(cache.get('old'))
+        self.assertIsNone(cache.get('mid'))
+        self.assertIsNotNone(cache.get('new'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import sys
+import os
+import filecmp
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'py_modules'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'benchmarks'))
+
+from synthetic_repo import RepoSpec, generate_repo
+from ccg import build_ccg
+from repo_mapper import map_repo
+from parser_utils import parse_file
+
+SPEC = RepoSpec(modules=12, functions=4, class_depth=4, calls_per_function=2, packages=3,
+                jac_lines=200, tree_files=30, tree_depth=3)
+
+class TestSyntheticRepo(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_deterministic(self):
+        a, b = os.path.join(self.tmp.name, 'a'), os.path.join(self.tmp.name, 'b')
+        self.assertEqual(generate_repo(a, SPEC), generate_repo(b, SPEC))
+        cmp = filecmp.dircmp(a, b)
+        self.assertFalse(cmp.left_only or cmp.right_only or cmp.diff_files)
+        self.assertEqual(open(os.path.join(a, 'pkg_1', 'sub_0_0', 'sub_0_1', 'mod_1.py')).read(),
+                         open(os.path.join(b, 'pkg_1', 'sub_0_0', 'sub_0_1', 'mod_1.py')).read())
+
+    def test_shape(self):
+        root = os.path.join(self.tmp.name, 'repo')
+        counts = generate_repo(root, SPEC)
+        repo_map = map_repo(root)
+        self.assertEqual(len(repo_map['files']), counts['files'])
+        self.assertEqual(repo_map['entry_points'], [os.path.join(root, 'main.py')])
+
+        targets = [os.path.join(root, f) for f in repo_map['files'] if f.endswith(('.py', '.jac'))]
+        ccg = build_ccg(targets, workers=1)
+        classes = [s for t in targets for s in parse_file(t)['symbols'] if s['kind'] == 'class']
+        # chains of class_depth classes: every module not starting a chain extends the previous one
+        self.assertEqual(len([c for c in classes if c.get('bases')]), SPEC.modules - SPEC.modules // SPEC.class_depth)
+        self.assertTrue(any(c['module'].endswith('.jac') for c in classes))
+        calls = [1 for _, _, d in ccg.graph.edges(data=True) if d.get('type') == 'calls']
+        self.assertGreater(len(calls), SPEC.modules)
+
+if __name__ == '__main__':
+    unittest.main()
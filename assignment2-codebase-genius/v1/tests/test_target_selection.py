@@ -0,0 +1,147 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'py_modules'))
+
+from target_selection import scan_imports, score_files, parse_within_budget
+from repo_source import FilesystemSource
+from repo_mapper import map_repo
+from parse_store import ParseStore
+import target_selection
+
+FILES = {
+    'main.py': 'from pkg.core import run\n\nif __name__ == "__main__":\n    run()\n',
+    'pkg/__init__.py': '',
+    'pkg/core.py': 'from .util import helper\nfrom pkg import models\n\ndef run():\n    return helper()\n' + '# pad\n' * 40,
+    'pkg/util.py': 'def helper():\n    return 1\n' + '# pad\n' * 40,
+    'pkg/models.py': 'from .util import helper\n\nclass Model:\n    pass\n' + '# pad\n' * 40,
+    'pkg/orphan.py': 'def unused():\n    pass\n' + '# pad\n' * 40,
+    'tests/test_core.py': 'from pkg.core import run\nfrom pkg.util import helper\n\ndef test_run():\n    run()\n',
+    'docs/conf.py': 'project = "x"\n' + '# pad\n' * 40,
+}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestTargetSelection(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        for rel, text in FILES.items():
+            path = os.path.join(self.root, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(text)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _ranked(self):
+        source = FilesystemSource(self.root)
+        repo_map = map_repo(source)
+        return source, score_files(source, repo_map['files'], repo_map['entry_points'])
+
+    def test_scan_imports(self):
+        source = 'import os, json as j\nfrom . import a\nfrom ..pkg.mod import (x,\n    y as z)\nfrom m import *\n'
+        self.assertEqual(scan_imports(source), ['os', 'json', '.a', '..pkg.mod', '..pkg.mod.x', '..pkg.mod.y', 'm'])
+
+    def test_ranking(self):
+        source, ranked = self._ranked()
+        order = [source.relpath(r['path']) for r in ranked]
+        self.assertEqual(order[0], 'main.py')
+        fan_in = {source.relpath(r['path']): r['fan_in'] for r in ranked}
+        # core, models (relative import) and the test import util
+        self.assertEqual(fan_in['pkg/util.py'], 3)
+        self.assertEqual(fan_in['pkg/models.py'], 1)
+        self.assertLess(order.index('pkg/util.py'), order.index('pkg/orphan.py'))
+        self.assertLess(order.index('pkg/orphan.py'), order.index('tests/test_core.py'))
+        self.assertLess(order.index('pkg/orphan.py'), order.index('docs/conf.py'))
+        # the empty __init__.py ranks below every real module
+        self.assertLess(order.index('pkg/orphan.py'), order.index('pkg/__init__.py'))
+
+    def test_scan_reads_only_file_headers(self):
+        path = os.path.join(self.root, 'pkg', 'big.py')
+        with open(path, 'w') as f:
+            f.write('from pkg import orphan\n' + 'x = 1\n' * 20000 + 'from pkg import util\n')
+
+        class HeadOnlySource(FilesystemSource):
+            def read(self, path):
+                raise AssertionError(f'full read of {path}')
+
+        source = HeadOnlySource(self.root)
+        repo_map = map_repo(FilesystemSource(self.root))
+        ranked = score_files(source, repo_map['files'], repo_map['entry_points'])
+        fan_in = {source.relpath(r['path']): r['fan_in'] for r in ranked}
+        self.assertEqual(fan_in['pkg/orphan.py'], 1)
+        # the import past the scanned header is not seen
+        self.assertEqual(fan_in['pkg/util.py'], 3)
+
+    def test_batches_share_one_pool(self):
+        _, ranked = self._ranked()
+        paths = [r['path'] for r in ranked]
+        pools = []
+
+        class RecordingStore(ParseStore):
+            def parse_many(self, file_paths, **kwargs):
+                pools.append(kwargs.get('pool'))
+                return super().parse_many(file_paths, **kwargs)
+
+        with patch.object(target_selection, 'DEFAULT_SERIAL_THRESHOLD', 0):
+            selection = parse_within_budget(RecordingStore(), paths, max_files=None, time_budget=None,
+                                            workers=2, batch_size=3)
+        self.assertEqual(selection['targets'], paths)
+        self.assertEqual(len(pools), 3)
+        self.assertIsNotNone(pools[0])
+        self.assertTrue(all(pool is pools[0] for pool in pools))
+        self.assertEqual(pools[0].workers, 2)
+
+        pools.clear()
+        parse_within_budget(RecordingStore(), paths, max_files=None, time_budget=None, workers=2)
+        # eight files are below the serial threshold
+        self.assertEqual(pools[0].workers, 1)
+
+    def test_file_budget(self):
+        _, ranked = self._ranked()
+        paths = [r['path'] for r in ranked]
+        store = ParseStore()
+        selection = parse_within_budget(store, paths, max_files=3, time_budget=None)
+        self.assertEqual(selection['targets'], paths[:3])
+        self.assertEqual(selection['stopped'], 'max_files')
+        self.assertEqual(store.parses, 3)
+
+        selection = parse_within_budget(ParseStore(), paths, max_files=None, time_budget=None)
+        self.assertEqual(selection['targets'], paths)
+        self.assertIsNone(selection['stopped'])
+
+    def test_time_budget(self):
+        _, ranked = self._ranked()
+        paths = [r['path'] for r in ranked]
+        clock = FakeClock()
+
+        class SlowStore(ParseStore):
+            def parse_many(self, file_paths, **kwargs):
+                clock.now += 1.0 * len(file_paths)
+                return super().parse_many(file_paths, **kwargs)
+
+        # the probe batch covers all 8 files; overrunning the budget cuts nothing
+        selection = parse_within_budget(SlowStore(), paths, max_files=None, time_budget=5.0, clock=clock)
+        self.assertIsNone(selection['stopped'])
+        self.assertEqual(selection['targets'], paths)
+
+        clock.now = 0.0
+        selection = parse_within_budget(SlowStore(), paths, max_files=None, time_budget=5.5, clock=clock,
+                                        batch_size=2)
+        # 2 files/2s, then batches sized to the remaining time
+        self.assertEqual(selection['targets'], paths[:5])
+        self.assertEqual(selection['stopped'], 'time_budget')
+
+if __name__ == '__main__':
+    unittest.main()
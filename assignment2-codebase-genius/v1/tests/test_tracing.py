@@ -0,0 +1,101 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'py_modules'))
+
+V2_COPY = os.path.join(os.path.dirname(__file__), '..', '..', 'v2', 'agentic_codebase_genius', 'py_module', 'tracing.py')
+
+from tracing import Tracer, maybe_span, hit_rate
+
+class TestTracer(unittest.TestCase):
+
+    def test_nested_spans(self):
+        tracer = Tracer()
+        with tracer.span('parse', files=3) as span:
+            sum(i * i for i in range(100000))
+            span.set(cache_hits=2)
+            with tracer.span('child'):
+                pass
+        with tracer.span('render'):
+            pass
+
+        spans = tracer.to_dicts()
+        self.assertEqual([s['name'] for s in spans], ['parse', 'child', 'render'])
+        parse, child, render = spans
+        self.assertIsNone(parse['parent'])
+        self.assertEqual(child['parent'], parse['id'])
+        self.assertEqual(parse['attrs'], {'files': 3, 'cache_hits': 2})
+        self.assertGreater(parse['wall_s'], 0)
+        self.assertGreaterEqual(parse['wall_s'], child['wall_s'])
+        self.assertIsNotNone(parse['cpu_s'])
+        if sys.platform != 'win32':
+            self.assertGreater(parse['peak_rss_kb'], 0)
+
+        summary = tracer.summary()
+        self.assertEqual([(s['stage'], s['depth']) for s in summary], [('parse', 0), ('child', 1), ('render', 0)])
+        self.assertAlmostEqual(sum(s['share'] for s in summary if s['depth'] == 0), 1.0, places=2)
+
+    def test_error_is_recorded(self):
+        tracer = Tracer()
+        with self.assertRaises(ValueError):
+            with tracer.span('clone'):
+                raise ValueError('boom')
+        self.assertEqual(tracer.to_dicts()[0]['error'], 'ValueError: boom')
+
+    def test_threads_do_not_nest_into_each_other(self):
+        tracer = Tracer()
+        def work():
+            with tracer.span('worker'):
+                pass
+
+        with tracer.span('outer'):
+            worker = threading.Thread(target=work)
+            worker.start()
+            worker.join()
+        spans = {s['name']: s for s in tracer.to_dicts()}
+        self.assertIsNone(spans['worker']['parent'])
+
+    def test_jsonl_and_chrome_trace(self):
+        tracer = Tracer(trace_id='https://github.com/o/r')
+        with tracer.span('map_repo', files=2):
+            pass
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'traces', 'trace.jsonl')
+            self.assertEqual(tracer.write_jsonl(path), 1)
+            tracer.write_jsonl(path)
+            with open(path) as f:
+                lines = [json.loads(line) for line in f]
+            self.assertEqual(len(lines), 2)
+            self.assertEqual(lines[0]['trace'], 'https://github.com/o/r')
+            self.assertEqual(lines[0]['attrs'], {'files': 2})
+
+            chrome = os.path.join(tmp, 'trace.json')
+            tracer.write_chrome_trace(chrome)
+            with open(chrome) as f:
+                events = json.load(f)['traceEvents']
+        self.assertEqual(events[0]['ph'], 'X')
+        self.assertEqual(events[0]['name'], 'map_repo')
+        self.assertEqual(events[0]['args']['files'], 2)
+        self.assertIn('dur', events[0])
+
+    def test_maybe_span_without_tracer(self):
+        with maybe_span(None, 'diagrams') as span:
+            span.set(diagrams=2)
+        self.assertIsNotNone(span.wall)
+
+    @unittest.skipUnless(os.path.exists(V2_COPY), 'v2 app not checked out')
+    def test_v2_copy_is_identical(self):
+        import tracing
+        with open(tracing.__file__, 'rb') as ours, open(V2_COPY, 'rb') as theirs:
+            self.assertEqual(ours.read(), theirs.read(), 'v1 and v2 tracing.py differ; change both together')
+
+    def test_hit_rate(self):
+        self.assertEqual(hit_rate(3, 1), 0.75)
+        self.assertIsNone(hit_rate(0, 0))
+
+if __name__ == '__main__':
+    unittest.main()
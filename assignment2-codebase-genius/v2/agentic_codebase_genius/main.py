@@ -4,8 +4,10 @@ import os
 sys.path.append('py_module')
 
 from repo_mapper import map_repository
-from code_analyzer import analyze_codebase
+from code_analyzer import analyze_codebase, query_ccg_many
 from docgenie import generate_docs
+from job_queue import get_queue
+from graph_store import get_store, publish_graph
 
 app = Flask(__name__)
 
@@ -25,10 +27,60 @@ def generate_docs_endpoint():
 
         # Generate docs
         docs_path = generate_docs(result['file_tree'], result['readme_summary'], ccg, repo_url)
+        publish_graph(repo_url, ccg)
 
         return jsonify({"status": "success", "docs_path": docs_path})
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# Asynchronous job API: submit returns at once, clients poll for progress
+
+@app.route('/jobs', methods=['POST'])
+def submit_job_endpoint():
+    data = request.get_json() or {}
+    repo_url = data.get('repo_url')
+    if not repo_url:
+        return jsonify({"status": "error", "message": "repo_url required"}), 400
+    return jsonify(get_queue().submit(repo_url)), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status_endpoint(job_id):
+    status = get_queue().status(job_id, since=request.args.get('since', 0, type=int))
+    return jsonify(status), 404 if status['status'] == 'unknown' else 200
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result_endpoint(job_id):
+    result = get_queue().result(job_id)
+    return jsonify(result), 404 if result['status'] == 'unknown' else 200
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job_endpoint(job_id):
+    result = get_queue().cancel(job_id)
+    return jsonify(result), 404 if result['status'] == 'unknown' else 200
+
+# Code graph queries, answered from the resident graph store
+
+@app.route('/graph/query', methods=['GET'])
+def graph_query_endpoint():
+    args = request.args
+    if not args.get('repo_url') or not args.get('query'):
+        return jsonify({"status": "error", "message": "repo_url and query required"}), 400
+    edge_types = args.get('edge_types')
+    result = get_store().query(args['repo_url'], args['query'], args.get('entity'),
+                               target=args.get('target'), k=args.get('k', 1, type=int),
+                               direction=args.get('direction', 'both'),
+                               edge_types=edge_types.split(',') if edge_types else None)
+    codes = {'success': 200, 'unknown': 404, 'error': 400}
+    return jsonify(result), codes[result['status']]
+
+@app.route('/graph/relationships', methods=['POST'])
+def graph_relationships_endpoint():
+    data = request.get_json() or {}
+    if not data.get('repo_url') or not data.get('ccg') or not data.get('entities'):
+        return jsonify({"status": "error", "message": "repo_url, ccg and entities required"}), 400
+    # repo_url keys the resident index, so the same graph posted again is not re-indexed
+    result = query_ccg_many(data['ccg'], data['entities'], repo_url=data['repo_url'])
+    return jsonify({"status": "success", "result": result})
+
 if __name__ == '__main__':
     app.run(debug=True, port=8000)
\ No newline at end of file
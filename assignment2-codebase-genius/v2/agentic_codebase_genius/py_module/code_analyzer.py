@@ -2,82 +2,328 @@ import ast
 import networkx as nx
 from pathlib import Path
 import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    from .fragment_cache import FragmentCache, content_digest
+    from .graph_store import CCGIndex, get_store, graph_digest
+except ImportError:
+    from fragment_cache import FragmentCache, content_digest
+    from graph_store import CCGIndex, get_store, graph_digest
+
+# Files analyze_codebase reads; also drives sparse clones in repo_mapper
+SOURCE_EXTENSIONS = ('.py',)
+SKIP_DIRS = {'.git', '__pycache__', 'node_modules'}
+
+# Bump when the fragment layout or the visitor changes, so cached fragments are not reused
+ANALYZER_VERSION = 'v1'
+# Below this many files, process start-up costs more than parallel analysis saves
+DEFAULT_SERIAL_THRESHOLD = 32
+DEFAULT_CHUNK_SIZE = 16
+
+def node_id(rel_path: str, qualname: str = None) -> str:
+    """Graph id of a definition: 'pkg/mod.py::Class.method'; a module is just its path."""
+    return f"{rel_path}::{qualname}" if qualname else rel_path
+
+
+class _DefinitionVisitor(ast.NodeVisitor):
+    """
+    One pass over a module's AST into a fragment. A scope stack of
+    qualnames gives every class and function its qualified name and its
+    'contains' parent; calls are charged to the innermost enclosing
+    function, so nested bodies are walked once instead of once per
+    enclosing function.
+    """
 
-class CodeAnalyzer:
     def __init__(self):
+        self.defs = []
+        self.refs = []
+        self.scopes = []
+        self.functions = []
+
+    def _define(self, node, kind: str, is_async: bool = False) -> str:
+        qualname = f"{self.scopes[-1]}.{node.name}" if self.scopes else node.name
+        self.defs.append([qualname, kind, node.name, node.lineno, is_async])
+        self.scopes.append(qualname)
+        return qualname
+
+    def visit_ClassDef(self, node):
+        qualname = self._define(node, 'class')
+        for base in node.bases:
+            if isinstance(base, ast.Name):
+                self.refs.append([qualname, base.id, 'inherits'])
+        self.generic_visit(node)
+        self.scopes.pop()
+
+    def visit_FunctionDef(self, node, is_async=False):
+        self.functions.append(self._define(node, 'function', is_async))
+        self.generic_visit(node)
+        self.functions.pop()
+        self.scopes.pop()
+
+    def visit_AsyncFunctionDef(self, node):
+        self.visit_FunctionDef(node, is_async=True)
+
+    def visit_Call(self, node):
+        if self.functions and isinstance(node.func, ast.Name):
+            self.refs.append([self.functions[-1], node.func.id, 'calls'])
+        self.generic_visit(node)
+
+
+def tree_fragment(tree: ast.AST) -> dict:
+    """
+    The definitions and references of one parsed module, free of its path:
+    {'defs': [[qualname, kind, name, lineno, is_async]],
+     'refs': [[from qualname, bare name, 'calls' | 'inherits']]}.
+    A definition's parent is its qualname minus the last part, or the module.
+    """
+    visitor = _DefinitionVisitor()
+    visitor.visit(tree)
+    return {'defs': visitor.defs, 'refs': visitor.refs}
+
+
+def _diagnostic(rel_path: str, stage: str, error: BaseException) -> dict:
+    return {'path': rel_path, 'stage': stage, 'error': type(error).__name__,
+            'message': getattr(error, 'msg', None) or str(error), 'lineno': getattr(error, 'lineno', None)}
+
+
+def analyze_source(source: bytes, rel_path: str):
+    """Parse one file into (fragment, None), or (None, diagnostic). Never raises."""
+    try:
+        return tree_fragment(ast.parse(source, filename=rel_path)), None
+    except (SyntaxError, ValueError, RecursionError, MemoryError) as e:
+        return None, _diagnostic(rel_path, 'parse', e)
+
+
+def _pool_context():
+    # forking from a threaded process (job queue workers) can copy a held lock
+    # into the child and deadlock it; forkserver/spawn children start clean
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _analyze_chunk(items):
+    # Runs in a pool worker
+    return [(rel_path,) + analyze_source(source, rel_path) for rel_path, source in items]
+
+
+class CodeAnalyzer:
+    def __init__(self, root: str = None):
         self.graph = nx.DiGraph()
+        self.root = root
+        # structured errors, one per file that could not be read or parsed
+        self.diagnostics = []
+        self.stats = {'files': 0, 'cache_hits': 0, 'analyzed': 0}
+        # rel path -> (file path, fragment) not yet merged into the graph, and
+        # bare name -> ids of its definitions, for resolving references
+        self._fragments = {}
+        self._defined = {}
+        self._index = None
+        self._index_key = None
 
     def analyze_file(self, file_path: str):
         """Analyze a single Python file and add to graph."""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                source = f.read()
-            tree = ast.parse(source, filename=file_path)
-            self._visit_tree(tree, file_path)
-        except Exception as e:
-            print(f"Error analyzing {file_path}: {e}")
-
-    def _visit_tree(self, node, file_path, parent=None):
-        if isinstance(node, ast.ClassDef):
-            class_name = node.name
-            self.graph.add_node(class_name, type='class', file=file_path)
-            if parent:
-                self.graph.add_edge(parent, class_name, type='contains')
-            for base in node.bases:
-                if isinstance(base, ast.Name):
-                    self.graph.add_edge(base.id, class_name, type='inherits')
-            for item in node.body:
-                self._visit_tree(item, file_path, class_name)
-        elif isinstance(node, ast.FunctionDef):
-            func_name = node.name
-            self.graph.add_node(func_name, type='function', file=file_path)
-            if parent:
-                self.graph.add_edge(parent, func_name, type='contains')
-            # Add calls
-            for child in ast.walk(node):
-                if isinstance(child, ast.Call) and isinstance(child.func, ast.Name):
-                    self.graph.add_edge(func_name, child.func.id, type='calls')
-        elif isinstance(node, ast.Module):
-            module_name = Path(file_path).stem
-            self.graph.add_node(module_name, type='module', file=file_path)
-            for item in node.body:
-                self._visit_tree(item, file_path, module_name)
+        self.analyze_files([file_path], workers=1)
+
+    def analyze_files(self, file_paths, workers: int = None, cache: FragmentCache = None,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE, serial_threshold: int = DEFAULT_SERIAL_THRESHOLD):
+        """
+        Analyze files into per-file fragments. Fragments found in cache (by
+        content hash) are reused; the rest are parsed in a process pool of
+        workers (default: CPU count), or in-process for fewer than
+        serial_threshold files. The graph itself is built once, in bulk,
+        by get_graph.
+        """
+        misses = []
+        digests = {}
+        for file_path in file_paths:
+            rel_path = self._rel_path(file_path)
+            self.stats['files'] += 1
+            try:
+                with open(file_path, 'rb') as f:
+                    source = f.read()
+            except OSError as e:
+                self.diagnostics.append(_diagnostic(rel_path, 'read', e))
+                continue
+            digests[rel_path] = (file_path, FragmentCache.make_key(ANALYZER_VERSION, content_digest(source)))
+            misses.append((rel_path, source))
+
+        if cache is not None:
+            cached = cache.get_many([key for _, key in digests.values()])
+            for rel_path, (file_path, key) in digests.items():
+                if key in cached:
+                    self._fragments[rel_path] = (file_path, cached[key])
+                    self.stats['cache_hits'] += 1
+            misses = [(rel, source) for rel, source in misses if digests[rel][1] not in cached]
+
+        fresh = {}
+        for rel_path, fragment, diagnostic in self._run(misses, workers, chunk_size, serial_threshold):
+            self.stats['analyzed'] += 1
+            if diagnostic:
+                self.diagnostics.append(diagnostic)
+                continue
+            self._fragments[rel_path] = (digests[rel_path][0], fragment)
+            fresh[digests[rel_path][1]] = fragment
+        if cache is not None and fresh:
+            cache.put_many(fresh)
+
+    def _run(self, items, workers, chunk_size, serial_threshold):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1 or len(items) < serial_threshold:
+            return _analyze_chunk(items)
+        outcomes = []
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=_pool_context()) as executor:
+            futures = {executor.submit(_analyze_chunk, chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                try:
+                    outcomes.extend(future.result())
+                except BrokenProcessPool as e:
+                    outcomes.extend((rel, None, _diagnostic(rel, 'worker', e)) for rel, _ in futures[future])
+        return outcomes
+
+    def _rel_path(self, file_path: str) -> str:
+        if self.root:
+            return Path(os.path.relpath(file_path, self.root)).as_posix()
+        return Path(file_path).as_posix()
+
+    def _visit_tree(self, tree, file_path):
+        self._fragments[self._rel_path(file_path)] = (file_path, tree_fragment(tree))
+
+    def _resolve(self, rel_path: str, name: str) -> str:
+        # a definition in the same file wins, then the only one in the codebase;
+        # anything else (builtins, imports, ambiguous names) stays a bare-name node
+        candidates = self._defined.get(name, [])
+        prefix = node_id(rel_path, '')
+        local = [c for c in candidates if c.startswith(prefix)]
+        if local:
+            return min(local, key=len)
+        if len(candidates) == 1:
+            return candidates[0]
+        return name
+
+    def _merge(self):
+        """Turn pending fragments into nodes and edges with one bulk add each."""
+        if not self._fragments:
+            return
+        nodes, contains, linked = [], [], []
+        fragments = sorted(self._fragments.items())
+        for rel_path, (file_path, fragment) in fragments:
+            stem = Path(rel_path).stem
+            nodes.append((rel_path, {'type': 'module', 'name': stem, 'qualname': stem,
+                                     'file': file_path, 'path': rel_path}))
+            for qualname, kind, name, lineno, is_async in fragment['defs']:
+                def_id = node_id(rel_path, qualname)
+                parent = node_id(rel_path, qualname.rpartition('.')[0] or None)
+                attrs = {'type': kind, 'name': name, 'qualname': qualname, 'file': file_path,
+                         'path': rel_path, 'lineno': lineno, 'parent': parent}
+                if is_async:
+                    attrs['async'] = True
+                nodes.append((def_id, attrs))
+                contains.append((parent, def_id, {'type': 'contains'}))
+                self._defined.setdefault(name, []).append(def_id)
+        # references are resolved only now, with every file's definitions known
+        for rel_path, (_, fragment) in fragments:
+            for qualname, name, edge_type in fragment['refs']:
+                source_id, target = node_id(rel_path, qualname), self._resolve(rel_path, name)
+                if edge_type == 'inherits':
+                    linked.append((target, source_id, {'type': 'inherits'}))
+                else:
+                    linked.append((source_id, target, {'type': 'calls'}))
+        self._fragments = {}
+        self.graph.add_nodes_from(nodes)
+        # DiGraph keeps one edge per pair, so a call to a nested function replaces
+        # its 'contains' edge; the 'parent' attribute keeps the nesting (see CCGIndex)
+        self.graph.add_edges_from(contains + linked)
+        self._index = None
 
     def get_graph(self):
-        """Return the graph as a dict for serialization."""
+        """Return the graph as a dict for serialization, with the analysis diagnostics."""
+        self._merge()
         return {
             'nodes': list(self.graph.nodes(data=True)),
-            'edges': list(self.graph.edges(data=True))
+            'edges': list(self.graph.edges(data=True)),
+            'diagnostics': list(self.diagnostics)
         }
 
+    def index(self) -> CCGIndex:
+        """
+        Per-edge-type adjacency over the graph, built once. Merging new
+        files resets it; direct edits to self.graph are caught when they
+        change the node or edge count (set self._index = None after any
+        other direct edit).
+        """
+        self._merge()
+        key = (id(self.graph), self.graph.number_of_nodes(), self.graph.number_of_edges())
+        if self._index is None or self._index_key != key:
+            self._index = CCGIndex({'nodes': self.graph.nodes(data=True), 'edges': self.graph.edges(data=True)})
+            self._index_key = key
+        return self._index
+
+    def lookup(self, entity: str):
+        """Node ids for entity: itself if it is an id, else every definition with that name."""
+        return self.index().resolve(entity)
+
     def query_relationships(self, entity: str):
-        """Query relationships for an entity (function/class)."""
-        if entity not in self.graph:
-            return {}
-        predecessors = list(self.graph.predecessors(entity))
-        successors = list(self.graph.successors(entity))
-        return {
-            'called_by': predecessors,
-            'calls': successors,
-            'inherits_from': [p for p in predecessors if self.graph.get_edge_data(p, entity, {}).get('type') == 'inherits'],
-            'inherited_by': [s for s in successors if self.graph.get_edge_data(entity, s, {}).get('type') == 'inherits']
-        }
+        """
+        Typed relationships of an entity (function/class id, or a bare name
+        for every definition with that name): called_by, calls,
+        inherits_from, inherited_by, contained_in, contains. {} if unknown.
+        """
+        return self.index().relationships(entity)
 
-def analyze_codebase(repo_path: str) -> dict:
-    """Analyze all Python files in repo_path."""
-    analyzer = CodeAnalyzer()
+    def query_relationships_many(self, entities):
+        """query_relationships for many entities in one call, as {entity: result}."""
+        return self.index().relationships_many(entities)
+
+def source_files(repo_path: str) -> list:
+    """Paths of every file analyze_codebase reads, in walk order."""
+    paths = []
     for root, dirs, files in os.walk(repo_path):
-        dirs[:] = [d for d in dirs if d not in {'.git', '__pycache__', 'node_modules'}]
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
         for file in files:
-            if file.endswith('.py'):
-                analyzer.analyze_file(os.path.join(root, file))
-    return analyzer.get_graph()
-
-def query_ccg(graph_data: dict, entity: str) -> dict:
-    """Query the CCG."""
-    G = nx.DiGraph()
-    G.add_nodes_from(graph_data['nodes'])
-    G.add_edges_from([(e[0], e[1], e[2]) for e in graph_data['edges']])
-    analyzer = CodeAnalyzer()
-    analyzer.graph = G
-    return analyzer.query_relationships(entity)
+            if file.endswith(SOURCE_EXTENSIONS):
+                paths.append(os.path.join(root, file))
+    return paths
+
+def analyze_codebase(repo_path: str, workers: int = None, cache: FragmentCache = None) -> dict:
+    """
+    Analyze all source files (SOURCE_EXTENSIONS) in repo_path, in parallel
+    and reusing cached fragments when cache is given. Files that cannot be
+    read or parsed are listed under 'diagnostics'; 'stats' counts files,
+    cache hits and files analyzed; 'digest' is the graph's graph_digest.
+    """
+    analyzer = CodeAnalyzer(root=repo_path)
+    analyzer.analyze_files(source_files(repo_path), workers=workers, cache=cache)
+    graph = analyzer.get_graph()
+    graph['stats'] = dict(analyzer.stats)
+    graph['digest'] = graph_digest(graph)
+    return graph
+
+def _query_index(graph_data: dict, repo_url: str = None) -> CCGIndex:
+    if repo_url:
+        # the resident index answers only if it was built from a graph with the same
+        # content; a freshly analyzed graph replaces whatever was resident for the repo
+        digest = graph_data.get('digest') or graph_digest(graph_data)
+        store = get_store()
+        index = store.peek(repo_url)
+        if index is None or index.digest != digest:
+            index = store.put(repo_url, graph_data, digest)
+        return index
+    return CCGIndex(graph_data)
+
+def query_ccg(graph_data: dict, entity: str, repo_url: str = None) -> dict:
+    """
+    Query the CCG. With repo_url the graph is indexed once and kept in the
+    resident graph_store under its digest, so repeated queries with the same
+    graph (even a copy sent over HTTP or Jac) skip the rebuild; a graph with
+    different content replaces the resident one.
+    """
+    return _query_index(graph_data, repo_url).relationships(entity)
+
+def query_ccg_many(graph_data: dict, entities, repo_url: str = None) -> dict:
+    """query_ccg for many entities against one index, as {entity: result}."""
+    return _query_index(graph_data, repo_url).relationships_many(entities)
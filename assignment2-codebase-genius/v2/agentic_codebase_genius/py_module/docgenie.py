@@ -1,22 +1,71 @@
 import os
 from pathlib import Path
-import graphviz
+import networkx as nx
 from pygments import highlight
 from pygments.lexers import PythonLexer
 from pygments.formatters import HtmlFormatter
 
-def generate_diagram(ccg: dict, output_path: str):
-    """Generate a Graphviz diagram from CCG."""
-    dot = graphviz.Digraph(comment='Code Context Graph')
-    for node, data in ccg['nodes']:
-        shape = 'box' if data.get('type') == 'class' else 'ellipse'
-        dot.node(node, shape=shape)
-    for edge in ccg['edges']:
-        dot.edge(edge[0], edge[1], label=edge[2].get('type', ''))
-    dot.render(output_path, format='png', cleanup=True)
+try:
+    from .graph_summary import DEFAULT_NODE_BUDGET, DEFAULT_LAYOUT_TIMEOUT, package_graph, render_dot, summarize, to_dot
+    from .tracing import maybe_span
+except ImportError:
+    from graph_summary import DEFAULT_NODE_BUDGET, DEFAULT_LAYOUT_TIMEOUT, package_graph, render_dot, summarize, to_dot
+    from tracing import maybe_span
 
-def generate_markdown(file_tree: dict, readme_summary: str, ccg: dict, repo_name: str, output_dir: str):
-    """Generate markdown documentation."""
+def _diagram_graph(ccg: dict) -> nx.DiGraph:
+    # calls and inherits edges only; clusters in the drawing stand in for 'contains'
+    graph = nx.DiGraph()
+    graph.add_nodes_from(node for node, data in ccg['nodes'] if data.get('type') != 'module')
+    graph.add_edges_from((u, v) for u, v, data in ccg['edges'] if data.get('type') in ('calls', 'inherits'))
+    return graph
+
+def _render(graph: nx.DiGraph, output_path: str, title: str, budget: int, mode: str, timeout: float) -> dict:
+    """
+    Summarize graph to budget nodes, write the DOT source to output_path.dot
+    and render output_path.png under timeout. A layout that times out is
+    retried once at half the budget. Returns the summary description with
+    'path' (None if nothing was rendered) and 'reason' when it failed.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    for _ in range(2):
+        view, info = summarize(graph, budget, mode)
+        source, _ = to_dot(view, title)
+        with open(output_path + '.dot', 'w') as f:
+            f.write(source)
+        error = render_dot(source, output_path + '.png', 'png', timeout) if view.number_of_nodes() else 'empty graph'
+        if not (error and error.startswith('layout exceeded')) or budget < 2:
+            break
+        budget //= 2
+    info['source'] = output_path + '.dot'
+    info['path'] = None if error else output_path + '.png'
+    if error:
+        info['reason'] = error
+    return info
+
+def generate_diagram(ccg: dict, output_path: str, budget: int = DEFAULT_NODE_BUDGET, mode: str = 'auto',
+                     layout_timeout: float = DEFAULT_LAYOUT_TIMEOUT) -> dict:
+    """
+    Generate a Graphviz diagram from CCG, summarized to at most budget nodes
+    (functions and classes clustered by module when they fit, otherwise
+    modules or packages; see graph_summary.summarize). The DOT source is
+    always written to output_path.dot; the PNG needs the dot binary.
+    """
+    return _render(_diagram_graph(ccg), output_path, 'Code Context Graph', budget, mode, layout_timeout)
+
+def generate_package_diagram(ccg: dict, package: str, output_path: str, budget: int = DEFAULT_NODE_BUDGET,
+                             layout_timeout: float = DEFAULT_LAYOUT_TIMEOUT) -> dict:
+    """Diagram of one top-level package (see graph_summary.packages), drawn like generate_diagram."""
+    return _render(package_graph(_diagram_graph(ccg), package), output_path, f'Package {package}', budget,
+                   'auto', layout_timeout)
+
+def api_location(data: dict) -> str:
+    """'path:line' of a CCG node, the path relative to the repository."""
+    path = data.get('path', data.get('file', ''))
+    return f"`{path}:{data['lineno']}`" if 'lineno' in data else f"`{path}`"
+
+def generate_markdown(file_tree: dict, readme_summary: str, ccg: dict, repo_name: str, output_dir: str,
+                      diagram: dict = None):
+    """Generate markdown documentation. diagram is generate_diagram's result, if it ran."""
     md = f"# {repo_name} Documentation\n\n"
     md += f"## Overview\n\n{readme_summary}\n\n"
 
@@ -35,36 +84,50 @@ def generate_markdown(file_tree: dict, readme_summary: str, ccg: dict, repo_name
 
     # API Reference from CCG
     md += "## API Reference\n\n"
-    classes = [n for n, d in ccg['nodes'] if d.get('type') == 'class']
-    functions = [n for n, d in ccg['nodes'] if d.get('type') == 'function']
+    classes = [d for n, d in ccg['nodes'] if d.get('type') == 'class']
+    functions = [d for n, d in ccg['nodes'] if d.get('type') == 'function']
     if classes:
         md += "### Classes\n\n"
         for cls in classes:
-            md += f"- **{cls}**\n"
+            md += f"- **{cls.get('qualname', cls.get('name'))}** ({api_location(cls)})\n"
     if functions:
         md += "### Functions\n\n"
         for func in functions:
-            md += f"- **{func}**\n"
+            prefix = "async " if func.get('async') else ""
+            md += f"- **{prefix}{func.get('qualname', func.get('name'))}** ({api_location(func)})\n"
 
     # Diagram
-    md += "## Code Relationships\n\n![Code Context Graph](diagram.png)\n\n"
+    md += "## Code Relationships\n\n"
+    if diagram is None or diagram.get('path'):
+        md += "![Code Context Graph](diagram.png)\n\n"
+    else:
+        md += f"Diagram not rendered ({diagram.get('reason')}); the Graphviz source is in `diagram.dot`.\n\n"
+    if diagram and diagram['level'] != 'symbol':
+        md += f"Summarized to {diagram['shown']} {diagram['level']}s from {diagram['nodes']} definitions.\n\n"
+    elif diagram and diagram['truncated']:
+        md += f"Showing the {diagram['shown']} most connected of {diagram['nodes']} definitions.\n\n"
 
     return md
 
-def generate_docs(file_tree: dict, readme_summary: str, ccg: dict, repo_url: str, output_base: str = 'outputs'):
-    """Main function to generate docs."""
+def generate_docs(file_tree: dict, readme_summary: str, ccg: dict, repo_url: str, output_base: str = 'outputs',
+                  tracer=None):
+    """Main function to generate docs. tracer gets a 'diagram' and a 'markdown' span."""
     repo_name = repo_url.split('/')[-1]
     output_dir = Path(output_base) / repo_name
     output_dir.mkdir(parents=True, exist_ok=True)
 
     # Generate diagram
     diagram_path = output_dir / 'diagram'
-    generate_diagram(ccg, str(diagram_path))
+    with maybe_span(tracer, 'diagram', nodes=len(ccg.get('nodes', []))) as span:
+        diagram = generate_diagram(ccg, str(diagram_path))
+        span.set(level=diagram['level'], shown=diagram['shown'], rendered=diagram['path'] is not None)
 
     # Generate markdown
-    md_content = generate_markdown(file_tree, readme_summary, ccg, repo_name, str(output_dir))
-    docs_path = output_dir / 'docs.md'
-    with open(docs_path, 'w') as f:
-        f.write(md_content)
+    with maybe_span(tracer, 'markdown') as span:
+        md_content = generate_markdown(file_tree, readme_summary, ccg, repo_name, str(output_dir), diagram)
+        docs_path = output_dir / 'docs.md'
+        with open(docs_path, 'w') as f:
+            f.write(md_content)
+        span.set(bytes=len(md_content.encode('utf-8')))
 
     return str(docs_path)
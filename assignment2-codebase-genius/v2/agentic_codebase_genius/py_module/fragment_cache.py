@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+
+
+def content_digest(data: bytes) -> str:
+    """Hex content hash that keys analysis fragments."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def default_cache_dir() -> Path:
+    """Cache directory, overridable with CODEGENIUS_CACHE_DIR."""
+    env = os.environ.get('CODEGENIUS_CACHE_DIR')
+    if env:
+        return Path(env)
+    return Path.home() / '.cache' / 'codebase_genius'
+
+
+class FragmentCache:
+    """
+    On-disk cache of per-file analysis fragments (see code_analyzer).
+
+    Fragments do not mention the file's path, so they are keyed by analyzer
+    version and content hash alone and a moved or re-cloned file still hits.
+    Values are zlib-compressed JSON in one SQLite file; once the payload
+    passes max_bytes the least recently used entries are dropped.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS fragments ('
+            ' key TEXT PRIMARY KEY, value BLOB NOT NULL,'
+            ' size INTEGER NOT NULL, accessed REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS fragments_accessed ON fragments(accessed)')
+        self._conn.commit()
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM fragments').fetchone()[0]
+
+    @classmethod
+    def default(cls) -> 'FragmentCache':
+        return cls(default_cache_dir() / 'fragment_cache.sqlite')
+
+    @staticmethod
+    def make_key(version: str, digest: str) -> str:
+        return f"{version}:{digest}"
+
+    def get_many(self, keys: list) -> dict:
+        """Cached fragments for keys, as {key: fragment}; missing keys are left out."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                row = self._conn.execute('SELECT value FROM fragments WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    found[key] = json.loads(zlib.decompress(row[0]))
+            now = time.time()
+            self._conn.executemany('UPDATE fragments SET accessed = ? WHERE key = ?', [(now, k) for k in found])
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: dict):
+        """Store {key: fragment} in one transaction."""
+        rows = []
+        for key, fragment in items.items():
+            value = zlib.compress(json.dumps(fragment, separators=(',', ':')).encode('utf-8'))
+            rows.append((key, value, len(value), time.time()))
+        with self._lock:
+            for key, value, size, accessed in rows:
+                old = self._conn.execute('SELECT size FROM fragments WHERE key = ?', (key,)).fetchone()
+                self._conn.execute('INSERT OR REPLACE INTO fragments (key, value, size, accessed) VALUES (?, ?, ?, ?)',
+                                   (key, value, size, accessed))
+                self._total_bytes += size - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in self._conn.execute('SELECT key, size FROM fragments ORDER BY accessed ASC'):
+            if self._total_bytes <= self.max_bytes:
+                break
+            doomed.append((key,))
+            self._total_bytes -= size
+        self._conn.executemany('DELETE FROM fragments WHERE key = ?', doomed)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM fragments').fetchone()[0]
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,316 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+DEFAULT_OUTPUT_BASE = 'outputs'
+DEFAULT_MAX_GRAPHS = 8
+QUERIES = ('callers', 'callees', 'inheritance', 'relationships', 'neighbourhood', 'shortest_path', 'node')
+
+
+def repo_name(repo_url: str) -> str:
+    """Directory name docgenie writes a repo's docs under."""
+    return repo_url.rstrip('/').split('/')[-1]
+
+
+def ccg_path(repo_url: str, output_base: str = DEFAULT_OUTPUT_BASE) -> str:
+    return os.path.join(output_base, repo_name(repo_url), 'ccg.json')
+
+
+def graph_digest(graph_data: dict) -> str:
+    """
+    Content hash of a serialized CCG's nodes and edges. analyze_codebase
+    stores it under 'digest', so the graph carries it through HTTP and Jac
+    and a resident index can be matched without hashing the graph again.
+    """
+    payload = json.dumps([graph_data['nodes'], graph_data['edges']], sort_keys=True, separators=(',', ':'),
+                         default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def save_ccg(repo_url: str, ccg: dict, output_base: str = DEFAULT_OUTPUT_BASE) -> str:
+    """Write ccg's nodes, edges and digest as JSON next to the repo's docs; returns the path."""
+    path = ccg_path(repo_url, output_base)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'nodes': ccg['nodes'], 'edges': ccg['edges'], 'digest': ccg.get('digest')}, f,
+                  separators=(',', ':'))
+    os.replace(tmp, path)
+    return path
+
+
+def load_ccg(repo_url: str, output_base: str = DEFAULT_OUTPUT_BASE):
+    """The CCG save_ccg wrote for repo_url, or None."""
+    try:
+        with open(ccg_path(repo_url, output_base)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class CCGIndex:
+    """
+    Read-only query view of one serialized CCG ({'nodes', 'edges'}).
+
+    Built once: forward and reverse adjacency per edge type, plus a
+    bare-name index, so every query is dictionary lookups and a BFS over
+    the part of the graph it touches. Entities are node ids or bare names
+    (a name stands for every definition with that name). 'contains' comes
+    from each node's 'parent' attribute where present, since a graph keeps
+    one edge per node pair and a call can take the place of that edge.
+    digest is the graph_digest of the graph it was built from, if known.
+    """
+
+    def __init__(self, graph_data: dict, digest: str = None):
+        self.digest = digest or graph_data.get('digest')
+        self.nodes = {}
+        self.out = {}
+        self.inc = {}
+        self.by_name = {}
+        for node, attrs in graph_data['nodes']:
+            self.nodes[node] = attrs
+            if attrs.get('name'):
+                self.by_name.setdefault(attrs['name'], []).append(node)
+            if attrs.get('parent'):
+                self.out.setdefault('contains', {}).setdefault(attrs['parent'], []).append(node)
+                self.inc.setdefault('contains', {}).setdefault(node, []).append(attrs['parent'])
+        for source, target, attrs in graph_data['edges']:
+            edge_type = attrs.get('type', '')
+            if edge_type == 'contains' and self.nodes.get(target, {}).get('parent') == source:
+                continue
+            self.out.setdefault(edge_type, {}).setdefault(source, []).append(target)
+            self.inc.setdefault(edge_type, {}).setdefault(target, []).append(source)
+            for node in (source, target):
+                self.nodes.setdefault(node, {})
+        self.edge_count = len(graph_data['edges'])
+
+    def resolve(self, entity: str) -> list:
+        if entity in self.nodes:
+            return [entity]
+        return list(self.by_name.get(entity, ()))
+
+    def _step(self, ids, index: dict, edge_types=None) -> list:
+        # neighbours of ids along the given edge types, first-seen order
+        seen, found = set(ids), []
+        for edge_type in (edge_types or index):
+            adjacency = index.get(edge_type, {})
+            for node in ids:
+                for neighbour in adjacency.get(node, ()):
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        found.append(neighbour)
+        return found
+
+    def callers(self, entity: str) -> list:
+        return self._step(self.resolve(entity), self.inc, ['calls'])
+
+    def callees(self, entity: str) -> list:
+        return self._step(self.resolve(entity), self.out, ['calls'])
+
+    def _closure(self, ids, index: dict) -> list:
+        seen, order, frontier = set(ids), [], list(ids)
+        while frontier:
+            frontier = [n for n in self._step(frontier, index, ['inherits']) if n not in seen]
+            seen.update(frontier)
+            order.extend(frontier)
+        return order
+
+    def inheritance(self, entity: str) -> dict:
+        """Direct bases and subclasses, and their transitive closures."""
+        ids = self.resolve(entity)
+        return {
+            'bases': self._step(ids, self.inc, ['inherits']),
+            'subclasses': self._step(ids, self.out, ['inherits']),
+            'ancestors': self._closure(ids, self.inc),
+            'descendants': self._closure(ids, self.out),
+        }
+
+    def neighbourhood(self, entity: str, k: int = 1, edge_types=None, direction: str = 'both') -> dict:
+        """
+        Nodes within k hops of entity ({id: distance}) and the edges between
+        them as [source, target, type]. direction is 'out', 'in' or 'both'.
+        """
+        indexes = {'out': [self.out], 'in': [self.inc], 'both': [self.out, self.inc]}[direction]
+        distance = {node: 0 for node in self.resolve(entity)}
+        frontier = list(distance)
+        for hop in range(1, k + 1):
+            reached = []
+            for index in indexes:
+                reached += self._step(frontier, index, edge_types)
+            frontier = [n for n in dict.fromkeys(reached) if n not in distance]
+            if not frontier:
+                break
+            for node in frontier:
+                distance[node] = hop
+        edges = []
+        for edge_type in (edge_types or self.out):
+            for source in distance:
+                for target in self.out.get(edge_type, {}).get(source, ()):
+                    if target in distance:
+                        edges.append([source, target, edge_type])
+        return {'nodes': distance, 'edges': edges}
+
+    def shortest_path(self, source: str, target: str, edge_types=None, directed: bool = True):
+        """Fewest-hop path of node ids from source to target, or None."""
+        starts, goals = self.resolve(source), set(self.resolve(target))
+        if not starts or not goals:
+            return None
+        indexes = [self.out] if directed else [self.out, self.inc]
+        parent = {node: None for node in starts}
+        queue = deque(starts)
+        while queue:
+            node = queue.popleft()
+            if node in goals:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = parent[node]
+                return path[::-1]
+            for index in indexes:
+                for neighbour in self._step([node], index, edge_types):
+                    if neighbour not in parent:
+                        parent[neighbour] = node
+                        queue.append(neighbour)
+        return None
+
+    def relationships(self, entity: str) -> dict:
+        """
+        Typed neighbours of entity: calls and called_by follow only call
+        edges, inherits_from / inherited_by only inherits edges, contains /
+        contained_in only contains edges. {} if entity is unknown.
+        """
+        ids = self.resolve(entity)
+        if not ids:
+            return {}
+        return {
+            'called_by': self._step(ids, self.inc, ['calls']),
+            'calls': self._step(ids, self.out, ['calls']),
+            'inherits_from': self._step(ids, self.inc, ['inherits']),
+            'inherited_by': self._step(ids, self.out, ['inherits']),
+            'contained_in': self._step(ids, self.inc, ['contains']),
+            'contains': self._step(ids, self.out, ['contains']),
+        }
+
+    def relationships_many(self, entities) -> dict:
+        """relationships() for each entity, as {entity: result}."""
+        return {entity: self.relationships(entity) for entity in entities}
+
+    def node(self, entity: str) -> dict:
+        return {node: self.nodes[node] for node in self.resolve(entity)}
+
+
+class GraphStore:
+    """
+    Keeps the CCGs of recently queried repos resident as CCGIndex objects,
+    least recently used first out once more than max_graphs are held. A
+    repo that is not resident is loaded with loader(repo_url), by default
+    the ccg.json the supervisor saves next to its docs.
+    """
+
+    def __init__(self, max_graphs: int = DEFAULT_MAX_GRAPHS, loader=load_ccg):
+        self.max_graphs = max_graphs
+        self.loader = loader
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._graphs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, repo_url: str, graph_data: dict, digest: str = None) -> CCGIndex:
+        index = CCGIndex(graph_data, digest)
+        with self._lock:
+            self._graphs[repo_url] = index
+            self._graphs.move_to_end(repo_url)
+            while len(self._graphs) > self.max_graphs:
+                self._graphs.popitem(last=False)
+                self.evictions += 1
+        return index
+
+    def get(self, repo_url: str):
+        """The resident index for repo_url, loading it if needed; None if there is no CCG."""
+        with self._lock:
+            index = self._graphs.get(repo_url)
+            if index is not None:
+                self._graphs.move_to_end(repo_url)
+                self.hits += 1
+                return index
+            self.misses += 1
+        graph_data = self.loader(repo_url)
+        return self.put(repo_url, graph_data) if graph_data is not None else None
+
+    def peek(self, repo_url: str):
+        """The resident index for repo_url, or None; never loads."""
+        with self._lock:
+            index = self._graphs.get(repo_url)
+            if index is not None:
+                self._graphs.move_to_end(repo_url)
+                self.hits += 1
+            return index
+
+    def evict(self, repo_url: str) -> bool:
+        with self._lock:
+            return self._graphs.pop(repo_url, None) is not None
+
+    def query(self, repo_url: str, query: str, entity: str = None, **params) -> dict:
+        """
+        Run one of QUERIES against repo_url's CCG. Returns {'status':
+        'success', 'result', 'elapsed_ms'}, {'status': 'unknown'} when no
+        CCG exists for the repo, or {'status': 'error', 'message'}.
+        """
+        if query not in QUERIES:
+            return {'status': 'error', 'message': f"unknown query {query!r}; expected one of {', '.join(QUERIES)}"}
+        index = self.get(repo_url)
+        if index is None:
+            return {'status': 'unknown', 'repo_url': repo_url, 'message': 'no code graph for this repository'}
+        if not entity or not index.resolve(entity):
+            return {'status': 'error', 'message': f"entity {entity!r} not found"}
+        start = time.perf_counter()
+        try:
+            if query == 'shortest_path':
+                if not params.get('target'):
+                    return {'status': 'error', 'message': 'shortest_path needs a target'}
+                result = index.shortest_path(entity, params['target'], params.get('edge_types'),
+                                             params.get('directed', True))
+            elif query == 'neighbourhood':
+                result = index.neighbourhood(entity, int(params.get('k', 1)), params.get('edge_types'),
+                                             params.get('direction', 'both'))
+            else:
+                result = getattr(index, query)(entity)
+        except (KeyError, ValueError) as e:
+            return {'status': 'error', 'message': str(e)}
+        return {'status': 'success', 'query': query, 'entity': entity, 'result': result,
+                'elapsed_ms': round((time.perf_counter() - start) * 1000, 3)}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'resident': list(self._graphs), 'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions}
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_store() -> GraphStore:
+    """Process-wide store; CODEGENIUS_GRAPH_STORE_SIZE overrides how many repos stay resident."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = GraphStore(int(os.environ.get('CODEGENIUS_GRAPH_STORE_SIZE', DEFAULT_MAX_GRAPHS)))
+        return _default_store
+
+
+# Thin wrappers for the Jac walkers and HTTP routes
+
+def publish_graph(repo_url: str, ccg: dict, output_base: str = DEFAULT_OUTPUT_BASE) -> str:
+    """Save ccg for repo_url and make it resident; returns the saved path."""
+    path = save_ccg(repo_url, ccg, output_base)
+    get_store().put(repo_url, ccg)
+    return path
+
+
+def query_graph(repo_url: str, query: str, entity: str = None, **params) -> dict:
+    return get_store().query(repo_url, query, entity, **params)
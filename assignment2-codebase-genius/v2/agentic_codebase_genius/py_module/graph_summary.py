@@ -0,0 +1,238 @@
+"""Condense large code graphs into diagrams a layout engine can draw.
+
+Diagrams are drawn from a summary of at most a node budget: the symbols
+themselves when they fit, otherwise the graph condensed to modules, then to
+packages, and as a last resort the most connected nodes of the package view.
+Grouping needs each node's module as a repo-relative path. By default it is
+read from the id, as in v2 ids 'path/to/mod.py::Qual.name' (a module is its
+path; ids with neither '::' nor a path are external names and are left out
+of summaries); v1 ids carry a shorter module label, so v1 passes a module
+function that maps them to repo paths. Layouts run the Graphviz `dot`
+binary under a time limit.
+
+v1 (py_modules/) and v2 (py_module/) each vendor an identical copy of this
+module: the apps are deployed and imported from their own directories and
+cannot import each other's package. v1's test_graph_summary checks that the
+copies match; change both together.
+"""
+import math
+import os
+import shutil
+import subprocess
+from typing import Callable, Dict, Optional, Tuple
+
+import networkx as nx
+
+DEFAULT_NODE_BUDGET = 60
+DEFAULT_LAYOUT_TIMEOUT = 30.0
+MODES = ('auto', 'symbol', 'module', 'package', 'top_k')
+
+
+def module_of(node: str) -> Optional[str]:
+    """Module path owning a CCG node id, or None for an external name."""
+    module, sep, _ = node.partition('::')
+    if sep or '/' in module or module.endswith(('.py', '.jac')):
+        return module
+    return None
+
+
+def package_of(module: str, depth: int = 1) -> str:
+    """The first depth directories of a module path; '.' for top-level modules."""
+    parts = module.split('/')[:-1][:depth]
+    return '/'.join(parts) or '.'
+
+
+def dot_available() -> bool:
+    return shutil.which('dot') is not None
+
+
+def condense(graph: nx.DiGraph, key: Callable[[str], Optional[str]]) -> nx.DiGraph:
+    """
+    Quotient of graph under key: one node per key value (attribute 'size' is
+    how many nodes it stands for) and one edge per connected pair, weighted
+    by the number of edges it replaces. Nodes keyed None are dropped, and so
+    are edges inside a group.
+    """
+    condensed = nx.DiGraph()
+    for node in graph.nodes:
+        group = key(node)
+        if group is not None:
+            if group in condensed:
+                condensed.nodes[group]['size'] += 1
+            else:
+                condensed.add_node(group, size=1, label=group)
+    for u, v, data in graph.edges(data=True):
+        a, b = key(u), key(v)
+        if a is None or b is None or a == b:
+            continue
+        weight = data.get('weight', 1)
+        if condensed.has_edge(a, b):
+            condensed[a][b]['weight'] += weight
+        else:
+            condensed.add_edge(a, b, weight=weight)
+    return condensed
+
+
+def top_k(graph: nx.DiGraph, k: int) -> nx.DiGraph:
+    """Subgraph of the k nodes with the highest weighted degree (ties by id)."""
+    degree = dict(graph.degree(weight='weight'))
+    keep = sorted(graph.nodes, key=lambda n: (-degree[n], n))[:k]
+    return graph.subgraph(keep).copy()
+
+
+def _symbol_view(graph: nx.DiGraph, module: Callable[[str], Optional[str]]) -> nx.DiGraph:
+    view = nx.DiGraph()
+    for node in graph.nodes:
+        owner = module(node)
+        if owner is not None:
+            view.add_node(node, size=1, label=node.partition('::')[2] or owner, cluster=owner)
+    for u, v, data in graph.edges(data=True):
+        if u in view and v in view and u != v:
+            view.add_edge(u, v, weight=data.get('weight', 1))
+    return view
+
+
+def summarize(graph: nx.DiGraph, budget: int = DEFAULT_NODE_BUDGET, mode: str = 'auto',
+              package_depth: int = 1, module: Callable[[str], Optional[str]] = module_of) -> Tuple[nx.DiGraph, Dict]:
+    """
+    A view of graph with at most budget nodes, and a description of it.
+
+    mode 'symbol', 'module' or 'package' picks the level (the most connected
+    nodes are kept if it is still over budget); 'top_k' keeps the most
+    connected symbols clustered by module; 'auto' takes the finest level that
+    fits. Nodes carry 'label', 'size' and, below package level, the 'cluster'
+    (module or package) they are grouped under. module maps a node id to
+    its repo-relative module path, or None to leave the node out.
+
+    Returns (view, {'level', 'nodes', 'edges', 'shown', 'truncated'}).
+    """
+    if mode not in MODES:
+        raise ValueError(f"unknown diagram mode {mode!r}; expected one of {', '.join(MODES)}")
+    symbols = _symbol_view(graph, module)
+    levels = {
+        'symbol': lambda: symbols,
+        'module': lambda: _with_clusters(condense(symbols, lambda n: symbols.nodes[n]['cluster']),
+                                         lambda m: package_of(m, package_depth)),
+        'package': lambda: condense(symbols, lambda n: package_of(symbols.nodes[n]['cluster'], package_depth)),
+    }
+    if mode == 'top_k':
+        level, view = 'symbol', symbols
+    elif mode == 'auto':
+        for level in ('symbol', 'module', 'package'):
+            view = levels[level]()
+            if view.number_of_nodes() <= budget:
+                break
+    else:
+        level, view = mode, levels[mode]()
+    truncated = view.number_of_nodes() > budget
+    if truncated:
+        view = top_k(view, budget)
+    return view, {'level': level, 'nodes': symbols.number_of_nodes(), 'edges': symbols.number_of_edges(),
+                  'shown': view.number_of_nodes(), 'truncated': truncated}
+
+
+def _with_clusters(graph: nx.DiGraph, cluster: Callable[[str], str]) -> nx.DiGraph:
+    for node in graph.nodes:
+        graph.nodes[node]['cluster'] = cluster(node)
+    return graph
+
+
+def packages(graph: nx.DiGraph, depth: int = 1, module: Callable[[str], Optional[str]] = module_of) -> Dict[str, int]:
+    """Package -> number of symbol and module nodes in it."""
+    counts: Dict[str, int] = {}
+    for node in graph.nodes:
+        owner = module(node)
+        if owner is not None:
+            package = package_of(owner, depth)
+            counts[package] = counts.get(package, 0) + 1
+    return counts
+
+
+def package_graph(graph: nx.DiGraph, package: str, depth: int = 1,
+                  module: Callable[[str], Optional[str]] = module_of) -> nx.DiGraph:
+    """The part of graph inside one package, for a per-package diagram."""
+    members = [n for n in graph.nodes if module(n) is not None and package_of(module(n), depth) == package]
+    return graph.subgraph(members).copy()
+
+
+def _quote(text) -> str:
+    return '"' + str(text).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+def to_dot(view: nx.DiGraph, title: str = '', rankdir: str = 'LR') -> Tuple[str, Dict[str, str]]:
+    """
+    DOT source for a summary view, with one cluster per 'cluster' value.
+    Nodes are named n0, n1, ... (CCG ids contain ':', which DOT reads as a
+    port). Returns (source, {dot name: node id}).
+    """
+    names = {node: f"n{i}" for i, node in enumerate(view.nodes)}
+    lines = ['digraph G {',
+             f'  graph [label={_quote(title)}, labelloc=t, rankdir={rankdir}, fontsize=20];',
+             '  node [shape=box, style="rounded,filled", fillcolor="#dbe9f6", fontsize=10];']
+    clusters: Dict[Optional[str], list] = {}
+    for node, data in view.nodes(data=True):
+        clusters.setdefault(data.get('cluster'), []).append(node)
+    for i, (cluster, members) in enumerate(sorted(clusters.items(), key=lambda c: str(c[0]))):
+        indent = '  '
+        if cluster is not None:
+            lines.append(f'  subgraph cluster_{i} {{')
+            lines.append(f'    label={_quote(cluster)}; style=rounded; color="#9bb0c8";')
+            indent = '    '
+        for node in members:
+            data = view.nodes[node]
+            label = data.get('label', node)
+            if data.get('size', 1) > 1:
+                label = f"{label}\n({data['size']})"
+            lines.append(f'{indent}{names[node]} [label={_quote(label)}];')
+        if cluster is not None:
+            lines.append('  }')
+    for u, v, data in view.edges(data=True):
+        weight = data.get('weight', 1)
+        extra = f', label="{weight}"' if weight > 1 else ''
+        lines.append(f'  {names[u]} -> {names[v]} [penwidth={1 + math.log2(weight):.2f}{extra}];')
+    lines.append('}')
+    return '\n'.join(lines) + '\n', {name: node for node, name in names.items()}
+
+
+def run_dot(source: str, args, timeout: float = DEFAULT_LAYOUT_TIMEOUT) -> Tuple[Optional[bytes], Optional[str]]:
+    """Run `dot` on source with args; (stdout, None), or (None, reason) on failure or timeout."""
+    if not dot_available():
+        return None, 'graphviz dot not found'
+    try:
+        done = subprocess.run(['dot'] + list(args), input=source.encode('utf-8'), capture_output=True,
+                              timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return None, f"layout exceeded {timeout}s"
+    except OSError as e:
+        return None, str(e)
+    if done.returncode != 0:
+        return None, done.stderr.decode('utf-8', 'replace').strip() or f"dot exited with {done.returncode}"
+    return done.stdout, None
+
+
+def render_dot(source: str, output_path: str, fmt: str = 'png',
+               timeout: float = DEFAULT_LAYOUT_TIMEOUT) -> Optional[str]:
+    """Render DOT source to output_path; None on success, else the reason it failed."""
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    _, error = run_dot(source, [f'-T{fmt}', '-o', output_path], timeout)
+    return error
+
+
+def layout_positions(view: nx.DiGraph, timeout: float = DEFAULT_LAYOUT_TIMEOUT) -> Tuple[Dict, str]:
+    """
+    Node positions for a summary view: `dot` under timeout when it is
+    installed, else (or when it fails) a spring layout, which is cheap at
+    summary sizes. Returns (positions, engine used).
+    """
+    if view.number_of_nodes():
+        source, names = to_dot(view)
+        plain, _ = run_dot(source, ['-Tplain'], timeout)
+        if plain is not None:
+            positions = {}
+            for line in plain.decode('utf-8', 'replace').splitlines():
+                parts = line.split()
+                if len(parts) > 3 and parts[0] == 'node' and parts[1] in names:
+                    positions[names[parts[1]]] = (float(parts[2]), float(parts[3]))
+            if len(positions) == view.number_of_nodes():
+                return positions, 'dot'
+    return nx.spring_layout(view, seed=0, iterations=50), 'spring'
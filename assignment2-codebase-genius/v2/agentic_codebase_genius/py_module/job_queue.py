@@ -0,0 +1,258 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# Job states; queued and running jobs are "in flight"
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = 'queued', 'running', 'succeeded', 'failed', 'cancelled'
+IN_FLIGHT = (QUEUED, RUNNING)
+DEFAULT_WORKERS = 2
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'outputs', 'jobs.sqlite')
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def run_pipeline(repo_url: str, progress) -> dict:
+    """Default job runner: the supervisor pipeline, reporting progress."""
+    try:
+        from .supervisor import generate_docs
+    except ImportError:
+        from supervisor import generate_docs
+    return generate_docs(repo_url, progress=progress)
+
+
+class JobQueue:
+    """
+    Persistent documentation job queue served by a bounded pool of worker
+    threads.
+
+    Jobs and their progress events live in SQLite, so queued work survives
+    a restart (jobs that were running when the process died are queued
+    again). Submitting a repo_url that already has a queued or running job
+    returns that job instead of starting another. runner(repo_url,
+    progress) does the work; it calls progress(stage, message) between
+    stages, which is also where cancellation of a running job takes effect.
+
+    Use one queue process per database file: on start-up it re-queues every
+    job still marked running.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, workers: int = DEFAULT_WORKERS, runner=run_pipeline):
+        self.db_path = db_path
+        self.workers = workers
+        self.runner = runner
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._cancelled = set()
+        self._threads = []
+        self._stopping = False
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY, repo_url TEXT NOT NULL, status TEXT NOT NULL,
+                created REAL NOT NULL, started REAL, finished REAL,
+                result TEXT, error TEXT);
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created);
+            CREATE TABLE IF NOT EXISTS job_events (
+                job_id TEXT NOT NULL, seq INTEGER NOT NULL, ts REAL NOT NULL,
+                stage TEXT NOT NULL, message TEXT,
+                PRIMARY KEY (job_id, seq));
+        """)
+        # work interrupted by a restart goes back on the queue
+        self._conn.execute("UPDATE jobs SET status = ?, started = NULL WHERE status = ?", (QUEUED, RUNNING))
+        self._conn.commit()
+
+    # -- public API ----------------------------------------------------------
+
+    def submit(self, repo_url: str) -> dict:
+        """Queue a job for repo_url, or return the in-flight one for the same URL."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status FROM jobs WHERE repo_url = ? AND status IN (?, ?) ORDER BY created LIMIT 1",
+                (repo_url, *IN_FLIGHT)).fetchone()
+            if row:
+                return {'job_id': row['id'], 'status': row['status'], 'deduplicated': True}
+            job_id = uuid.uuid4().hex
+            self._conn.execute("INSERT INTO jobs (id, repo_url, status, created) VALUES (?, ?, ?, ?)",
+                               (job_id, repo_url, QUEUED, time.time()))
+            self._add_event(job_id, QUEUED, None)
+            self._conn.commit()
+            self._wakeup.notify()
+        self._ensure_workers()
+        return {'job_id': job_id, 'status': QUEUED, 'deduplicated': False}
+
+    def status(self, job_id: str, since: int = 0) -> dict:
+        """Job state plus the progress events after sequence number since."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return {'job_id': job_id, 'status': 'unknown', 'error': 'No such job'}
+            events = self._conn.execute(
+                "SELECT seq, ts, stage, message FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, since)).fetchall()
+            position = None
+            if row['status'] == QUEUED:
+                position = self._conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = ? AND created < ?", (QUEUED, row['created'])).fetchone()[0]
+        return {
+            'job_id': job_id,
+            'repo_url': row['repo_url'],
+            'status': row['status'],
+            'queue_position': position,
+            'created': row['created'],
+            'started': row['started'],
+            'finished': row['finished'],
+            'error': row['error'],
+            'events': [dict(e) for e in events],
+        }
+
+    def result(self, job_id: str) -> dict:
+        """The pipeline result of a finished job; otherwise its status."""
+        with self._lock:
+            row = self._conn.execute("SELECT status, result, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return {'job_id': job_id, 'status': 'unknown', 'error': 'No such job'}
+        if row['status'] == SUCCEEDED:
+            return {'job_id': job_id, 'status': SUCCEEDED, 'result': json.loads(row['result'])}
+        return {'job_id': job_id, 'status': row['status'], 'error': row['error']}
+
+    def cancel(self, job_id: str) -> dict:
+        """Cancel a queued job at once, or a running one at its next progress step."""
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return {'job_id': job_id, 'status': 'unknown', 'error': 'No such job'}
+            if row['status'] == QUEUED:
+                self._finish(job_id, CANCELLED, error='Cancelled before it started')
+            elif row['status'] == RUNNING:
+                self._cancelled.add(job_id)
+                self._add_event(job_id, 'cancelling', None)
+                self._conn.commit()
+            status = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()['status']
+        return {'job_id': job_id, 'status': status, 'cancel_requested': status in IN_FLIGHT}
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._conn.close()
+
+    # -- workers -------------------------------------------------------------
+
+    def _ensure_workers(self):
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self.workers and not self._stopping:
+                thread = threading.Thread(target=self._work, name=f"job-worker-{len(self._threads)}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+    def _claim(self):
+        # called with the lock held
+        row = self._conn.execute(
+            "SELECT id, repo_url FROM jobs WHERE status = ? ORDER BY created LIMIT 1", (QUEUED,)).fetchone()
+        if row is None:
+            return None
+        self._conn.execute("UPDATE jobs SET status = ?, started = ? WHERE id = ?", (RUNNING, time.time(), row['id']))
+        self._add_event(row['id'], RUNNING, None)
+        self._conn.commit()
+        return row['id'], row['repo_url']
+
+    def _work(self):
+        while True:
+            with self._lock:
+                job = self._claim()
+                while job is None and not self._stopping:
+                    self._wakeup.wait(timeout=1.0)
+                    job = self._claim()
+                if job is None:
+                    return
+            self._run(*job)
+
+    def _run(self, job_id: str, repo_url: str):
+        def progress(stage: str, message: str = None):
+            with self._lock:
+                if job_id in self._cancelled:
+                    raise JobCancelled()
+                self._add_event(job_id, stage, message)
+                self._conn.commit()
+
+        try:
+            result = self.runner(repo_url, progress)
+        except JobCancelled:
+            self._finish_locked(job_id, CANCELLED, error='Cancelled while running')
+            return
+        except Exception as e:
+            self._finish_locked(job_id, FAILED, error=str(e))
+            return
+
+        if isinstance(result, dict) and (result.get('success') is False or result.get('status') == 'error'):
+            self._finish_locked(job_id, FAILED, result=result, error=result.get('error') or result.get('message'))
+        else:
+            self._finish_locked(job_id, SUCCEEDED, result=result)
+
+    def _finish_locked(self, job_id: str, status: str, result=None, error: str = None):
+        with self._lock:
+            self._finish(job_id, status, result, error)
+
+    def _finish(self, job_id: str, status: str, result=None, error: str = None):
+        # called with the lock held
+        self._cancelled.discard(job_id)
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, finished = ?, result = ?, error = ? WHERE id = ?",
+            (status, time.time(), json.dumps(result, default=str) if result is not None else None, error, job_id))
+        self._add_event(job_id, status, error)
+        self._conn.commit()
+
+    def _add_event(self, job_id: str, stage: str, message: str = None):
+        seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM job_events WHERE job_id = ?",
+                                 (job_id,)).fetchone()[0]
+        self._conn.execute("INSERT INTO job_events (job_id, seq, ts, stage, message) VALUES (?, ?, ?, ?, ?)",
+                           (job_id, seq, time.time(), stage, message))
+
+
+_default_queue = None
+_default_lock = threading.Lock()
+
+
+def get_queue() -> JobQueue:
+    """Process-wide queue; CODEGENIUS_JOBS_DB and CODEGENIUS_JOB_WORKERS override the defaults."""
+    global _default_queue
+    with _default_lock:
+        if _default_queue is None:
+            _default_queue = JobQueue(
+                db_path=os.environ.get('CODEGENIUS_JOBS_DB', DEFAULT_DB_PATH),
+                workers=int(os.environ.get('CODEGENIUS_JOB_WORKERS', DEFAULT_WORKERS)),
+            )
+            # resume jobs that were queued before a restart
+            _default_queue._ensure_workers()
+        return _default_queue
+
+
+# Thin wrappers for the Jac walkers and HTTP routes
+
+def submit_job(repo_url: str) -> dict:
+    return get_queue().submit(repo_url)
+
+
+def job_status(job_id: str, since: int = 0) -> dict:
+    return get_queue().status(job_id, since)
+
+
+def job_result(job_id: str) -> dict:
+    return get_queue().result(job_id)
+
+
+def cancel_job(job_id: str) -> dict:
+    return get_queue().cancel(job_id)
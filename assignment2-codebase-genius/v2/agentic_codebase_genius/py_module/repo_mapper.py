@@ -5,20 +5,56 @@ from git import Repo
 from pathlib import Path
 import re
 
+try:
+    from .code_analyzer import SOURCE_EXTENSIONS
+    from .tracing import maybe_span
+except ImportError:
+    from code_analyzer import SOURCE_EXTENSIONS
+    from tracing import maybe_span
+
 # Ignored directories and files
 IGNORED_DIRS = {'.git', '__pycache__', 'node_modules', '.venv', 'venv', 'env', 'build', 'dist', '.pytest_cache', '.mypy_cache'}
 IGNORED_FILES = {'.DS_Store', 'Thumbs.db'}
 
-def clone_repo(repo_url: str) -> str:
+def sparse_patterns() -> list:
+    """Sparse-checkout patterns: analyzed sources plus READMEs."""
+    return [f"*{ext}" for ext in SOURCE_EXTENSIONS] + ["README*", "readme*"]
+
+def sparse_by_default() -> bool:
+    """Whether clones are sparse unless a caller says otherwise (CODEGENIUS_SPARSE_CLONE=1)."""
+    return os.environ.get('CODEGENIUS_SPARSE_CLONE', '').lower() in ('1', 'true', 'yes')
+
+def sparse_clone(repo_url: str, dest: str, patterns: list = None):
+    """
+    Partial clone of repo_url into dest that only checks out files matching
+    patterns (default: sparse_patterns()).
+
+    Like a full clone it is shallow (depth 1); it is also blobless
+    (--filter=blob:none), so the blobs of matching files are fetched on
+    checkout and everything else is never downloaded. Servers that do not
+    support filters send a full shallow clone instead.
     """
-    Clone the repository to a temporary directory.
+    repo = Repo.clone_from(repo_url, dest, filter='blob:none', no_checkout=True, depth=1)
+    repo.git.config('core.sparseCheckout', 'true')
+    with open(os.path.join(repo.git_dir, 'info', 'sparse-checkout'), 'w') as f:
+        f.write('\n'.join(patterns or sparse_patterns()) + '\n')
+    repo.git.read_tree('-mu', 'HEAD')
+
+def clone_repo(repo_url: str, sparse: bool = False) -> str:
+    """
+    Shallow-clone the repository to a temporary directory.
+    With sparse=True only the files sparse_clone() checks out are fetched.
     Returns the path to the cloned repo.
     """
+    temp_dir = tempfile.mkdtemp()
     try:
-        temp_dir = tempfile.mkdtemp()
-        Repo.clone_from(repo_url, temp_dir)
+        if sparse:
+            sparse_clone(repo_url, temp_dir)
+        else:
+            Repo.clone_from(repo_url, temp_dir, depth=1)
         return temp_dir
     except Exception as e:
+        shutil.rmtree(temp_dir, ignore_errors=True)
         raise ValueError(f"Failed to clone repository: {str(e)}")
 
 def generate_file_tree(repo_path: str) -> dict:
@@ -41,6 +77,11 @@ def generate_file_tree(repo_path: str) -> dict:
     root_path = Path(repo_path)
     return build_tree(root_path)
 
+def _count_files(tree: dict) -> int:
+    if tree.get('type') == 'file':
+        return 1
+    return sum(_count_files(child) for child in tree.get('children', []))
+
 def summarize_readme(repo_path: str) -> str:
     """
     Read README.md and provide a concise summary.
@@ -72,16 +113,35 @@ def summarize_readme(repo_path: str) -> str:
     except Exception as e:
         return f"Error reading README: {str(e)}"
 
-def map_repository(repo_url: str) -> dict:
+def objects_size(repo_path: str) -> int:
+    """Bytes of git objects in a clone, i.e. what the clone transferred."""
+    total = 0
+    for root, _, files in os.walk(os.path.join(repo_path, '.git', 'objects')):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+def map_repository(repo_url: str, sparse: bool = None, tracer=None) -> dict:
     """
     Main function: clone repo, generate file tree, summarize README.
-    Returns dict with 'repo_path', 'file_tree', 'readme_summary'.
+    Returns dict with 'repo_path', 'file_tree', 'readme_summary' and
+    'bytes_transferred'. With sparse=True (default: sparse_by_default())
+    the file tree only lists the files a sparse clone checks out. tracer
+    (a tracing.Tracer) gets a 'clone' and a 'map_repo' span.
     """
-    repo_path = clone_repo(repo_url)
-    file_tree = generate_file_tree(repo_path)
-    readme_summary = summarize_readme(repo_path)
+    if sparse is None:
+        sparse = sparse_by_default()
+    with maybe_span(tracer, 'clone', sparse=sparse) as span:
+        repo_path = clone_repo(repo_url, sparse=sparse)
+        bytes_transferred = objects_size(repo_path)
+        span.set(bytes=bytes_transferred)
+    with maybe_span(tracer, 'map_repo') as span:
+        file_tree = generate_file_tree(repo_path)
+        readme_summary = summarize_readme(repo_path)
+        span.set(files=_count_files(file_tree))
     return {
         'repo_path': repo_path,
         'file_tree': file_tree,
-        'readme_summary': readme_summary
+        'readme_summary': readme_summary,
+        'bytes_transferred': bytes_transferred
     }
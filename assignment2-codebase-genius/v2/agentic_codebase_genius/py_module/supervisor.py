@@ -1,20 +1,84 @@
-from .repo_mapper import map_repository
-from .code_analyzer import analyze_codebase
-from .docgenie import generate_docs as generate_docs_internal
+import os
 
+try:
+    from .repo_mapper import map_repository
+    from .code_analyzer import analyze_codebase
+    from .fragment_cache import FragmentCache
+    from .graph_store import publish_graph
+    from .docgenie import generate_docs as generate_docs_internal
+    from .tracing import Tracer
+except ImportError:
+    from repo_mapper import map_repository
+    from code_analyzer import analyze_codebase
+    from fragment_cache import FragmentCache
+    from graph_store import publish_graph
+    from docgenie import generate_docs as generate_docs_internal
+    from tracing import Tracer
 
-def generate_docs(repo_url: str):
-    """Orchestrate the pipeline in Python and return a simple result dict."""
-    result = map_repository(repo_url)
+DEFAULT_TRACE_FILE = os.path.join(os.path.dirname(__file__), '..', 'outputs', 'traces.jsonl')
+
+
+def _no_progress(stage, message=None):
+    pass
+
+
+def generate_docs(repo_url: str, progress=None, trace_path: str = None, chrome_trace_path: str = None,
+                  analysis_cache: FragmentCache = None, analysis_workers: int = None, sparse_clone: bool = None):
+    """Orchestrate the pipeline in Python and return a simple result dict.
+
+    progress(stage, message) is called before each stage (see job_queue).
+    sparse_clone=True clones only the files the analysis reads (default:
+    CODEGENIUS_SPARSE_CLONE, see repo_mapper.sparse_by_default).
+    Each stage is timed by a tracing span (wall/CPU time, peak RSS, counts);
+    the spans are returned under 'trace', a per-stage breakdown under
+    'stages', and the spans are appended as JSON lines to trace_path
+    (default CODEGENIUS_TRACE_FILE or outputs/traces.jsonl).
+    chrome_trace_path also writes them in Chrome trace-event format.
+
+    Files are analyzed by analysis_workers processes (default: CPU count),
+    reusing fragments from analysis_cache (default: FragmentCache.default()).
+    Files that could not be analyzed are listed under 'diagnostics'.
+    The CCG is saved as ccg.json next to the docs and made resident in
+    graph_store for query_graph.
+    """
+    progress = progress or _no_progress
+    tracer = Tracer(trace_id=repo_url)
+
+    progress('cloning', repo_url)
+    result = map_repository(repo_url, sparse=sparse_clone, tracer=tracer)
     repo_path = result['repo_path']
     file_tree = result['file_tree']
     readme_summary = result['readme_summary']
 
-    ccg = analyze_codebase(repo_path)
+    progress('analyzing', repo_path)
+    with tracer.span('analyze') as span:
+        cache = analysis_cache or FragmentCache.default()
+        try:
+            ccg = analyze_codebase(repo_path, workers=analysis_workers, cache=cache)
+        finally:
+            if analysis_cache is None:
+                cache.close()
+        span.set(nodes=len(ccg['nodes']), edges=len(ccg['edges']), diagnostics=len(ccg['diagnostics']),
+                 **ccg['stats'])
 
-    docs_path = generate_docs_internal(file_tree, readme_summary, ccg, repo_url)
+    progress('generating_docs', None)
+    docs_path = generate_docs_internal(file_tree, readme_summary, ccg, repo_url, tracer=tracer)
+    with tracer.span('publish_graph'):
+        ccg_path = publish_graph(repo_url, ccg, output_base=os.path.dirname(os.path.dirname(docs_path)))
 
-    return {
+    output = {
         'status': 'success',
-        'docs_path': docs_path
+        'docs_path': docs_path,
+        'ccg_path': ccg_path,
+        'diagnostics': ccg['diagnostics'],
+        'trace': tracer.to_dicts(),
+        'stages': tracer.summary()
     }
+    try:
+        tracer.write_jsonl(trace_path or os.environ.get('CODEGENIUS_TRACE_FILE') or DEFAULT_TRACE_FILE)
+        if chrome_trace_path:
+            tracer.write_chrome_trace(chrome_trace_path)
+            output['chrome_trace_path'] = chrome_trace_path
+    except OSError:
+        pass
+    return output
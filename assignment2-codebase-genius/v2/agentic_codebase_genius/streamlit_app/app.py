@@ -5,6 +5,7 @@ import os
 import json
 import traceback
 import logging
+import time
 from datetime import datetime
 from typing import Optional
 
@@ -36,12 +37,12 @@ api_mode = st.sidebar.selectbox(
 # API endpoints based on mode
 if api_mode == 'Jac Cloud (Recommended)':
     base_url = 'http://localhost:8000'
-    generate_endpoint = f'{base_url}/walker/generate_docs'
+    generate_endpoint = f'{base_url}/walker/submit_job'
     health_endpoint = f'{base_url}/walker/health_check'
     server_command = 'jac serve jac/main.jac'
 elif api_mode == 'Flask API':
     base_url = 'http://localhost:8000'
-    generate_endpoint = f'{base_url}/generate-docs'
+    generate_endpoint = f'{base_url}/jobs'
     health_endpoint = None  # Flask doesn't have health check
     server_command = 'python main.py'
 else:  # Direct Python
@@ -50,6 +51,84 @@ else:  # Direct Python
     health_endpoint = None
     server_command = None
 
+POLL_INTERVAL = 2  # seconds between job status requests
+REQUEST_TIMEOUT = 10
+
+
+def call_job_api(action: str, **params) -> dict:
+    """Call the job API (submit/status/result/cancel) for the selected server."""
+    if api_mode == 'Jac Cloud (Recommended)':
+        walker = {'submit': 'submit_job', 'status': 'job_status', 'result': 'job_result', 'cancel': 'cancel_job'}[action]
+        response = requests.post(f'{base_url}/walker/{walker}', json=params, timeout=REQUEST_TIMEOUT)
+        data = response.json()
+        if isinstance(data, dict) and data.get('reports'):
+            return data['reports'][0]
+        return {'status': 'error', 'error': f'No reports in Jac Cloud response (HTTP {response.status_code})', 'raw': data}
+
+    if action == 'submit':
+        response = requests.post(generate_endpoint, json=params, timeout=REQUEST_TIMEOUT)
+    elif action == 'status':
+        response = requests.get(f"{generate_endpoint}/{params['job_id']}", params={'since': params.get('since', 0)}, timeout=REQUEST_TIMEOUT)
+    elif action == 'result':
+        response = requests.get(f"{generate_endpoint}/{params['job_id']}/result", timeout=REQUEST_TIMEOUT)
+    else:
+        response = requests.post(f"{generate_endpoint}/{params['job_id']}/cancel", timeout=REQUEST_TIMEOUT)
+    try:
+        return response.json()
+    except Exception:
+        return {'status': 'error', 'error': f'Invalid JSON response (HTTP {response.status_code})', 'raw_text': response.text}
+
+
+def run_job(repo_url: str) -> dict:
+    """Submit a job, show its progress events while polling, and return the pipeline result."""
+    job = call_job_api('submit', repo_url=repo_url)
+    job_id = job.get('job_id')
+    if not job_id:
+        return {'status': 'error', 'error': job.get('error') or job.get('message') or 'Job submission failed', 'raw': job}
+    if job.get('deduplicated'):
+        st.info(f'Joined the job already running for this repository ({job_id})')
+
+    progress_box = st.empty()
+    stages = []
+    since = 0
+    while True:
+        status = call_job_api('status', job_id=job_id, since=since)
+        for event in status.get('events', []):
+            since = event['seq']
+            stages.append(event['stage'] + (f" — {event['message']}" if event.get('message') else ''))
+        position = status.get('queue_position')
+        header = f"Job `{job_id}`: **{status.get('status')}**" + (f" (position {position} in queue)" if position else '')
+        progress_box.markdown(header + '\n\n' + '\n'.join(f'- {s}' for s in stages))
+        if status.get('status') not in ('queued', 'running'):
+            break
+        time.sleep(POLL_INTERVAL)
+
+    final = call_job_api('result', job_id=job_id)
+    if final.get('status') == 'succeeded':
+        return final.get('result') or {}
+    return {'status': 'error', 'error': final.get('error') or f"Job {final.get('status')}", 'job': final}
+
+
+
+def render_stage_breakdown(result: dict):
+    """Per-stage timing table and chart from the pipeline's tracing spans."""
+    stages = result.get('stages')
+    if not stages:
+        return
+    with st.expander('⏱️ Stage breakdown'):
+        rows = [{
+            'stage': '\u2003' * s.get('depth', 0) + s['stage'],
+            'wall (s)': s['wall_s'],
+            'cpu (s)': s['cpu_s'],
+            'share': f"{s['share']:.0%}" if s.get('depth', 0) == 0 else '',
+            'peak RSS (MiB)': round(s['peak_rss_kb'] / 1024, 1) if s.get('peak_rss_kb') else None,
+            'details': ', '.join(f'{k}={v}' for k, v in (s.get('attrs') or {}).items()),
+        } for s in stages]
+        st.dataframe(rows, use_container_width=True)
+        top = [s for s in stages if s.get('depth', 0) == 0]
+        st.bar_chart({'stage': [s['stage'] for s in top], 'wall (s)': [s['wall_s'] for s in top]},
+                     x='stage', y='wall (s)')
+
 # Main interface
 st.markdown('---')
 
@@ -123,29 +202,7 @@ if generate_button:
                     from py_module.supervisor import generate_docs
                     result = generate_docs(repo_url)
                 else:
-                    response = requests.post(
-                        generate_endpoint,
-                        json={'repo_url': repo_url},
-                        timeout=300,
-                    )
-
-                    # Try to parse JSON safely
-                    try:
-                        raw_result = response.json()
-                    except Exception:
-                        raw_result = {'status': 'error', 'error': f'Invalid JSON response (HTTP {response.status_code})', 'raw_text': response.text}
-
-                    if response.status_code == 200:
-                        # Normalize Jac Cloud vs Flask formats
-                        if api_mode == 'Jac Cloud (Recommended)':
-                            if isinstance(raw_result, dict) and 'reports' in raw_result and len(raw_result['reports']) > 0:
-                                result = raw_result['reports'][0]
-                            else:
-                                result = {'status': 'error', 'error': 'No reports in Jac Cloud response', 'raw': raw_result}
-                        else:
-                            result = raw_result
-                    else:
-                        result = {'status': 'error', 'error': f'HTTP {response.status_code}: {response.text}'}
+                    result = run_job(repo_url)
 
                 # Ensure we have a dict result
                 if not isinstance(result, dict):
@@ -181,6 +238,7 @@ if generate_button:
                                 st.code(trace)
                     else:
                         st.warning('No docs_path returned by the service')
+                    render_stage_breakdown(result)
 
                 else:
                     # User-facing short message
@@ -0,0 +1,152 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'py_module'))
+
+from code_analyzer import CodeAnalyzer, analyze_codebase, query_ccg, query_ccg_many
+from fragment_cache import FragmentCache
+
+
+def _write(root, rel, text):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def _edges(graph, edge_type):
+    return {(a, b) for a, b, d in graph['edges'] if d.get('type') == edge_type}
+
+
+def test_nested_scopes_and_async(tmp_path):
+    _write(tmp_path, 'pkg/service.py',
+           'class Service(Base):\n'
+           '    def run(self):\n'
+           '        def step():\n'
+           '            return helper()\n'
+           '        return step\n'
+           '    async def fetch(self):\n'
+           '        return await load()\n'
+           'def helper():\n'
+           '    return 1\n')
+    graph = analyze_codebase(str(tmp_path))
+    nodes = dict(graph['nodes'])
+
+    assert nodes['pkg/service.py']['type'] == 'module'
+    assert nodes['pkg/service.py::Service']['type'] == 'class'
+    assert nodes['pkg/service.py::Service.run.step']['name'] == 'step'
+    assert nodes['pkg/service.py::Service.fetch']['async'] is True
+    assert nodes['pkg/service.py::helper']['lineno'] == 8
+
+    contains = _edges(graph, 'contains')
+    assert ('pkg/service.py::Service', 'pkg/service.py::Service.run') in contains
+    assert ('pkg/service.py::Service.run', 'pkg/service.py::Service.run.step') in contains
+    calls = _edges(graph, 'calls')
+    # each call belongs to its innermost function only
+    assert ('pkg/service.py::Service.run.step', 'pkg/service.py::helper') in calls
+    assert ('pkg/service.py::Service.run', 'pkg/service.py::helper') not in calls
+    assert ('pkg/service.py::Service.fetch', 'load') in calls
+    assert ('Base', 'pkg/service.py::Service') in _edges(graph, 'inherits')
+
+
+def test_calling_a_nested_function_keeps_its_nesting(tmp_path):
+    _write(tmp_path, 'mod.py',
+           'def outer():\n'
+           '    def inner():\n'
+           '        return 1\n'
+           '    return inner()\n')
+    graph = analyze_codebase(str(tmp_path))
+
+    assert ('mod.py::outer', 'mod.py::inner') not in _edges(graph, 'contains')
+    assert dict(graph['nodes'])['mod.py::outer.inner']['parent'] == 'mod.py::outer'
+    inner = query_ccg(graph, 'mod.py::outer.inner')
+    assert inner['contained_in'] == ['mod.py::outer']
+    outer = query_ccg(graph, 'mod.py::outer')
+    assert outer['calls'] == ['mod.py::outer.inner']
+    assert outer['contains'] == ['mod.py::outer.inner']
+    assert outer['contained_in'] == ['mod.py']
+
+
+def test_same_names_in_different_files_stay_apart(tmp_path):
+    _write(tmp_path, 'a.py', 'def main():\n    return util()\ndef util():\n    pass\n')
+    _write(tmp_path, 'b.py', 'def main():\n    return util()\ndef util():\n    pass\nclass Child(Shared):\n    pass\n')
+    _write(tmp_path, 'c.py', 'class Shared:\n    pass\n')
+    graph = analyze_codebase(str(tmp_path))
+    nodes = dict(graph['nodes'])
+
+    assert {'a.py::main', 'b.py::main', 'a.py::util', 'b.py::util'} <= set(nodes)
+    calls = _edges(graph, 'calls')
+    assert ('a.py::main', 'a.py::util') in calls
+    assert ('b.py::main', 'b.py::util') in calls
+    assert ('a.py::main', 'b.py::util') not in calls
+    # a name defined once in the codebase resolves across files
+    assert ('c.py::Shared', 'b.py::Child') in _edges(graph, 'inherits')
+
+    # bare names still work as queries, covering every definition
+    assert set(query_ccg(graph, 'util')['called_by']) == {'a.py::main', 'b.py::main'}
+    assert set(query_ccg(graph, 'util')['contained_in']) == {'a.py', 'b.py'}
+    assert query_ccg(graph, 'b.py::Child')['inherits_from'] == ['c.py::Shared']
+
+
+def test_errors_become_diagnostics(tmp_path, capsys):
+    _write(tmp_path, 'good.py', 'def ok():\n    pass\n')
+    _write(tmp_path, 'bad.py', 'def broken(:\n    pass\n')
+    graph = analyze_codebase(str(tmp_path), workers=1)
+
+    assert 'good.py::ok' in dict(graph['nodes'])
+    assert 'bad.py' not in dict(graph['nodes'])
+    [diagnostic] = graph['diagnostics']
+    assert diagnostic['path'] == 'bad.py'
+    assert diagnostic['stage'] == 'parse'
+    assert diagnostic['error'] == 'SyntaxError'
+    assert diagnostic['lineno'] == 1
+    assert capsys.readouterr().out == ''
+
+
+def test_cached_and_parallel_runs_build_the_same_graph(tmp_path):
+    for i in range(40):
+        _write(tmp_path, f'pkg/mod_{i}.py',
+               f'class C{i}(C{i - 1}):\n    def m(self):\n        return f_{i}()\n' if i else 'class C0:\n    pass\n')
+        _write(tmp_path, f'pkg/fn_{i}.py', f'def f_{i}():\n    return f_{max(i - 1, 0)}()\n')
+    cache = FragmentCache(str(tmp_path / 'cache' / 'fragments.sqlite'))
+
+    serial = analyze_codebase(str(tmp_path / 'pkg'), workers=1)
+    first = analyze_codebase(str(tmp_path / 'pkg'), workers=2, cache=cache)
+    second = analyze_codebase(str(tmp_path / 'pkg'), workers=2, cache=cache)
+
+    assert first['stats'] == {'files': 80, 'cache_hits': 0, 'analyzed': 80}
+    assert second['stats'] == {'files': 80, 'cache_hits': 80, 'analyzed': 0}
+    for graph in (first, second):
+        assert graph['nodes'] == serial['nodes']
+        assert sorted(graph['edges']) == sorted(serial['edges'])
+    assert ('mod_5.py::C4', 'mod_5.py::C5') not in {(a, b) for a, b, _ in serial['edges']}
+    assert ('mod_4.py::C4', 'mod_5.py::C5', {'type': 'inherits'}) in serial['edges']
+
+    # an edited file misses; the rest still hit
+    _write(tmp_path, 'pkg/fn_0.py', 'def f_0():\n    return 0\n')
+    third = analyze_codebase(str(tmp_path / 'pkg'), workers=1, cache=cache)
+    assert third['stats']['cache_hits'] == 79
+    cache.close()
+
+
+def test_relationships_are_typed_and_batched(tmp_path):
+    _write(tmp_path, 'm.py',
+           'class Base:\n    pass\n'
+           'class Child(Base):\n    def run(self):\n        return work()\n'
+           'def work():\n    return 1\n')
+    analyzer = CodeAnalyzer(root=str(tmp_path))
+    analyzer.analyze_file(str(tmp_path / 'm.py'))
+
+    child = analyzer.query_relationships('Child')
+    assert child['inherits_from'] == ['m.py::Base']
+    assert child['called_by'] == [] and child['calls'] == []
+    assert child['contains'] == ['m.py::Child.run']
+    assert child['contained_in'] == ['m.py']
+
+    batch = analyzer.query_relationships_many(['work', 'Base', 'missing'])
+    assert batch['work']['called_by'] == ['m.py::Child.run']
+    assert batch['Base']['inherited_by'] == ['m.py::Child']
+    assert batch['missing'] == {}
+    assert query_ccg_many(analyzer.get_graph(), ['work'])['work'] == batch['work']
+
+    # direct edits to the graph are picked up on the next query
+    analyzer.graph.add_edge('m.py::work', 'm.py::Base', type='calls')
+    assert analyzer.query_relationships('Base')['called_by'] == ['m.py::work']
@@ -0,0 +1,59 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'py_module'))
+
+from code_analyzer import analyze_codebase
+from docgenie import generate_diagram, generate_markdown
+
+
+def _ccg(tmp_path, modules=12, functions=6):
+    repo = tmp_path / 'repo'
+    for m in range(modules):
+        package = repo / f'pkg{m % 3}'
+        package.mkdir(parents=True, exist_ok=True)
+        body = ''.join(f'def f{m}_{i}():\n    return f{m}_{i + 1}()\n' for i in range(functions))
+        (package / f'mod{m}.py').write_text(body + f'def f{m}_{functions}():\n    return f{(m + 1) % modules}_0()\n')
+    return analyze_codebase(str(repo), workers=1)
+
+
+def _fake_dot(tmp_path, monkeypatch, script):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    dot = bin_dir / 'dot'
+    dot.write_text('#!/bin/sh\n' + script)
+    dot.chmod(0o755)
+    monkeypatch.setenv('PATH', str(bin_dir) + os.pathsep + os.environ['PATH'])
+
+
+def test_diagram_is_summarized_and_source_kept_without_dot(tmp_path, monkeypatch):
+    monkeypatch.setenv('PATH', str(tmp_path))
+    ccg = _ccg(tmp_path)
+    out = str(tmp_path / 'docs' / 'diagram')
+
+    info = generate_diagram(ccg, out, budget=20)
+    assert info['level'] == 'module'
+    assert info['nodes'] == 84 and info['shown'] == 12
+    assert info['path'] is None and 'not found' in info['reason']
+    with open(out + '.dot') as f:
+        assert f.read().count('subgraph cluster_') == 3
+
+    md = generate_markdown({'type': 'file', 'name': 'a.py'}, '', ccg, 'repo', str(tmp_path), info)
+    assert '![Code Context Graph]' not in md and '`diagram.dot`' in md
+    assert 'Summarized to 12 modules from 84 definitions' in md
+
+
+def test_layout_timeout_retries_at_half_budget(tmp_path, monkeypatch):
+    _fake_dot(tmp_path, monkeypatch, 'sleep 5\n')
+    info = generate_diagram(_ccg(tmp_path), str(tmp_path / 'diagram'), budget=20, layout_timeout=0.2)
+    assert info['path'] is None and info['reason'].startswith('layout exceeded')
+    assert info['level'] == 'package' and info['shown'] == 3
+
+
+def test_rendered_diagram_is_embedded(tmp_path, monkeypatch):
+    # writes whatever follows -o, as dot -Tpng -o <path> would
+    _fake_dot(tmp_path, monkeypatch, 'while [ "$1" != -o ]; do shift; done; cat > "$2"\n')
+    info = generate_diagram(_ccg(tmp_path, modules=2, functions=2), str(tmp_path / 'diagram'))
+    assert info['level'] == 'symbol' and info['path'] == str(tmp_path / 'diagram') + '.png'
+    assert os.path.exists(info['path'])
+    md = generate_markdown({'type': 'file', 'name': 'a.py'}, '', {'nodes': [], 'edges': []}, 'repo', '', info)
+    assert '![Code Context Graph](diagram.png)' in md
@@ -0,0 +1,108 @@
+import json
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'py_module'))
+
+from code_analyzer import analyze_codebase, query_ccg
+from graph_store import CCGIndex, GraphStore, get_store, save_ccg, load_ccg, graph_digest
+
+
+def _ccg(tmp_path):
+    (tmp_path / 'models.py').write_text(
+        'class Base:\n    pass\n'
+        'class Mid(Base):\n    pass\n'
+        'class Leaf(Mid):\n    def run(self):\n        return helper()\n')
+    (tmp_path / 'util.py').write_text(
+        'def helper():\n    return inner()\n'
+        'def inner():\n    return 1\n'
+        'def entry():\n    return helper()\n')
+    return analyze_codebase(str(tmp_path), workers=1)
+
+
+def test_index_queries(tmp_path):
+    index = CCGIndex(_ccg(tmp_path))
+
+    assert index.callers('helper') == ['models.py::Leaf.run', 'util.py::entry']
+    assert index.callees('util.py::helper') == ['util.py::inner']
+    assert index.inheritance('Mid') == {'bases': ['models.py::Base'], 'subclasses': ['models.py::Leaf'],
+                                        'ancestors': ['models.py::Base'], 'descendants': ['models.py::Leaf']}
+    assert index.inheritance('Leaf')['ancestors'] == ['models.py::Mid', 'models.py::Base']
+
+    near = index.neighbourhood('helper', k=1, edge_types=['calls'])
+    assert near['nodes'] == {'util.py::helper': 0, 'util.py::inner': 1,
+                             'models.py::Leaf.run': 1, 'util.py::entry': 1}
+    assert ['util.py::entry', 'util.py::helper', 'calls'] in near['edges']
+    assert len(index.neighbourhood('helper', k=2, edge_types=['calls'], direction='out')['nodes']) == 2
+
+    assert index.shortest_path('entry', 'inner') == ['util.py::entry', 'util.py::helper', 'util.py::inner']
+    assert index.shortest_path('inner', 'entry') is None
+    assert index.shortest_path('inner', 'entry', edge_types=['calls'], directed=False) == ['util.py::inner', 'util.py::helper', 'util.py::entry']
+
+
+def test_store_loads_once_and_evicts_lru(tmp_path):
+    (tmp_path / 'repo').mkdir()
+    ccg = _ccg(tmp_path / 'repo')
+    out = str(tmp_path / 'outputs')
+    save_ccg('https://github.com/a/one', ccg, out)
+    save_ccg('https://github.com/a/two', ccg, out)
+    loads = []
+
+    def loader(repo_url):
+        loads.append(repo_url)
+        return load_ccg(repo_url, out)
+
+    store = GraphStore(max_graphs=1, loader=loader)
+    first = store.query('https://github.com/a/one', 'callers', 'inner')
+    assert first['status'] == 'success'
+    assert first['result'] == ['util.py::helper']
+    store.query('https://github.com/a/one', 'callees', 'entry')
+    assert loads == ['https://github.com/a/one']
+
+    store.query('https://github.com/a/two', 'node', 'Leaf')
+    assert store.stats()['resident'] == ['https://github.com/a/two']
+    assert store.stats()['evictions'] == 1
+
+    assert store.query('https://github.com/a/none', 'callers', 'x')['status'] == 'unknown'
+    assert store.query('https://github.com/a/two', 'callers', 'missing')['status'] == 'error'
+    assert store.query('https://github.com/a/two', 'shortest_path', 'entry')['status'] == 'error'
+    assert store.query('https://github.com/a/two', 'drop_tables', 'entry')['status'] == 'error'
+
+
+def test_query_ccg_with_repo_matches_rebuild(tmp_path):
+    ccg = _ccg(tmp_path)
+    for entity in ('helper', 'util.py::inner', 'Mid'):
+        rebuilt = query_ccg(ccg, entity)
+        resident = query_ccg(ccg, entity, repo_url='https://github.com/a/resident')
+        assert {k: sorted(set(v)) for k, v in rebuilt.items()} == {k: sorted(v) for k, v in resident.items()}
+
+
+def test_query_ccg_with_repo_uses_the_graph_passed_in(tmp_path):
+    (tmp_path / 'old').mkdir()
+    (tmp_path / 'new').mkdir()
+    old = _ccg(tmp_path / 'old')
+    (tmp_path / 'new' / 'app.py').write_text('def main():\n    return helper()\ndef helper():\n    return 2\n')
+    new = analyze_codebase(str(tmp_path / 'new'), workers=1)
+    url = 'https://github.com/a/refreshed'
+
+    assert query_ccg(old, 'inner', repo_url=url)['called_by'] == ['util.py::helper']
+    assert query_ccg(new, 'app.py::helper', repo_url=url)['called_by'] == ['app.py::main']
+    assert query_ccg(new, 'inner', repo_url=url) == {}
+    assert get_store().peek(url).digest == new['digest']
+
+
+def test_query_ccg_with_repo_reuses_the_index_for_a_copy(tmp_path):
+    ccg = _ccg(tmp_path)
+    url = 'https://github.com/a/copied'
+    query_ccg(ccg, 'helper', repo_url=url)
+    index = get_store().peek(url)
+
+    # the same graph as an HTTP or Jac caller would send it back
+    copy = json.loads(json.dumps(ccg))
+    assert query_ccg(copy, 'inner', repo_url=url)['called_by'] == ['util.py::helper']
+    assert get_store().peek(url) is index
+
+    # without the stamped digest it is hashed again, and still matches
+    del copy['digest']
+    query_ccg(copy, 'inner', repo_url=url)
+    assert get_store().peek(url) is index
+    assert graph_digest(copy) == ccg['digest']
@@ -0,0 +1,84 @@
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'py_module'))
+
+from job_queue import JobQueue
+
+
+def _wait(queue, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = queue.status(job_id)
+        if status['status'] not in ('queued', 'running'):
+            return status
+        time.sleep(0.02)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def test_submit_runs_job_with_progress(tmp_path):
+    def runner(repo_url, progress):
+        progress('cloning', repo_url)
+        progress('analyzing')
+        return {'status': 'success', 'docs_path': f'/docs/{repo_url}'}
+
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite'), workers=1, runner=runner)
+    job = queue.submit('repo-a')
+    status = _wait(queue, job['job_id'])
+
+    assert status['status'] == 'succeeded'
+    assert [e['stage'] for e in status['events']] == ['queued', 'running', 'cloning', 'analyzing', 'succeeded']
+    assert queue.result(job['job_id'])['result']['docs_path'] == '/docs/repo-a'
+    assert queue.status(job['job_id'], since=4)['events'][0]['stage'] == 'succeeded'
+    queue.shutdown()
+
+
+def test_dedup_cancel_and_failure(tmp_path):
+    release = threading.Event()
+
+    def runner(repo_url, progress):
+        if repo_url == 'slow':
+            release.wait(5)
+            progress('still-going')
+        if repo_url == 'broken':
+            raise RuntimeError('clone failed')
+        return {'status': 'success'}
+
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite'), workers=1, runner=runner)
+    slow = queue.submit('slow')
+    duplicate = queue.submit('slow')
+    assert duplicate['deduplicated'] and duplicate['job_id'] == slow['job_id']
+    waiting = queue.submit('waiting')
+    broken = queue.submit('broken')
+
+    # bounded pool: one worker, so the others stay queued behind 'slow'
+    assert queue.status(waiting['job_id'])['status'] == 'queued'
+    assert queue.cancel(waiting['job_id'])['status'] == 'cancelled'
+
+    while queue.status(slow['job_id'])['status'] != 'running':
+        time.sleep(0.02)
+    assert queue.cancel(slow['job_id'])['cancel_requested']
+    release.set()
+
+    assert _wait(queue, slow['job_id'])['status'] == 'cancelled'
+    failed = _wait(queue, broken['job_id'])
+    assert failed['status'] == 'failed' and failed['error'] == 'clone failed'
+    assert queue.result(waiting['job_id'])['status'] == 'cancelled'
+    queue.shutdown()
+
+
+def test_queue_survives_restart(tmp_path):
+    db = str(tmp_path / 'jobs.sqlite')
+
+    first = JobQueue(db, workers=0, runner=lambda url, progress: {'status': 'success'})
+    job = first.submit('repo-a')
+    first._conn.execute("UPDATE jobs SET status = 'running' WHERE id = ?", (job['job_id'],))
+    first._conn.commit()
+    first.shutdown()
+
+    second = JobQueue(db, workers=1, runner=lambda url, progress: {'status': 'success', 'url': url})
+    assert second.status(job['job_id'])['status'] == 'queued'
+    second._ensure_workers()
+    assert _wait(second, job['job_id'])['status'] == 'succeeded'
+    second.shutdown()
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'py_module'))
+
+from repo_mapper import clone_repo, generate_file_tree, objects_size, map_repository
+
+
+def _make_repo(path):
+    os.makedirs(path)
+    git = ['git', '-C', str(path), '-c', 'user.name=t', '-c', 'user.email=t@t']
+    subprocess.run(git + ['init', '-q'], check=True)
+    subprocess.run(git + ['config', 'uploadpack.allowFilter', 'true'], check=True)
+    (path / 'app.py').write_text('def main():\n    pass\n')
+    (path / 'README.md').write_text('# Demo\n')
+    (path / 'data.bin').write_bytes(os.urandom(200000))
+    subprocess.run(git + ['add', '.'], check=True)
+    subprocess.run(git + ['commit', '-q', '-m', 'init'], check=True)
+    return 'file://' + str(path)
+
+
+def test_sparse_clone_skips_unanalyzed_files(tmp_path):
+    url = _make_repo(tmp_path / 'src')
+    full = clone_repo(url)
+    sparse = clone_repo(url, sparse=True)
+
+    names = {child['name'] for child in generate_file_tree(sparse)['children']}
+    assert names == {'app.py', 'README.md'}
+    assert os.path.exists(os.path.join(full, 'data.bin'))
+    assert objects_size(sparse) < objects_size(full) / 2
+
+
+def test_sparse_clone_config_flag(tmp_path, monkeypatch):
+    url = _make_repo(tmp_path / 'src')
+    monkeypatch.setenv('CODEGENIUS_SPARSE_CLONE', '1')
+    names = {child['name'] for child in map_repository(url)['file_tree']['children']}
+    assert names == {'app.py', 'README.md'}
+    # an explicit argument wins over the flag
+    names = {child['name'] for child in map_repository(url, sparse=False)['file_tree']['children']}
+    assert 'data.bin' in names
+
+
+def test_failed_clone_leaves_no_temp_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr('tempfile.tempdir', str(tmp_path))
+    for sparse in (False, True):
+        try:
+            clone_repo('file://' + str(tmp_path / 'missing'), sparse=sparse)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('clone of a missing repository succeeded')
+    assert list(tmp_path.iterdir()) == []